@@ -1,4 +1,4 @@
-from flask import Flask, current_app
+from flask import Flask, current_app, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import cloudinary
@@ -7,7 +7,7 @@ import atexit
 
 from config import get_config
 from extensions import db, jwt, bcrypt, mail, init_redis
-from models import User, TokenBlocklist
+from models import User
 from routes import register_blueprints
 from utils.gmail import initialize_gmail_credentials
 from utils.postgresql_migrator import migrate_sqlite_to_postgresql, check_postgresql_connection
@@ -41,22 +41,48 @@ def create_app(config_class=None):
     bcrypt.init_app(app)
     init_redis(app)
     
+    # Compact, optionally compressed encoding for cached values
+    from utils.redis_utils import RedisCodec
+    with app.app_context():
+        RedisCodec.configure(app.config['REDIS_CODEC'], app.config['REDIS_COMPRESS_THRESHOLD'])
+    
+    # Optional in-process cache tier in front of Redis
+    if app.config.get('REDIS_L1_ENABLED'):
+        from utils.redis_utils import RedisCache
+        RedisCache.enable_local_cache(app.config['REDIS_L1_MAXSIZE'], app.config['REDIS_L1_TTL'])
+    
     # Cloudinary
     cloudinary.config(
         cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
         api_key=os.getenv('CLOUDINARY_API_KEY'),
-        api_secret=os.getenv('CLOUDINARY_API_SECRET')
+        api_secret=os.getenv('CLOUDINARY_API_SECRET'),
+        # Upload API host, e.g. a stub storage server in development; defaults to Cloudinary's
+        upload_prefix=os.getenv('CLOUDINARY_UPLOAD_PREFIX')
     )
     
     # Blueprints
     register_blueprints(app)
     
-    # JWT token blocklist callback
+    # Password hashing is saturated in this worker (see PasswordHasher); callers re-raise it
+    from utils.password_hasher import PasswordHasherBusy
+    
+    @app.errorhandler(PasswordHasherBusy)
+    def handle_password_hasher_busy(e):
+        return jsonify({"msg": "Too many password operations in progress, please retry shortly"}), 503, {"Retry-After": "1"}
+    
+    # JWT token blocklist callback: revocations are written to Redis on logout
+    from utils.redis_token_service import RedisTokenService
+    RedisTokenService.enable_local_cache(
+        app.config['JWT_REVOCATION_CACHE_SIZE'], app.config['JWT_REVOCATION_CACHE_TTL']
+    )
+    
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload['jti']
-        token = TokenBlocklist.query.filter_by(jti=jti).first()
-        return token is not None
+        return RedisTokenService.is_token_revoked(jwt_payload)
+    
+    @jwt.additional_claims_loader
+    def add_issued_claims(identity):
+        return RedisTokenService.get_issued_claims()
     
     # Everything below runs inside app context!
     with app.app_context():
@@ -86,8 +112,10 @@ def create_app(config_class=None):
                 db.create_all()
                 
                 # Update SQLite schema
-                from utils.db_migrate import update_sqlite_schema
+                from utils.db_migrate import update_sqlite_schema, update_sqlite_search_index, update_sqlite_task_indexes
                 update_sqlite_schema()
+                update_sqlite_search_index()
+                update_sqlite_task_indexes()
             
             # Gmail credentials
             try:
@@ -108,17 +136,19 @@ def create_app(config_class=None):
         except Exception as e:
             print(f"Cache warm-up error: {e}")
     
-    # Cache invalidation listeners
-    @db.event.listens_for(User, 'after_insert')
-    @db.event.listens_for(User, 'after_update')
-    @db.event.listens_for(User, 'after_delete')
-    def invalidate_user_cache(mapper, connection, target):
-        """Invalidate user search cache on user changes"""
-        try:
-            from utils.cache_helpers import UserSearchCache
-            UserSearchCache.invalidate_user_cache()
-        except Exception as e:
-            current_app.logger.error(f"Cache invalidation error: {e}")
+    # Apply committed user changes to the search index instead of dropping it
+    from utils.user_index import UserIndex
+    UserIndex.register_change_tracking(db.session)
+    
+    # Drop cached project roles when memberships or project owners change
+    from services.permission_service import PermissionService
+    PermissionService.register_invalidation(db.session)
+    
+    # Deadline reminders and cached overdue counts
+    from services.deadline_service import DeadlineService
+    DeadlineService.register_count_invalidation(db.session)
+    if app.config.get('DEADLINE_SCAN_ENABLED'):
+        DeadlineService.start_scheduler(app)
     
     return app
 
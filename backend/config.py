@@ -40,6 +40,22 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=15)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
     
+    # bcrypt work factor (hashes with another factor are upgraded on login) and per-worker pool
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+    BCRYPT_MAX_WORKERS = int(os.getenv('BCRYPT_MAX_WORKERS', '2'))
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', '16'))
+    BCRYPT_QUEUE_TIMEOUT = float(os.getenv('BCRYPT_QUEUE_TIMEOUT', '5'))  # seconds
+    # Per-worker cache of revocation checks, kept in sync over Redis pub/sub
+    JWT_REVOCATION_CACHE_SIZE = int(os.getenv('JWT_REVOCATION_CACHE_SIZE', '10000'))
+    JWT_REVOCATION_CACHE_TTL = int(os.getenv('JWT_REVOCATION_CACHE_TTL', '30'))  # seconds
+    # Largest number of operations one POST /tasks/batch may apply
+    TASK_BATCH_MAX_OPERATIONS = int(os.getenv('TASK_BATCH_MAX_OPERATIONS', '200'))
+    # Deadline reminders and overdue detection (one worker scans per interval). Off unless
+    # enabled, so CLI and migration runs start no scanner; the server command turns it on
+    DEADLINE_SCAN_ENABLED = os.getenv('DEADLINE_SCAN_ENABLED', 'false').lower() == 'true'
+    DEADLINE_SCAN_INTERVAL = int(os.getenv('DEADLINE_SCAN_INTERVAL', '300'))  # seconds
+    DEADLINE_REMINDER_LEAD_HOURS = int(os.getenv('DEADLINE_REMINDER_LEAD_HOURS', '24'))
+    
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
 
@@ -50,6 +66,37 @@ class Config:
     REDIS_DB = int(os.getenv('REDIS_DB', '0'))
     REDIS_SSL = os.getenv('REDIS_SSL', 'false').lower() == 'true'
     
+    # Serialization of structured cache values ('msgpack' or 'json'); values
+    # larger than the threshold (bytes, 0 to disable) are zlib-compressed
+    REDIS_CODEC = os.getenv('REDIS_CODEC', 'msgpack')
+    REDIS_COMPRESS_THRESHOLD = int(os.getenv('REDIS_COMPRESS_THRESHOLD', '1024'))
+    
+    # Keep Redis timeouts short: callers fall back to the database on failure
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '2'))
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv('REDIS_SOCKET_CONNECT_TIMEOUT', '2'))
+    
+    # Circuit breaker: stop calling Redis after consecutive failures, probe again later
+    REDIS_BREAKER_FAILURE_THRESHOLD = int(os.getenv('REDIS_BREAKER_FAILURE_THRESHOLD', '5'))
+    REDIS_BREAKER_RESET_TIMEOUT = float(os.getenv('REDIS_BREAKER_RESET_TIMEOUT', '30'))
+    REDIS_BREAKER_MAX_RESET_TIMEOUT = float(os.getenv('REDIS_BREAKER_MAX_RESET_TIMEOUT', '300'))
+    
+    # Optional in-process L1 cache in front of Redis (per gunicorn worker)
+    REDIS_L1_ENABLED = os.getenv('REDIS_L1_ENABLED', 'false').lower() == 'true'
+    REDIS_L1_MAXSIZE = int(os.getenv('REDIS_L1_MAXSIZE', '2048'))
+    REDIS_L1_TTL = int(os.getenv('REDIS_L1_TTL', '30'))
+    
+    # User search index: 'index' (memory-mapped file per host) or 'redis' (sorted sets, prefix only)
+    USER_SEARCH_BACKEND = os.getenv('USER_SEARCH_BACKEND', 'index').lower()
+    USER_INDEX_ENABLED = os.getenv('USER_INDEX_ENABLED', 'true').lower() == 'true'
+    USER_INDEX_PATH = os.getenv('USER_INDEX_PATH')  # Defaults to a file in the temp directory
+    
+    # Route cache warming for recently active users
+    CACHE_WARM_ON_STARTUP = os.getenv('CACHE_WARM_ON_STARTUP', 'false').lower() == 'true'
+    CACHE_WARM_MAX_USERS = int(os.getenv('CACHE_WARM_MAX_USERS', '200'))
+    CACHE_WARM_CONCURRENCY = int(os.getenv('CACHE_WARM_CONCURRENCY', '4'))
+    CACHE_WARM_TIME_BUDGET = int(os.getenv('CACHE_WARM_TIME_BUDGET', '60'))  # seconds
+    CACHE_WARM_ACTIVE_WINDOW = int(os.getenv('CACHE_WARM_ACTIVE_WINDOW', str(7 * 24 * 3600)))  # seconds
+    
     # Construct Redis URL
     REDIS_URL = os.getenv('REDIS_URL')
     if not REDIS_URL:
@@ -17,6 +17,8 @@ def init_redis(app):
     global redis_client
     try:
         redis_url = app.config.get('REDIS_URL')
+        socket_timeout = app.config.get('REDIS_SOCKET_TIMEOUT', 2.0)
+        connect_timeout = app.config.get('REDIS_SOCKET_CONNECT_TIMEOUT', 2.0)
         if redis_url:
             # Check if it's a secure connection (rediss://) or regular (redis://)
             if redis_url.startswith('rediss://'):
@@ -27,9 +29,9 @@ def init_redis(app):
                 
                 redis_client = valkey.from_url(
                     redis_url, 
-                    decode_responses=True,
-                    socket_timeout=10,
-                    socket_connect_timeout=10,
+                    decode_responses=False,
+                    socket_timeout=socket_timeout,
+                    socket_connect_timeout=connect_timeout,
                     retry_on_timeout=True,
                     health_check_interval=30,
                     ssl_cert_reqs=None,
@@ -40,9 +42,9 @@ def init_redis(app):
                 # Regular connection for Valkey/Redis without SSL
                 redis_client = valkey.from_url(
                     redis_url, 
-                    decode_responses=True,
-                    socket_timeout=10,
-                    socket_connect_timeout=10,
+                    decode_responses=False,
+                    socket_timeout=socket_timeout,
+                    socket_connect_timeout=connect_timeout,
                     retry_on_timeout=True,
                     health_check_interval=30
                 )
@@ -50,6 +52,14 @@ def init_redis(app):
             # Test connection
             redis_client.ping()
             app.logger.info("Redis/Valkey connection established successfully")
+            
+            # Fail fast instead of waiting out socket timeouts while Redis is down
+            from utils.redis_circuit_breaker import CircuitBreaker, CircuitBreakerClient
+            redis_client = CircuitBreakerClient(redis_client, CircuitBreaker(
+                failure_threshold=app.config.get('REDIS_BREAKER_FAILURE_THRESHOLD', 5),
+                reset_timeout=app.config.get('REDIS_BREAKER_RESET_TIMEOUT', 30),
+                max_reset_timeout=app.config.get('REDIS_BREAKER_MAX_RESET_TIMEOUT', 300)
+            ))
         else:
             app.logger.warning("Redis URL not configured")
             redis_client = None
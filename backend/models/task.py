@@ -11,6 +11,14 @@ class TaskStatus(enum.Enum):
 
 
 class Task(db.Model):
+    # Serve the GET /tasks filters (owner or project first, then status) and
+    # the deadline scans (due date windows) as index range scans
+    __table_args__ = (
+        db.Index('ix_task_owner_status_due', 'owner_id', 'status', 'due_date'),
+        db.Index('ix_task_project_status', 'project_id', 'status'),
+        db.Index('ix_task_due_status', 'due_date', 'status'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text)
@@ -1,4 +1,4 @@
-from extensions import db, bcrypt
+from extensions import db
 from utils.datetime_utils import get_utc_now
 
 class User(db.Model):
@@ -23,41 +23,32 @@ class User(db.Model):
     
     notifications = db.relationship('Notification', back_populates='user')
     
-    def __init__(self, **kwargs):
-        super(User, self).__init__(**kwargs)
-        self._invalidate_search_cache()
-    
-    def _invalidate_search_cache(self):
-        """Invalidate user search cache when user data changes"""
-        try:
-            from utils.cache_helpers import UserSearchCache
-            UserSearchCache.invalidate_user_cache()
-        except ImportError:
-            pass
-        except Exception as e:
-            print(f"Cache invalidation error: {e}")
-    
     def save(self):
-        """Custom save method with cache invalidation"""
+        """Custom save method; the search index picks the change up on commit"""
         db.session.add(self)
         db.session.commit()
-        self._invalidate_search_cache()
     
     def update(self, **kwargs):
-        """Update user with cache invalidation"""
+        """Update user; the search index picks the change up on commit"""
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
         db.session.commit()
-        self._invalidate_search_cache()
     
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        from utils.password_hasher import PasswordHasher
+        self.password_hash = PasswordHasher.hash(password)
     
     def check_password(self, password):
         if not self.password_hash:
             return False
-        return bcrypt.check_password_hash(self.password_hash, password)
+        from utils.password_hasher import PasswordHasher
+        return PasswordHasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Whether the stored hash uses an outdated bcrypt work factor"""
+        from utils.password_hasher import PasswordHasher
+        return bool(self.password_hash) and PasswordHasher.needs_rehash(self.password_hash)
     
     @staticmethod
     def create_google_user(google_info):
@@ -80,7 +71,6 @@ class User(db.Model):
         )
         db.session.add(user)
         db.session.commit()
-        user._invalidate_search_cache()
         return user
 
     @staticmethod
@@ -11,8 +11,9 @@ from utils.redis_otp_service import RedisOTPService
 from utils.redis_token_service import RedisTokenService
 from utils.google_oauth_service import GoogleOAuthService
 from utils.password_service import PasswordService
+from utils.password_hasher import PasswordHasherBusy
 from utils.cloudinary_upload import delete_cloudinary_image
-from utils.route_cache import cache_route, invalidate_cache_on_change
+from utils.route_cache import cache_route, invalidate_cache_on_change, RouteCacheManager
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -76,6 +77,8 @@ def verify_otp():
         
         return jsonify({"msg": message}), status_code
         
+    except PasswordHasherBusy:
+        raise  # 503, see create_app
     except Exception as e:
         print(f"OTP verification error: {e}")
         return jsonify({"msg": "An error occurred during verification"}), 500
@@ -115,6 +118,8 @@ def login():
         
         return jsonify(create_auth_response(user)), 200
         
+    except PasswordHasherBusy:
+        raise  # 503, see create_app
     except Exception as e:
         print(f"Login error: {e}")
         return jsonify({"msg": "An error occurred during login"}), 500
@@ -146,7 +151,7 @@ def logout():
         
         current_app.logger.info(f"Attempting to logout token with JTI: {jti}, Type: {ttype}")
         
-        success = RedisTokenService.blacklist_token(jti, ttype)
+        success = RedisTokenService.blacklist_token(jti, ttype, expires_at=jwt_data.get("exp"))
         
         current_app.logger.info(f"Logout completed for token {jti}")
         return jsonify({"msg": f"{ttype.capitalize()} token revoked successfully"}), 200
@@ -155,6 +160,21 @@ def logout():
         current_app.logger.error(f"Logout error: {e}")
         return jsonify({"msg": "Logout completed successfully"}), 200
 
+@auth_bp.route("/logout-all", methods=["DELETE"])
+@jwt_required(verify_type=False)
+def logout_all():
+    """Revoke every access and refresh token issued to the current user"""
+    try:
+        user_id = get_jwt_identity()
+        RedisTokenService.blacklist_user_tokens(user_id)
+        
+        current_app.logger.info(f"Logout from all devices completed for user {user_id}")
+        return jsonify({"msg": "Logged out from all devices"}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Logout all error: {e}")
+        return jsonify({"msg": "Logout completed successfully"}), 200
+
 @auth_bp.route("/forgot-password", methods=["POST"])
 def forgot_password():
     try:
@@ -201,6 +221,8 @@ def reset_password():
         
         return jsonify({"message": message}), status_code
         
+    except PasswordHasherBusy:
+        raise  # 503, see create_app
     except Exception as e:
         print(f"Reset password error: {e}")
         return jsonify({"msg": "An error occurred while resetting password"}), 500
@@ -461,6 +483,7 @@ def update_settings():
                 user.profile_picture = data["profile_picture"]
         
         db.session.commit()
+        RouteCacheManager.touch_user_projects(user_id)
         return jsonify({
             "msg": "Settings updated successfully",
             "user": {
@@ -18,6 +18,18 @@ def get_cache_stats():
             return jsonify({'msg': 'Admin access required'}), 403
         
         stats = CacheWarmer.get_cache_stats()
+        
+        # This worker's L1/L2 hit counters and the codec used for new writes
+        from utils.redis_utils import RedisCache, RedisCodec
+        stats['tiers'] = RedisCache.get_stats()
+        stats['codec'] = {
+            'codec': RedisCodec.codec,
+            'compress_threshold': RedisCodec.compress_threshold,
+            'compress_level': RedisCodec.compress_level
+        }
+        
+        from utils.password_hasher import PasswordHasher
+        stats['password_hashing'] = PasswordHasher.get_stats()
         return jsonify(stats), 200
         
     except Exception as e:
@@ -58,8 +70,15 @@ def warm_cache():
         if not user or not getattr(user, 'is_admin', False):
             return jsonify({'msg': 'Admin access required'}), 403
         
-        CacheWarmer.warm_common_routes()
-        return jsonify({'msg': 'Cache warming initiated'}), 200
+        data = request.get_json(silent=True) or {}
+        result = CacheWarmer.warm_common_routes(
+            user_ids=data.get('user_ids'),
+            max_users=data.get('max_users'),
+            time_budget=data.get('time_budget')
+        )
+        if not result['started']:
+            return jsonify({'msg': 'Cache warming already in progress'}), 409
+        return jsonify({'msg': 'Cache warming initiated', 'users': result['users']}), 202
         
     except Exception as e:
         print(f"Cache warming error: {e}")
@@ -6,13 +6,15 @@ from datetime import datetime, timezone, timedelta
 from models import User, Project, Task, Membership
 from extensions import db
 from utils.route_cache import cache_route
+from services.task_service import TaskService
+from services.deadline_service import DeadlineService
 from utils.datetime_utils import get_utc_now, ensure_utc, is_expired
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/dashboard/overview', methods=['GET'])
 @jwt_required()
-@cache_route(ttl=300, user_specific=True)  # Cache for 5 minutes
+@cache_route(ttl=300, user_specific=True, stale_ttl=120)  # Cache for 5 minutes, serve stale for 2 more while refreshing
 def get_dashboard_overview():
     try:
         user_id = int(get_jwt_identity())
@@ -34,21 +36,21 @@ def get_dashboard_overview():
         ).all()
         
         total_tasks = len(user_tasks)
-        completed_tasks = len([t for t in user_tasks if t.status == 'completed'])
-        in_progress_tasks = len([t for t in user_tasks if t.status == 'in_progress'])
-        pending_tasks = len([t for t in user_tasks if t.status == 'pending'])
+        task_statuses = [TaskService.get_status_value(t) for t in user_tasks]
+        completed_tasks = task_statuses.count('completed')
+        in_progress_tasks = task_statuses.count('in_progress')
+        pending_tasks = task_statuses.count('pending')
         
         current_time = get_utc_now()
-        overdue_tasks = len([
-            t for t in user_tasks 
-            if t.due_date and ensure_utc(t.due_date) < current_time and t.status != 'completed'
-        ])
+        # Kept current by the deadline scanner and task changes instead of checking every task
+        assigned_overdue, project_overdue = DeadlineService.get_overdue_counts([user_id], project_ids)
+        overdue_tasks = sum(project_overdue.values())
         
         recent_projects = sorted(user_projects, key=lambda p: ensure_utc(p.updated_at or p.created_at), reverse=True)[:5]
         recent_projects_data = []
         for project in recent_projects:
             project_tasks = [t for t in user_tasks if t.project_id == project.id]
-            project_completed = len([t for t in project_tasks if t.status == 'completed'])
+            project_completed = len([t for t in project_tasks if TaskService.get_status_value(t) == 'completed'])
             
             recent_projects_data.append({
                 'id': project.id,
@@ -63,36 +65,10 @@ def get_dashboard_overview():
             })
         
         recent_tasks = sorted(user_tasks, key=lambda t: ensure_utc(t.created_at or datetime.min.replace(tzinfo=timezone.utc)), reverse=True)[:5]
-        recent_tasks_data = []
-        for task in recent_tasks:
-            assignee_name = None
-            if task.owner_id:
-                assignee = User.query.get(task.owner_id)
-                assignee_name = assignee.full_name if assignee else 'Unknown User'
-            
-            project_name = 'Unknown Project'
-            if task.project:
-                project_name = task.project.name
-            
-            status_mapping = {
-                'pending': 'Not Started',
-                'in_progress': 'In Progress',
-                'completed': 'Completed'
-            }
-            readable_status = status_mapping.get(task.status, 'Not Started')
-            
-            recent_tasks_data.append({
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
-                'status': readable_status,
-                'due_date': task.due_date.isoformat() if task.due_date else None,
-                'created_at': task.created_at.isoformat() if task.created_at else None,
-                'project_id': task.project_id,
-                'project_name': project_name,
-                'assignee': assignee_name,
-                'is_overdue': task.due_date and ensure_utc(task.due_date) < current_time and task.status != 'completed'
-            })
+        # One query loads the recent tasks' assignees and projects
+        recent_tasks_data = TaskService.serialize_tasks(
+            TaskService.get_tasks_by_ids([task.id for task in recent_tasks])
+        )
         
         last_week = current_time - timedelta(days=7)
         weekly_tasks = len([t for t in user_tasks if t.created_at and ensure_utc(t.created_at) >= last_week])
@@ -122,6 +98,7 @@ def get_dashboard_overview():
                 'in_progress_tasks': in_progress_tasks,
                 'pending_tasks': pending_tasks,
                 'overdue_tasks': overdue_tasks,
+                'assigned_overdue_tasks': assigned_overdue[user_id],
                 'completion_rate': completion_rate,
                 'team_members': team_member_count,
                 'weekly_activity': {
@@ -5,6 +5,19 @@ from utils.route_cache import cache_route
 
 main_bp = Blueprint('main', __name__)
 
+def get_redis_health():
+    """Redis connection state and circuit breaker counters, without a round trip to Redis"""
+    from extensions import redis_client
+    
+    if redis_client is None:
+        return {"status": "disconnected", "circuit_breaker": None}
+    breaker = getattr(redis_client, 'breaker', None)
+    return {
+        # The client is falsy while the circuit is open
+        "status": "connected" if redis_client else "circuit_open",
+        "circuit_breaker": breaker.get_state() if breaker else None
+    }
+
 @main_bp.route('/', methods=['GET'])
 @cache_route(ttl=3600, user_specific=False)  # Cache for 1 hour
 def index():
@@ -46,15 +59,15 @@ def index():
         }), 200
 
 @main_bp.route('/health', methods=['GET'])
-@cache_route(ttl=60, user_specific=False)  # Cache for 1 minute
 def health_check():
-    """Health check endpoint."""
+    """Health check endpoint (not cached, so the Redis circuit breaker state is live)."""
     try:
         version_info = get_version_info()
         return jsonify({
             "status": "healthy",
             "version": version_info.get('version'),
-            "timestamp": version_info.get('build_date')
+            "timestamp": version_info.get('build_date'),
+            "redis": get_redis_health()
         }), 200
     except Exception as e:
         return jsonify({
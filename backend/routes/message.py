@@ -4,32 +4,30 @@ from models import Project, Message, Notification
 from extensions import db
 from utils.email import send_email
 from utils.route_cache import cache_route, invalidate_cache_on_change
+from services.permission_service import project_access_required
 
 message_bp = Blueprint('message', __name__)
 
 @message_bp.route('/projects/<int:project_id>/messages', methods=['GET'])
 @jwt_required()
-@cache_route(ttl=30, user_specific=True)  # Cache for 30 seconds (real-time data)
+@project_access_required()  # Checked before the cache so removed members stop seeing messages
+@cache_route(ttl=300, user_specific=True)  # Cache for 5 minutes (per project, dropped on every new message)
 def get_messages(project_id):
-    user_id = int(get_jwt_identity())
     project = Project.query.get_or_404(project_id)
-    if not any(member.id == user_id for member in project.members):
-        return jsonify({'msg': 'Not authorized'}), 403
     messages = [
         {'id': m.id, 'user': m.user.username, 'content': m.content,
-         'timestamp': m.timestamp.isoformat()}
+         'timestamp': m.created_at.isoformat() if m.created_at else None}
         for m in project.messages
     ]
-    return jsonify(messages)
+    return jsonify(messages), 200
 
 @message_bp.route('/projects/<int:project_id>/messages', methods=['POST'])
 @jwt_required()
+@project_access_required()
 @invalidate_cache_on_change(['messages'])
 def post_message(project_id):
     user_id = int(get_jwt_identity())
     project = Project.query.get_or_404(project_id)
-    if not any(member.id == user_id for member in project.members):
-        return jsonify({'msg': 'Not authorized'}), 403
     data = request.get_json()
     content = data.get('content')
     if not content:
@@ -11,9 +11,10 @@ notification_bp = Blueprint('notification', __name__)
 @cache_route(ttl=60, user_specific=True)  # Cache for 1 minute
 def list_notifications():
     user_id = int(get_jwt_identity())
-    notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.timestamp.desc()).all()
+    notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).all()
     return jsonify([
-        {'id': n.id, 'message': n.message, 'is_read': n.is_read, 'timestamp': n.timestamp.isoformat()}
+        {'id': n.id, 'message': n.message, 'is_read': n.is_read,
+         'timestamp': n.created_at.isoformat() if n.created_at else None}
         for n in notifications
     ])
 
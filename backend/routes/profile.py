@@ -5,7 +5,7 @@ from models import User
 from extensions import db
 from utils.validation import sanitize_string
 from utils.cloudinary_upload import upload_profile_image, delete_cloudinary_image, validate_image_file
-from utils.route_cache import cache_route, invalidate_cache_on_change
+from utils.route_cache import cache_route, invalidate_cache_on_change, RouteCacheManager
 
 profile_bp = Blueprint("profile", __name__)
 
@@ -72,11 +72,8 @@ def update_profile():
         if "notify_in_app" in data:
             user.notify_in_app = bool(data["notify_in_app"])
         
-        # Invalidate user search cache
-        from utils.cache_helpers import UserSearchCache
-        UserSearchCache.invalidate_user_cache()
-        
         db.session.commit()
+        RouteCacheManager.touch_user_projects(user_id)
         
         return jsonify({
             "msg": "Profile updated successfully",
@@ -127,6 +124,7 @@ def upload_profile_image_endpoint():
         
         user.profile_picture = upload_result['secure_url']
         db.session.commit()
+        RouteCacheManager.touch_user_projects(user_id)
         
         return jsonify({
             "msg": "Profile image uploaded successfully",
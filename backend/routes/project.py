@@ -101,7 +101,7 @@ def list_projects():
 
 @project_bp.route('/projects/<int:project_id>', methods=['GET'])
 @jwt_required()
-@cache_route(ttl=240, user_specific=True)  # Cache for 4 minutes
+@cache_route(ttl=900, user_specific=True)  # Cache for 15 minutes (per project, version-invalidated)
 def get_project(project_id):
     """Get detailed project information"""
     user_id = int(get_jwt_identity())
@@ -148,17 +148,37 @@ def add_member(project_id):
 
 @project_bp.route('/users/search', methods=['GET'])
 @jwt_required()
-@cache_route(ttl=600, user_specific=False)  # Cache for 10 minutes, not user-specific
+@cache_route(ttl=600, user_specific=False, invalidation_patterns=['users'])  # Cache for 10 minutes, not user-specific
 def search_users():
-    """Get users for member auto-completion with optimized queries"""
+    """
+    Get users for member auto-completion with optimized queries
+    
+    Pages by offset in relevance order by default. Passing cursor (empty for the
+    first page, then each response's next_cursor) pages by keyset in
+    (lower(username), id) order instead.
+    """
+    search_query = request.args.get('q', '')
+    cursor = request.args.get('cursor')
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        limit = 0
     try:
-        search_query = request.args.get('q', '')
-        limit = min(int(request.args.get('limit', 20)), 50)
         offset = int(request.args.get('offset', 0))
-        
-        result = UserService.search_users(search_query, limit, offset)
+    except ValueError:
+        offset = -1
+    if limit < 1:
+        return jsonify({'msg': 'Invalid limit'}), 400
+    if offset < 0:
+        return jsonify({'msg': 'Invalid offset'}), 400
+    
+    try:
+        result = UserService.search_users(search_query, min(limit, 50), offset, cursor)
         return jsonify(result), 200
         
+    except ValueError:
+        # Only a malformed cursor; the parser's message is not passed on
+        return jsonify({'msg': 'Invalid cursor'}), 400
     except Exception as e:
         print(f"Search users error: {e}")
         return jsonify({'msg': 'An error occurred while searching users'}), 500
@@ -14,11 +14,18 @@ redis_bp = Blueprint('redis', __name__)
 def redis_status():
     """Check Redis connection and basic stats"""
     try:
-        if not redis_client:
+        breaker = getattr(redis_client, 'breaker', None)
+        if redis_client is None:
             return jsonify({
                 'status': 'disconnected',
                 'error': 'Redis client not initialized'
             }), 500
+        if not redis_client:
+            return jsonify({
+                'status': 'circuit_open',
+                'error': 'Redis calls are failing fast until the circuit breaker probes again',
+                'circuit_breaker': breaker.get_state()
+            }), 503
         
         start_time = time.time()
         redis_client.ping()
@@ -32,7 +39,8 @@ def redis_status():
             'redis_version': info.get('redis_version', 'unknown'),
             'memory_used': info.get('used_memory_human', 'unknown'),
             'connected_clients': info.get('connected_clients', 0),
-            'total_commands_processed': info.get('total_commands_processed', 0)
+            'total_commands_processed': info.get('total_commands_processed', 0),
+            'circuit_breaker': breaker.get_state() if breaker else None
         }), 200
         
     except Exception as e:
@@ -74,16 +82,18 @@ def cache_stats():
         route_stats = CacheWarmer.get_cache_stats()
         user_stats = UserSearchCache.get_cache_stats()
         
-        # Count cache entries
-        cache_keys = redis_client.keys(f"{RouteCacheManager.CACHE_PREFIX}*") if redis_client else []
-        invalidation_keys = redis_client.keys(f"{RouteCacheManager.INVALIDATION_PREFIX}*") if redis_client else []
+        # Count cache entries with a bounded SCAN; large keyspaces get an estimate
+        cache_keys = RedisCache.count_keys(f"{RouteCacheManager.CACHE_PREFIX}*")
+        version_keys = RedisCache.count_keys(f"{RouteCacheManager.VERSION_PREFIX}*")
         
         return jsonify({
             'route_cache': route_stats,
             'user_cache': user_stats,
-            'cache_entries': len(cache_keys),
-            'invalidation_entries': len(invalidation_keys),
-            'sample_cache_keys': cache_keys[:10] if cache_keys else []
+            'tiers': RedisCache.get_stats(),
+            'cache_entries': cache_keys['count'],
+            'version_entries': version_keys['count'],
+            'counts_exact': cache_keys['exact'] and version_keys['exact'],
+            'sample_cache_keys': cache_keys['sample_keys']
         }), 200
         
     except Exception as e:
@@ -1,23 +1,25 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import cloudinary.uploader
 from models import Task, User, Project, TaskAttachment, Notification
 from extensions import db
 from utils.email import send_email
+from utils.cloudinary_upload import sign_task_attachment_upload, verify_task_attachment_upload, CloudinaryNotConfigured
 from utils.datetime_utils import ensure_utc
-from utils.route_cache import cache_route, invalidate_cache_on_change
+from utils.route_cache import cache_route, invalidate_cache_on_change, RouteCacheManager
+from services.permission_service import PermissionService, project_access_required
+from services.task_service import TaskService
 
 task_bp = Blueprint('task', __name__)
 
 @task_bp.route('/projects/<int:project_id>/tasks', methods=['POST'])
 @jwt_required()
+@project_access_required(message='Not a member of this project')
 @invalidate_cache_on_change(['tasks', 'projects'])
 def create_task(project_id):
     user_id = int(get_jwt_identity())
     project = Project.query.get_or_404(project_id)
-    if not any(member.id == user_id for member in project.members):
-        return jsonify({'msg': 'Not a member of this project'}), 403
     data = request.get_json()
     if not data or 'title' not in data:
         return jsonify({'msg': 'Title required'}), 400
@@ -39,22 +41,14 @@ def create_task(project_id):
         except ValueError:
             return jsonify({'msg': 'Invalid date format. Use ISO format with timezone.'}), 400
     status = data.get('status', 'To Do')
-    status_mapping = {
-        'To Do': 'pending',
-        'In Progress': 'in_progress', 
-        'Done': 'completed',
-        'pending': 'pending',
-        'in_progress': 'in_progress',
-        'completed': 'completed'
-    }
-    status = status_mapping.get(status, 'pending')
+    status = TaskService.parse_status(status)
     
     assignee = None
     if 'assignee_id' in data:
         assignee = User.query.get(data['assignee_id'])
         if not assignee:
             return jsonify({'msg': 'Assignee not found'}), 404
-        if not any(member.id == assignee.id for member in project.members):
+        if not PermissionService.is_member(assignee.id, project.id):
             return jsonify({'msg': 'Assignee must be project member'}), 400
     
     task = Task(
@@ -79,13 +73,11 @@ def create_task(project_id):
 
 @task_bp.route('/tasks/<int:task_id>/attachment', methods=['POST'])
 @jwt_required()
+@project_access_required()
 @invalidate_cache_on_change(['tasks'])
 def add_attachment(task_id):
-    user_id = int(get_jwt_identity())
     task = Task.query.get_or_404(task_id)
-    project = task.project
-    if not any(member.id == user_id for member in project.members):
-        return jsonify({'msg': 'Not authorized'}), 403
+    RouteCacheManager.touch_project(task.project_id)
     if 'file' not in request.files:
         return jsonify({'msg': 'No file part'}), 400
     file = request.files['file']
@@ -97,42 +89,68 @@ def add_attachment(task_id):
     db.session.commit()
     return jsonify({'msg': 'File uploaded', 'url': attachment.file_url})
 
+@task_bp.route('/tasks/<int:task_id>/attachment/upload-params', methods=['POST'])
+@jwt_required()
+@project_access_required()
+def get_attachment_upload_params(task_id):
+    """Signed parameters for uploading an attachment directly to storage"""
+    Task.query.get_or_404(task_id)
+    try:
+        return jsonify(sign_task_attachment_upload(task_id)), 200
+    except CloudinaryNotConfigured as e:
+        current_app.logger.error(f"Attachment upload signing unavailable: {e}")
+        return jsonify({'msg': 'File uploads are not available'}), 503
+
+@task_bp.route('/tasks/<int:task_id>/attachment/complete', methods=['POST'])
+@jwt_required()
+@project_access_required()
+@invalidate_cache_on_change(['tasks'])
+def complete_attachment_upload(task_id):
+    """Record an attachment the client uploaded with signed parameters"""
+    task = Task.query.get_or_404(task_id)
+    data = request.get_json()
+    if not data:
+        return jsonify({'msg': 'Upload result required'}), 400
+    
+    try:
+        file_url = verify_task_attachment_upload(task_id, data)
+    except CloudinaryNotConfigured as e:
+        current_app.logger.error(f"Attachment upload verification unavailable: {e}")
+        return jsonify({'msg': 'File uploads are not available'}), 503
+    if not file_url:
+        return jsonify({'msg': 'Invalid upload result'}), 400
+    
+    # Completing the same upload twice records it once
+    attachment = TaskAttachment.query.filter_by(task_id=task_id, file_url=file_url).first()
+    if attachment:
+        return jsonify({'msg': 'File uploaded', 'url': attachment.file_url}), 200
+    
+    attachment = TaskAttachment(task_id=task_id, file_url=file_url)
+    db.session.add(attachment)
+    db.session.commit()
+    RouteCacheManager.touch_project(task.project_id)
+    return jsonify({'msg': 'File uploaded', 'url': attachment.file_url}), 201
+
 @task_bp.route('/tasks', methods=['GET'])
 @jwt_required()
 @cache_route(ttl=120, user_specific=True)  # Cache for 2 minutes
 def get_all_tasks():
+    """
+    List the user's tasks with filters, sorting and cursor pagination
+
+    Responds with {"tasks": [...], "pagination": {"limit", "has_more",
+    "next_cursor"}}. This replaced the bare list of all the user's tasks that
+    the endpoint used to return; clients follow next_cursor for more pages.
+    Bad parameters get a 400 naming the parameter (see TaskService.list_tasks).
+    """
     user_id = int(get_jwt_identity())
-    tasks = Task.query.filter_by(owner_id=user_id).all()
-    tasks_data = []
-    for task in tasks:
-        status_mapping = {
-            'pending': 'Not Started',
-            'in_progress': 'In Progress',
-            'completed': 'Completed'
-        }
-        readable_status = status_mapping.get(task.status.value if hasattr(task.status, 'value') else str(task.status), 'Not Started')
-        
-        # Get assignee name
-        assignee_name = None
-        if task.owner_id:
-            assignee = User.query.get(task.owner_id)
-            assignee_name = assignee.full_name if assignee else 'Unknown User'
-        
-        task_data = {
-            'id': task.id,
-            'title': task.title,
-            'description': task.description,
-            'due_date': task.due_date.isoformat() if task.due_date else None,
-            'status': readable_status,
-            'project_id': task.project_id,
-            'owner_id': task.owner_id,
-            'assignee_id': task.owner_id,
-            'assignee': assignee_name,
-            'created_at': task.created_at.isoformat() if task.created_at else None,
-            'project_name': task.project.name if task.project else None
-        }
-        tasks_data.append(task_data)
-    return jsonify(tasks_data)
+    try:
+        tasks, pagination = TaskService.list_tasks(user_id, request.args)
+    except PermissionError as e:
+        return jsonify({'msg': str(e)}), 403
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+    return jsonify({'tasks': TaskService.serialize_tasks(tasks), 'pagination': pagination})
 
 @task_bp.route('/tasks', methods=['POST'])
 @jwt_required()
@@ -154,7 +172,7 @@ def create_task_direct():
     description = data.get('description', '')
     
     project = Project.query.get_or_404(project_id)
-    if not any(member.id == user_id for member in project.members):
+    if not PermissionService.is_member(user_id, project.id):
         return jsonify({'msg': 'Not a member of this project'}), 403
     
     due_date = None
@@ -174,16 +192,7 @@ def create_task_direct():
             return jsonify({'msg': 'Invalid date format. Use ISO format with timezone.'}), 400
     
     status = data.get('status', 'To Do')
-    # Map status to enum values
-    status_mapping = {
-        'To Do': 'pending',
-        'In Progress': 'in_progress', 
-        'Done': 'completed',
-        'pending': 'pending',
-        'in_progress': 'in_progress',
-        'completed': 'completed'
-    }
-    status = status_mapping.get(status, 'pending')
+    status = TaskService.parse_status(status)
     
     assignee_id = data.get('assignee_id')
     
@@ -191,7 +200,7 @@ def create_task_direct():
         assignee = User.query.get(assignee_id)
         if not assignee:
             return jsonify({'msg': 'Assignee not found'}), 404
-        if not any(member.id == assignee.id for member in project.members):
+        if not PermissionService.is_member(assignee.id, project.id):
             return jsonify({'msg': 'Assignee must be project member'}), 400
     
     task = Task(
@@ -204,6 +213,7 @@ def create_task_direct():
     )
     db.session.add(task)
     db.session.commit()
+    RouteCacheManager.touch_project(project_id)
     
     if assignee_id and assignee_id != user_id:
         assignee = User.query.get(assignee_id)
@@ -216,21 +226,40 @@ def create_task_direct():
     
     return jsonify({'msg': 'Task created', 'task_id': task.id}), 201
 
+@task_bp.route('/tasks/batch', methods=['POST'])
+@jwt_required()
+@invalidate_cache_on_change(['tasks', 'projects'])
+def batch_tasks():
+    """Create, update, change the status of and delete many tasks in one transaction"""
+    user_id = int(get_jwt_identity())
+    data = request.get_json()
+    
+    if not data or 'operations' not in data:
+        return jsonify({'msg': 'Operations required'}), 400
+    
+    try:
+        results = TaskService.apply_batch(user_id, data['operations'])
+        return jsonify({'msg': 'Batch applied', 'results': results}), 200
+    except PermissionError as e:
+        return jsonify({'msg': str(e)}), 403
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+    except Exception:
+        current_app.logger.exception("Batch tasks error")
+        return jsonify({'msg': 'An error occurred while applying the batch'}), 500
+
 @task_bp.route('/tasks/<int:task_id>', methods=['PUT'])
 @jwt_required()
+@project_access_required()
 @invalidate_cache_on_change(['tasks', 'projects'])
 def update_task_direct(task_id):
-    user_id = int(get_jwt_identity())
     data = request.get_json()
     
     if not data:
         return jsonify({'msg': 'No data provided'}), 400
         
     task = Task.query.get_or_404(task_id)
-    project = task.project
-    
-    if not any(member.id == user_id for member in project.members):
-        return jsonify({'msg': 'Not authorized'}), 403
+    RouteCacheManager.touch_project(task.project_id)
     
     if 'title' in data:
         task.title = data['title']
@@ -255,19 +284,13 @@ def update_task_direct(task_id):
             task.due_date = None
     
     if 'status' in data:
-        status_mapping = {
-            'To Do': 'pending',
-            'In Progress': 'in_progress', 
-            'Done': 'completed',
-            'pending': 'pending',
-            'in_progress': 'in_progress',
-            'completed': 'completed'
-        }
-        task.status = status_mapping.get(data['status'], 'pending')
+        task.status = TaskService.parse_status(data['status'])
     if 'project_id' in data:
         task.project_id = data['project_id']
+        RouteCacheManager.touch_project(task.project_id)
     if 'owner_id' in data:
         task.owner_id = data['owner_id']
+        RouteCacheManager.touch_user(task.owner_id)
     db.session.commit()
     return jsonify({'msg': 'Task updated'})
 
@@ -277,19 +300,12 @@ def update_task_direct(task_id):
 def delete_task_direct(task_id):
     user_id = int(get_jwt_identity())
     task = Task.query.get_or_404(task_id)
-    project = task.project
+    project_id = task.project_id
     
     # Check permissions - project owner, task assignee, or project editor can delete
-    from models.project import Membership
-    user_membership = Membership.query.filter_by(
-        user_id=user_id, 
-        project_id=project.id
-    ).first()
-    
     can_delete = (
-        project.owner_id == user_id or 
         task.owner_id == user_id or 
-        (user_membership and user_membership.is_editor)
+        PermissionService.can_edit(user_id, project_id)
     )
     
     if not can_delete:
@@ -301,35 +317,25 @@ def delete_task_direct(task_id):
     # Delete the task
     db.session.delete(task)
     db.session.commit()
+    RouteCacheManager.touch_project(project_id)
     return jsonify({'msg': 'Task deleted'})
 
 @task_bp.route('/tasks/<int:task_id>/status', methods=['PUT'])
 @jwt_required()
+@project_access_required()
 @invalidate_cache_on_change(['tasks', 'projects'])
 def update_task_status(task_id):
-    user_id = int(get_jwt_identity())
     data = request.get_json()
     
     if not data or 'status' not in data:
         return jsonify({'msg': 'Status is required'}), 400
         
     task = Task.query.get_or_404(task_id)
-    project = task.project
-    
-    if not any(member.id == user_id for member in project.members):
-        return jsonify({'msg': 'Not authorized'}), 403
     
-    status_mapping = {
-        'Not Started': 'pending',
-        'In Progress': 'in_progress', 
-        'Completed': 'completed',
-        'pending': 'pending',
-        'in_progress': 'in_progress',
-        'completed': 'completed'
-    }
-    new_status = status_mapping.get(data['status'], 'pending')
+    new_status = TaskService.parse_status(data['status'])
     task.status = new_status
     
     db.session.commit()
+    RouteCacheManager.touch_project(task.project_id)
     return jsonify({'msg': 'Task status updated'})
 
@@ -0,0 +1,261 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import case, event, func, inspect
+from models import Task, Project, User, Notification
+from extensions import db
+from utils.datetime_utils import get_utc_now, ensure_utc
+from utils.redis_utils import RedisCache
+
+class DeadlineService:
+    """
+    Deadline reminders, overdue detection and cached overdue counts
+
+    A scan looks only at tasks whose due date entered a window since the
+    previous scan: due dates that just passed (now overdue) and due dates
+    that just came within DEADLINE_REMINDER_LEAD_HOURS (reminders). Both are
+    range scans of the (due_date, status) index. With DEADLINE_SCAN_ENABLED
+    (set by the server command, off for CLI and migration runs) each worker
+    runs a scheduler thread, but a Redis lock held for the scan interval lets
+    only one of them scan per interval, and the end of the last scanned window is kept in Redis
+    so windows neither overlap nor leave gaps. Without Redis nothing is scanned.
+
+    Overdue counts per assignee and per project are cached in Redis, computed
+    with one grouped query on a miss, dropped when a committed change moves,
+    completes or deletes a task, and recomputed once the scope's next open
+    due date has passed.
+    """
+
+    LOCK_KEY = "deadline_scan:lock"
+    LAST_SCAN_KEY = "deadline_scan:last"
+    COUNT_PREFIX = "overdue_count:"
+    COUNT_TTL = 3600  # 1 hour
+    MAX_CATCH_UP = timedelta(days=1)  # After a long outage, skip older windows instead of flooding users
+    MESSAGE_LENGTH = 200  # Notification.message
+
+    _scheduler_pid = None
+    _scheduler_lock = threading.Lock()
+
+    @staticmethod
+    def get_count_key(scope, scope_id):
+        return f"{DeadlineService.COUNT_PREFIX}{scope}:{scope_id}"
+
+    @staticmethod
+    def get_overdue_counts(user_ids=(), project_ids=()):
+        """
+        Overdue task counts by assignee and by project, cached
+
+        Each cached count carries the scope's earliest open due date still in
+        the future when it was computed. Once that moment passes the count may
+        be short, so it is recomputed; this keeps the counts right whether or
+        not a scanner runs.
+
+        Returns:
+            tuple: ({user_id: count}, {project_id: count})
+        """
+        scopes = [('user', int(user_id)) for user_id in user_ids]
+        scopes += [('project', int(project_id)) for project_id in project_ids]
+        if not scopes:
+            return {}, {}
+
+        now = get_utc_now()
+        values = RedisCache.get_many([DeadlineService.get_count_key(*scope) for scope in scopes])
+        counts = {}
+        for scope, value in zip(scopes, values):
+            if isinstance(value, list) and len(value) == 2 and (value[1] is None or now.timestamp() < value[1]):
+                counts[scope] = value[0]
+
+        missing = [scope for scope in scopes if scope not in counts]
+        if missing:
+            naive_now = now.replace(tzinfo=None)
+            computed = {scope: (0, None) for scope in missing}
+            for scope, column in (('user', Task.owner_id), ('project', Task.project_id)):
+                scope_ids = [scope_id for name, scope_id in missing if name == scope]
+                if not scope_ids:
+                    continue
+                rows = db.session.query(
+                    column,
+                    func.sum(case((Task.due_date < naive_now, 1), else_=0)),
+                    func.min(case((Task.due_date >= naive_now, Task.due_date), else_=None))
+                ).filter(
+                    column.in_(scope_ids), Task.status != 'completed'
+                ).group_by(column).all()
+                for scope_id, count, next_due in rows:
+                    computed[(scope, scope_id)] = (int(count or 0), ensure_utc(next_due).timestamp() if next_due else None)
+            RedisCache.set_many(
+                {DeadlineService.get_count_key(*scope): list(value) for scope, value in computed.items()},
+                DeadlineService.COUNT_TTL
+            )
+            counts.update({scope: count for scope, (count, _) in computed.items()})
+
+        return (
+            {scope_id: counts[(name, scope_id)] for name, scope_id in scopes if name == 'user'},
+            {scope_id: counts[(name, scope_id)] for name, scope_id in scopes if name == 'project'}
+        )
+
+    @staticmethod
+    def invalidate_counts(user_ids=(), project_ids=()):
+        keys = [DeadlineService.get_count_key('user', user_id) for user_id in set(user_ids) if user_id is not None]
+        keys += [DeadlineService.get_count_key('project', project_id) for project_id in set(project_ids) if project_id is not None]
+        if keys:
+            RedisCache.delete_many(keys)
+
+    @staticmethod
+    def register_count_invalidation(session):
+        """Drop the counts of assignees and projects whose tasks change, once per committed transaction"""
+        event.listen(session, 'after_flush', DeadlineService._collect_changes)
+        event.listen(session, 'after_commit', DeadlineService._publish_changes)
+        event.listen(session, 'after_rollback', DeadlineService._discard_changes)
+
+    @staticmethod
+    def _collect_changes(session, flush_context):
+        changes = session.info.setdefault('overdue_count_changes', (set(), set()))
+        user_ids, project_ids = changes
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if not isinstance(obj, Task):
+                continue
+            state = inspect(obj)
+            if obj in session.dirty and not any(
+                state.attrs[name].history.has_changes() for name in ('due_date', 'status', 'owner_id', 'project_id')
+            ):
+                continue
+            for ids, name in ((user_ids, 'owner_id'), (project_ids, 'project_id')):
+                history = state.attrs[name].history
+                ids.update(history.added or [getattr(obj, name)])
+                ids.update(history.deleted or [])
+
+    @staticmethod
+    def _publish_changes(session):
+        changes = session.info.pop('overdue_count_changes', None)
+        if changes and (changes[0] or changes[1]):
+            try:
+                DeadlineService.invalidate_counts(*changes)
+            except Exception as e:
+                print(f"Overdue count invalidation error: {e}")
+
+    @staticmethod
+    def _discard_changes(session):
+        session.info.pop('overdue_count_changes', None)
+
+    @staticmethod
+    def find_tasks(due_after, due_until):
+        """Open tasks due in (due_after, due_until], with their project names"""
+        return db.session.query(Task.id, Task.title, Task.owner_id, Task.project_id, Project.name).join(
+            Project, Project.id == Task.project_id
+        ).filter(
+            Task.due_date > due_after.replace(tzinfo=None),
+            Task.due_date <= due_until.replace(tzinfo=None),
+            Task.status != 'completed'
+        ).order_by(Task.due_date).all()
+
+    @staticmethod
+    def build_message(prefix, tasks):
+        """One notification text for a user's tasks in a scan, cut to fit Notification.message"""
+        if len(tasks) == 1:
+            task = tasks[0]
+            message = f"{prefix}: task '{task.title}' in project '{task.name}'"
+        else:
+            message = f"{prefix}: {len(tasks)} tasks: " + ', '.join(f"'{task.title}'" for task in tasks)
+        limit = DeadlineService.MESSAGE_LENGTH
+        return message if len(message) <= limit else message[:limit - 3] + '...'
+
+    @staticmethod
+    def run_scan():
+        """
+        Notify assignees of tasks that became overdue or due soon since the last scan
+
+        Returns:
+            dict: Counts of overdue and reminded tasks, or None if another
+            worker scanned this interval or Redis is unavailable
+        """
+        from utils.route_cache import RouteCacheManager
+
+        config = current_app.config
+        interval = config.get('DEADLINE_SCAN_INTERVAL', 300)
+        lead = timedelta(hours=config.get('DEADLINE_REMINDER_LEAD_HOURS', 24))
+
+        # Kept until it expires so only one worker scans per interval
+        if not RedisCache.acquire_lock(DeadlineService.LOCK_KEY, max(int(interval) - 5, 1)):
+            return None
+
+        now = get_utc_now()
+        last_scan = RedisCache.get(DeadlineService.LAST_SCAN_KEY)
+        since = datetime.fromtimestamp(last_scan, timezone.utc) if last_scan else now - timedelta(seconds=interval)
+        since = min(max(since, now - DeadlineService.MAX_CATCH_UP), now)
+
+        overdue = DeadlineService.find_tasks(since, now)
+        due_soon = DeadlineService.find_tasks(since + lead, now + lead)
+
+        messages = {}
+        for prefix, tasks in (('Due soon', due_soon), ('Overdue', overdue)):
+            by_user = {}
+            for task in tasks:
+                by_user.setdefault(task.owner_id, []).append(task)
+            for user_id, user_tasks in by_user.items():
+                messages.setdefault(user_id, []).append(DeadlineService.build_message(prefix, user_tasks))
+
+        try:
+            db.session.add_all([
+                Notification(user_id=user_id, message=message)
+                for user_id, user_messages in messages.items() for message in user_messages
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        RedisCache.set(DeadlineService.LAST_SCAN_KEY, now.timestamp())
+
+        overdue_users = {task.owner_id for task in overdue}
+        overdue_projects = {task.project_id for task in overdue}
+        if overdue:
+            DeadlineService.invalidate_counts(overdue_users, overdue_projects)
+        if messages or overdue_projects:
+            # Every notified user has new notifications; dashboards and task lists show overdue flags
+            RouteCacheManager.bump_versions(set(messages) | overdue_users, overdue_projects)
+
+        DeadlineService.email_reminders(messages)
+        return {'overdue': len(overdue), 'due_soon': len(due_soon), 'notified_users': len(messages)}
+
+    @staticmethod
+    def email_reminders(messages):
+        """Email each user who wants it their reminders of this scan"""
+        from utils.email import send_email
+
+        if not messages:
+            return
+        recipients = db.session.query(User.id, User.email, User.notify_email).filter(User.id.in_(messages)).all()
+        for user_id, email, notify_email in recipients:
+            if notify_email:
+                send_email("Task Deadlines", [email], "", '<br>'.join(messages[user_id]))
+
+    @staticmethod
+    def start_scheduler(app):
+        """Start this process's scan thread, once (again in a forked worker)"""
+        with DeadlineService._scheduler_lock:
+            if DeadlineService._scheduler_pid == os.getpid():
+                return
+            if DeadlineService._scheduler_pid is None and hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=lambda: DeadlineService.start_scheduler(app))
+            DeadlineService._scheduler_pid = os.getpid()
+
+        interval = app.config.get('DEADLINE_SCAN_INTERVAL', 300)
+
+        def run():
+            while True:
+                # Jitter spreads the workers' attempts over the interval
+                time.sleep(interval * random.uniform(0.9, 1.1))
+                with app.app_context():
+                    try:
+                        result = DeadlineService.run_scan()
+                        if result:
+                            current_app.logger.info(f"Deadline scan: {result}")
+                    except Exception as e:
+                        current_app.logger.error(f"Deadline scan error: {e}")
+                    finally:
+                        db.session.remove()
+
+        threading.Thread(target=run, daemon=True, name='deadline-scan').start()
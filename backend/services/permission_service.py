@@ -0,0 +1,184 @@
+from functools import wraps
+from flask import g, jsonify
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect
+from models import Project, Membership, Task
+from extensions import db
+from utils.redis_utils import RedisCache
+
+class PermissionService:
+    """
+    Project access checks backed by a cached per-user map of {project_id: role}
+
+    The map comes from one query over Project and Membership (no User rows)
+    and is kept in Redis and, for the rest of the request, in flask.g.
+    Each cached map is stamped with its user's version counter, read before
+    the map is loaded. Membership and project ownership changes bump the
+    affected users' counters once the transaction commits, so a map loaded
+    by a concurrent request before the commit and written back after it no
+    longer matches and is reloaded instead of granting stale access.
+    """
+
+    OWNER = 'owner'
+    EDITOR = 'editor'
+    MEMBER = 'member'
+    ROLE_RANK = {MEMBER: 1, EDITOR: 2, OWNER: 3}
+
+    CACHE_PREFIX = "project_roles:"
+    VERSION_PREFIX = "project_roles_ver:"
+    CACHE_TTL = 600  # 10 minutes
+
+    @staticmethod
+    def get_cache_key(user_id):
+        return f"{PermissionService.CACHE_PREFIX}{user_id}"
+
+    @staticmethod
+    def get_version_key(user_id):
+        return f"{PermissionService.VERSION_PREFIX}{user_id}"
+
+    @staticmethod
+    def load_project_roles(user_id):
+        """Query a user's role in every project they own or belong to"""
+        rows = db.session.query(Project.id, Project.owner_id, Membership.is_editor).outerjoin(
+            Membership, db.and_(Membership.project_id == Project.id, Membership.user_id == user_id)
+        ).filter(
+            db.or_(Project.owner_id == user_id, Membership.user_id == user_id)
+        ).all()
+
+        roles = {}
+        for project_id, owner_id, is_editor in rows:
+            if owner_id == user_id:
+                roles[str(project_id)] = PermissionService.OWNER
+            else:
+                roles[str(project_id)] = PermissionService.EDITOR if is_editor else PermissionService.MEMBER
+        return roles
+
+    @staticmethod
+    def get_project_roles(user_id):
+        """Get a user's {project_id (str): role} map, cached"""
+        user_id = int(user_id)
+        request_roles = g.setdefault('project_roles', {})
+        if user_id in request_roles:
+            return request_roles[user_id]
+
+        # Fetch the map and the user's current version in one round trip
+        cache_key = PermissionService.get_cache_key(user_id)
+        cached, version = RedisCache.get_many([cache_key, PermissionService.get_version_key(user_id)])
+        version = int(version or 0)
+
+        if isinstance(cached, dict) and cached.get('version') == version:
+            roles = cached['roles']
+        else:
+            roles = PermissionService.load_project_roles(user_id)
+            RedisCache.set(cache_key, {'version': version, 'roles': roles}, PermissionService.CACHE_TTL)
+
+        request_roles[user_id] = roles
+        return roles
+
+    @staticmethod
+    def role(user_id, project_id):
+        """A user's role in a project: 'owner', 'editor', 'member' or None"""
+        return PermissionService.get_project_roles(user_id).get(str(project_id))
+
+    @staticmethod
+    def is_member(user_id, project_id):
+        return PermissionService.role(user_id, project_id) is not None
+
+    @staticmethod
+    def can_edit(user_id, project_id):
+        return PermissionService.has_role(user_id, project_id, PermissionService.EDITOR)
+
+    @staticmethod
+    def has_role(user_id, project_id, required_role):
+        role = PermissionService.role(user_id, project_id)
+        return role is not None and PermissionService.ROLE_RANK[role] >= PermissionService.ROLE_RANK[required_role]
+
+    @staticmethod
+    def member_pairs(user_ids, project_ids):
+        """The (user_id, project_id) pairs among the given ids where the user owns or belongs to the project, in one query"""
+        user_ids, project_ids = set(user_ids), set(project_ids)
+        if not user_ids or not project_ids:
+            return set()
+        rows = db.session.query(Membership.user_id, Membership.project_id).filter(
+            Membership.user_id.in_(user_ids), Membership.project_id.in_(project_ids)
+        ).union(
+            db.session.query(Project.owner_id, Project.id).filter(
+                Project.owner_id.in_(user_ids), Project.id.in_(project_ids)
+            )
+        ).all()
+        return {(user_id, project_id) for user_id, project_id in rows}
+
+    @staticmethod
+    def invalidate_users(user_ids):
+        """Outdate cached role maps, e.g. after a bulk delete of memberships"""
+        user_ids = {int(user_id) for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return
+        # Bumping rather than deleting also rejects maps that are still being written back
+        RedisCache.incr_many([PermissionService.get_version_key(user_id) for user_id in user_ids])
+        if 'project_roles' in g:
+            for user_id in user_ids:
+                g.project_roles.pop(user_id, None)
+
+    @staticmethod
+    def register_invalidation(session):
+        """Collect users whose roles change on flush and outdate their maps once per committed transaction"""
+        event.listen(session, 'after_flush', PermissionService._collect_changes)
+        event.listen(session, 'after_commit', PermissionService._publish_changes)
+        event.listen(session, 'after_rollback', PermissionService._discard_changes)
+
+    @staticmethod
+    def _collect_changes(session, flush_context):
+        changed = session.info.setdefault('project_role_changes', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, Membership):
+                history = inspect(obj).attrs.user_id.history
+                changed.update(history.added or [obj.user_id])
+                changed.update(history.deleted or [])
+            elif isinstance(obj, Project):
+                history = inspect(obj).attrs.owner_id.history
+                changed.update(history.added or [obj.owner_id])
+                changed.update(history.deleted or [])
+
+    @staticmethod
+    def _publish_changes(session):
+        changed = session.info.pop('project_role_changes', None)
+        if changed:
+            try:
+                PermissionService.invalidate_users(changed)
+            except Exception as e:
+                print(f"Project role cache invalidation error: {e}")
+
+    @staticmethod
+    def _discard_changes(session):
+        session.info.pop('project_role_changes', None)
+
+def project_access_required(role=PermissionService.MEMBER, message='Not authorized'):
+    """
+    Require the current user to hold at least role in the project of the route
+
+    The project comes from the project_id view argument, or from the task of
+    a task_id argument. Responds 404 if that project or task does not exist
+    and 403 with message if the user lacks the role.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user_id = int(get_jwt_identity())
+
+            project_id = kwargs.get('project_id')
+            if project_id is None and kwargs.get('task_id') is not None:
+                project_id = db.session.query(Task.project_id).filter(Task.id == kwargs['task_id']).scalar()
+                if project_id is None:
+                    return jsonify({'msg': 'Task not found'}), 404
+
+            if not PermissionService.has_role(user_id, project_id, role):
+                # Only denials pay for telling a missing project apart
+                if db.session.query(Project.id).filter(Project.id == project_id).first() is None:
+                    return jsonify({'msg': 'Project not found'}), 404
+                return jsonify({'msg': message}), 403
+
+            g.project_role = PermissionService.role(user_id, project_id)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -4,6 +4,7 @@ from utils.email import send_email
 from utils.cloudinary_upload import upload_project_image, validate_image_file
 from datetime import datetime, timezone
 from sqlalchemy import case
+from utils.route_cache import RouteCacheManager
 
 class ProjectService:
     @staticmethod
@@ -55,6 +56,7 @@ class ProjectService:
                 project.project_image = upload_result['secure_url']
         
         db.session.commit()
+        RouteCacheManager.touch_project(project.id)
         
         ProjectService._send_member_notifications(project, added_members)
         
@@ -294,9 +296,16 @@ class ProjectService:
             raise PermissionError('Only owner can delete project')
         
         # Delete related data in proper order to avoid constraint violations
-        # First delete tasks
+        # First delete tasks, noting their assignees for the overdue counts
+        task_owner_ids = [
+            owner_id for (owner_id,) in db.session.query(Task.owner_id).filter_by(project_id=project_id).distinct()
+        ]
         Task.query.filter_by(project_id=project_id).delete()
         
+        # Members are resolved now, before their memberships are gone
+        member_ids = RouteCacheManager.get_project_member_ids([project_id])
+        RouteCacheManager.touch_users(member_ids)
+        
         # Delete memberships
         Membership.query.filter_by(project_id=project_id).delete()
         
@@ -310,6 +319,12 @@ class ProjectService:
         # Finally delete the project
         db.session.delete(project)
         db.session.commit()
+        
+        # The bulk deletes above bypass the session events that drop role maps and overdue counts
+        from services.deadline_service import DeadlineService
+        from services.permission_service import PermissionService
+        PermissionService.invalidate_users(member_ids)
+        DeadlineService.invalidate_counts(task_owner_ids, [project_id])
         return True
     
     @staticmethod
@@ -0,0 +1,508 @@
+from models import Task, User, Project, TaskAttachment, Notification
+from extensions import db
+from flask import current_app
+from sqlalchemy import insert, update, delete
+from sqlalchemy.orm import joinedload
+from utils.datetime_utils import get_utc_now, ensure_utc
+from datetime import datetime
+import base64
+import json
+
+class TaskService:
+    STATUS_LABELS = {
+        'pending': 'Not Started',
+        'in_progress': 'In Progress',
+        'completed': 'Completed'
+    }
+    # Labels the clients send, and the stored values themselves
+    STATUS_VALUES = {
+        'To Do': 'pending',
+        'Not Started': 'pending',
+        'In Progress': 'in_progress',
+        'Done': 'completed',
+        'Completed': 'completed',
+        'pending': 'pending',
+        'in_progress': 'in_progress',
+        'completed': 'completed'
+    }
+    # Columns GET /tasks can sort by; each is paged together with Task.id
+    SORT_COLUMNS = {
+        'id': Task.id,
+        'created_at': Task.created_at,
+        'due_date': Task.due_date
+    }
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    # Fields a batch 'update' operation may set
+    UPDATE_FIELDS = ('title', 'description', 'due_date', 'status', 'project_id', 'owner_id')
+    TITLE_MAX_LENGTH = 120  # Task.title
+
+    @staticmethod
+    def with_relations(query):
+        """Load each task's assignee and project in the same query, only the columns the serializer reads"""
+        return query.options(
+            joinedload(Task.assignee).load_only(User.id, User.username, User.full_name),
+            joinedload(Task.project).load_only(Project.id, Project.name)
+        )
+
+    @staticmethod
+    def get_tasks_by_ids(task_ids):
+        """Load tasks with their relations in one query, in the order of task_ids"""
+        if not task_ids:
+            return []
+        tasks = {task.id: task for task in TaskService.with_relations(Task.query.filter(Task.id.in_(task_ids))).all()}
+        return [tasks[task_id] for task_id in task_ids if task_id in tasks]
+
+    @staticmethod
+    def parse_status(label, default='pending'):
+        return TaskService.STATUS_VALUES.get(label, default)
+
+    @staticmethod
+    def get_status_value(task):
+        return task.status.value if hasattr(task.status, 'value') else str(task.status)
+
+    @staticmethod
+    def serialize_task(task, current_time=None):
+        """Format a task for API responses; load it through with_relations to avoid per-task queries"""
+        current_time = current_time or get_utc_now()
+        status = TaskService.get_status_value(task)
+
+        assignee_name = None
+        if task.owner_id:
+            assignee_name = task.assignee.full_name if task.assignee else 'Unknown User'
+
+        return {
+            'id': task.id,
+            'title': task.title,
+            'description': task.description,
+            'due_date': task.due_date.isoformat() if task.due_date else None,
+            'status': TaskService.STATUS_LABELS.get(status, 'Not Started'),
+            'project_id': task.project_id,
+            'project_name': task.project.name if task.project else None,
+            'owner_id': task.owner_id,
+            'assignee_id': task.owner_id,
+            'assignee': assignee_name,
+            'created_at': task.created_at.isoformat() if task.created_at else None,
+            'is_overdue': bool(task.due_date) and ensure_utc(task.due_date) < current_time and status != 'completed'
+        }
+
+    @staticmethod
+    def serialize_tasks(tasks):
+        current_time = get_utc_now()
+        return [TaskService.serialize_task(task, current_time) for task in tasks]
+
+    @staticmethod
+    def parse_int(value, name):
+        """Parse an integer parameter; the ValueError names the parameter, never the parser's message"""
+        if isinstance(value, (bool, float)):
+            raise ValueError(f"Invalid {name}")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {name}") from None
+
+    @staticmethod
+    def parse_id(value, name):
+        """Parse a row id, which must fit the integer primary key columns"""
+        value = TaskService.parse_int(value, name)
+        if not 0 < value < 2 ** 31:
+            raise ValueError(f"Invalid {name}")
+        return value
+
+    @staticmethod
+    def parse_title(value):
+        if not isinstance(value, str) or not value.strip() or len(value) > TaskService.TITLE_MAX_LENGTH:
+            raise ValueError(f"title must be a non-empty string of at most {TaskService.TITLE_MAX_LENGTH} characters")
+        return value
+
+    @staticmethod
+    def parse_description(value):
+        if value is not None and not isinstance(value, str):
+            raise ValueError("description must be a string")
+        return value
+
+    @staticmethod
+    def parse_known_status(label):
+        """Like parse_status, but an unknown label is an error instead of the default"""
+        if not isinstance(label, str) or label not in TaskService.STATUS_VALUES:
+            raise ValueError(f"Invalid status. Use one of: {', '.join(TaskService.STATUS_VALUES)}")
+        return TaskService.STATUS_VALUES[label]
+
+    @staticmethod
+    def parse_date(value, name='date'):
+        """Parse an ISO date or datetime query value into a naive UTC datetime, as due_date is stored"""
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            raise ValueError(f"Invalid {name}. Use ISO format.") from None
+        return ensure_utc(parsed).replace(tzinfo=None)
+
+    @staticmethod
+    def parse_sort(sort):
+        """Split a sort parameter like '-due_date' into (column name, descending)"""
+        descending = sort.startswith('-')
+        name = sort.lstrip('-')
+        if name not in TaskService.SORT_COLUMNS:
+            raise ValueError(f"Invalid sort. Use one of: {', '.join(TaskService.SORT_COLUMNS)}")
+        return name, descending
+
+    @staticmethod
+    def encode_cursor(sort, task):
+        value = getattr(task, TaskService.parse_sort(sort)[0])
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([sort, value, task.id]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor, sort):
+        """Decode a task cursor into (sort value, task id); raises ValueError if malformed or made for another sort"""
+        try:
+            cursor_sort, value, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            task_id = int(task_id)
+            if cursor_sort != sort:
+                raise ValueError
+            if value is not None and TaskService.parse_sort(sort)[0] != 'id':
+                value = datetime.fromisoformat(value)
+            return value, task_id
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor') from None
+
+    @staticmethod
+    def keyset_filter(column, value, task_id, descending):
+        """
+        Rows after (value, task_id) in the order of order_by(column, descending)
+
+        Tasks without a value sort last ascending and first descending, so a
+        descending page is the exact reverse of an ascending one.
+        """
+        if column is Task.id:
+            return Task.id < task_id if descending else Task.id > task_id
+        if descending:
+            if value is None:
+                return db.or_(db.and_(column.is_(None), Task.id < task_id), column.isnot(None))
+            return db.or_(column < value, db.and_(column == value, Task.id < task_id))
+        if value is None:
+            return db.and_(column.is_(None), Task.id > task_id)
+        return db.or_(column > value, db.and_(column == value, Task.id > task_id), column.is_(None))
+
+    @staticmethod
+    def order_by(column, descending):
+        if column is Task.id:
+            return [Task.id.desc() if descending else Task.id.asc()]
+        if descending:
+            return [column.desc().nullsfirst(), Task.id.desc()]
+        return [column.asc().nullslast(), Task.id.asc()]
+
+    @staticmethod
+    def list_tasks(user_id, args):
+        """
+        Page through tasks for GET /tasks
+
+        Lists the user's own tasks by default. With a project_id, assignee may
+        name another member's id or 'any' to list the project's tasks, which
+        requires membership. Filters: status (labels or values, comma
+        separated), project_id, due_before, due_after. sort is a column of
+        SORT_COLUMNS, '-' prefixed for descending; pages follow cursor, or
+        offset for older clients. The filters lead the composite indexes on
+        (owner_id, status, due_date) and (project_id, status).
+
+        Returns:
+            tuple: (tasks, pagination dict with limit, has_more and
+            next_cursor); raises ValueError with a fixed message naming the
+            bad parameter, and PermissionError for projects the user cannot see
+        """
+        from services.permission_service import PermissionService
+
+        limit = TaskService.parse_int(args.get('limit', TaskService.DEFAULT_PAGE_SIZE), 'limit')
+        limit = min(max(limit, 1), TaskService.MAX_PAGE_SIZE)
+        offset = max(TaskService.parse_int(args.get('offset', 0), 'offset'), 0)
+        sort = args.get('sort', 'id')
+        sort_name, descending = TaskService.parse_sort(sort)
+        column = TaskService.SORT_COLUMNS[sort_name]
+
+        project_id = args.get('project_id')
+        project_id = TaskService.parse_id(project_id, 'project_id') if project_id not in (None, '', 'all') else None
+
+        assignee = args.get('assignee', 'me')
+        if assignee in ('', 'me'):
+            assignee = user_id
+        elif assignee != 'any':
+            assignee = TaskService.parse_id(assignee, 'assignee')
+
+        query = Task.query
+        if assignee != user_id:
+            if project_id is None:
+                raise ValueError('project_id is required to list tasks of other assignees')
+            if not PermissionService.is_member(user_id, project_id):
+                raise PermissionError('Not authorized to view tasks of this project')
+        if assignee != 'any':
+            query = query.filter(Task.owner_id == assignee)
+        if project_id is not None:
+            query = query.filter(Task.project_id == project_id)
+
+        status = args.get('status')
+        if status and status != 'all':
+            statuses = set()
+            for label in status.split(','):
+                value = TaskService.STATUS_VALUES.get(label.strip())
+                if value is None:
+                    raise ValueError(f"Invalid status. Use one of: {', '.join(TaskService.STATUS_LABELS)}")
+                statuses.add(value)
+            query = query.filter(Task.status.in_(sorted(statuses)))
+
+        if args.get('due_before'):
+            query = query.filter(Task.due_date < TaskService.parse_date(args['due_before'], 'due_before'))
+        if args.get('due_after'):
+            query = query.filter(Task.due_date >= TaskService.parse_date(args['due_after'], 'due_after'))
+
+        cursor = args.get('cursor')
+        if cursor:
+            query = query.filter(TaskService.keyset_filter(column, *TaskService.decode_cursor(cursor, sort), descending))
+        elif offset:
+            query = query.offset(offset)
+
+        tasks = TaskService.with_relations(query.order_by(*TaskService.order_by(column, descending))).limit(limit + 1).all()
+        has_more = len(tasks) > limit
+        tasks = tasks[:limit]
+        return tasks, {
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': TaskService.encode_cursor(sort, tasks[-1]) if has_more else None
+        }
+
+    @staticmethod
+    def parse_due_date(date_str):
+        """Parse a due date from a request: a date means the end of that day, no timezone means UTC"""
+        if not date_str:
+            return None
+        if not isinstance(date_str, str):
+            raise ValueError('Invalid date format. Use ISO format with timezone.')
+        try:
+            if 'T' not in date_str:
+                date_str += 'T23:59:59'
+            if not date_str.endswith('Z') and '+' not in date_str and '-' not in date_str[-6:]:
+                date_str += 'Z'
+            return ensure_utc(datetime.fromisoformat(date_str.replace('Z', '+00:00')))
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid date format. Use ISO format with timezone.') from e
+
+    @staticmethod
+    def parse_operation(user_id, kind, operation):
+        """
+        Validate one batch operation into (task_id or None, column values)
+
+        Checks the values the way the columns need them: a non-empty title of
+        at most TITLE_MAX_LENGTH characters, a string description, a known
+        status, integer ids and ISO due dates. Raises ValueError with a fixed
+        message naming the field.
+        """
+        if kind == 'create':
+            for field in ('project_id', 'title'):
+                if operation.get(field) in (None, ''):
+                    raise ValueError(f'{field} is required')
+            assignee_id = operation.get('assignee_id')
+            return None, {
+                'title': TaskService.parse_title(operation['title']),
+                'description': TaskService.parse_description(operation.get('description', '')),
+                'due_date': TaskService.parse_due_date(operation.get('due_date')),
+                'status': TaskService.parse_known_status(operation.get('status', 'To Do')),
+                'project_id': TaskService.parse_id(operation['project_id'], 'project_id'),
+                'owner_id': TaskService.parse_id(assignee_id, 'assignee_id') if assignee_id else user_id
+            }
+
+        if operation.get('task_id') in (None, ''):
+            raise ValueError('task_id is required')
+        task_id = TaskService.parse_id(operation['task_id'], 'task_id')
+
+        values = {}
+        if kind == 'status':
+            if 'status' not in operation:
+                raise ValueError('status is required')
+            values['status'] = TaskService.parse_known_status(operation['status'])
+        elif kind == 'update':
+            parsers = {
+                'title': TaskService.parse_title,
+                'description': TaskService.parse_description,
+                'due_date': TaskService.parse_due_date,
+                'status': TaskService.parse_known_status,
+                'project_id': lambda value: TaskService.parse_id(value, 'project_id'),
+                'owner_id': lambda value: TaskService.parse_id(value, 'owner_id')
+            }
+            for field in TaskService.UPDATE_FIELDS:
+                if field in operation:
+                    values[field] = parsers[field](operation[field])
+            if not values:
+                raise ValueError(f"nothing to update; set any of {', '.join(TaskService.UPDATE_FIELDS)}")
+        return task_id, values
+
+    @staticmethod
+    def apply_batch(user_id, operations):
+        """
+        Apply many task operations in one transaction, or none of them
+
+        Each operation is a dict with 'op' set to:
+            create: project_id, title and optionally description, due_date, status, assignee_id
+            update: task_id and any of UPDATE_FIELDS
+            status: task_id and status
+            delete: task_id
+
+        Tasks and projects are loaded with one query each and every project is
+        checked against the user's role map once. Creates are one multi-row
+        INSERT, updates one UPDATE by primary key per set of changed columns,
+        and deletes one DELETE. New assignees get one notification (and email)
+        each, however many tasks they received. Cached responses of every
+        touched project and assignee are marked stale for the caller's
+        invalidate_cache_on_change to bump together.
+
+        Returns:
+            list: {'op', 'task_id'} per operation, in order; raises ValueError
+            or PermissionError naming the first bad operation, with nothing applied
+        """
+        from services.deadline_service import DeadlineService
+        from services.permission_service import PermissionService
+        from utils.route_cache import RouteCacheManager
+
+        max_operations = current_app.config.get('TASK_BATCH_MAX_OPERATIONS', 200)
+        if not isinstance(operations, list) or not operations:
+            raise ValueError('Operations must be a non-empty list')
+        if len(operations) > max_operations:
+            raise ValueError(f'At most {max_operations} operations per batch')
+
+        parsed = []
+        task_ids = set()
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or operation.get('op') not in ('create', 'update', 'status', 'delete'):
+                raise ValueError(f"Operation {index}: op must be one of create, update, status, delete")
+            kind = operation['op']
+            try:
+                task_id, values = TaskService.parse_operation(user_id, kind, operation)
+            except ValueError as e:
+                # Every message comes from the parse_* helpers, never from a parser's exception
+                raise ValueError(f'Operation {index}: {e}') from None
+            if task_id is not None:
+                if task_id in task_ids:
+                    raise ValueError(f'Operation {index}: task {task_id} appears in more than one operation')
+                task_ids.add(task_id)
+            parsed.append((index, kind, task_id, values))
+
+        tasks = {}
+        if task_ids:
+            tasks = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids)).all()}
+
+        project_ids = set()
+        for index, kind, task_id, values in parsed:
+            if task_id is not None:
+                if task_id not in tasks:
+                    raise ValueError(f'Operation {index}: task {task_id} not found')
+                project_ids.add(tasks[task_id].project_id)
+            if 'project_id' in values:
+                project_ids.add(values['project_id'])
+        project_names = dict(db.session.query(Project.id, Project.name).filter(Project.id.in_(project_ids)).all())
+
+        # (assignee, project) pairs that must be memberships, with the operations needing them
+        required_members = {}
+        for index, kind, task_id, values in parsed:
+            task = tasks.get(task_id)
+            project_id = values.get('project_id', task.project_id if task else None)
+            if project_id not in project_names:
+                raise ValueError(f'Operation {index}: project {project_id} not found')
+
+            if kind == 'delete':
+                allowed = task.owner_id == user_id or PermissionService.can_edit(user_id, project_id)
+            else:
+                allowed = PermissionService.is_member(user_id, project_id) and (
+                    task is None or PermissionService.is_member(user_id, task.project_id)
+                )
+            if not allowed:
+                raise PermissionError(f'Operation {index}: not authorized for project {project_id}')
+
+            if kind == 'create' or 'owner_id' in values or 'project_id' in values:
+                owner_id = values.get('owner_id', task.owner_id if task else None)
+                if owner_id != user_id or task is not None:
+                    required_members.setdefault((owner_id, project_id), index)
+
+        if required_members:
+            members = PermissionService.member_pairs(
+                {owner_id for owner_id, _ in required_members}, {project_id for _, project_id in required_members}
+            )
+            for pair, index in required_members.items():
+                if pair not in members:
+                    raise ValueError(f'Operation {index}: assignee must be project member')
+
+        assignments = {}
+        touched_users = set()
+        touched_projects = set()
+        for index, kind, task_id, values in parsed:
+            task = tasks.get(task_id)
+            if task is not None:
+                touched_users.add(task.owner_id)
+                touched_projects.add(task.project_id)
+            touched_users.add(values.get('owner_id'))
+            touched_projects.add(values.get('project_id'))
+
+            owner_id = values.get('owner_id')
+            if owner_id is not None and owner_id != user_id and (task is None or owner_id != task.owner_id):
+                title = values.get('title', task.title if task else None)
+                project_id = values.get('project_id', task.project_id if task else None)
+                assignments.setdefault(owner_id, []).append((title, project_names[project_id]))
+
+        try:
+            creates = [values for _, kind, _, values in parsed if kind == 'create']
+            created_ids = []
+            if creates:
+                created_ids = db.session.scalars(
+                    insert(Task).returning(Task.id, sort_by_parameter_order=True), creates
+                ).all()
+
+            updates = [dict(values, id=task_id) for _, kind, task_id, values in parsed if kind in ('update', 'status')]
+            if updates:
+                db.session.execute(update(Task), updates)
+
+            deletes = [task_id for _, kind, task_id, _ in parsed if kind == 'delete']
+            if deletes:
+                db.session.execute(delete(TaskAttachment).where(TaskAttachment.task_id.in_(deletes)))
+                db.session.execute(delete(Task).where(Task.id.in_(deletes)))
+
+            db.session.add_all([
+                Notification(user_id=recipient_id, message=TaskService.assignment_message(assigned))
+                for recipient_id, assigned in assignments.items()
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        RouteCacheManager.touch_users(touched for touched in touched_users if touched is not None)
+        for project_id in touched_projects:
+            RouteCacheManager.touch_project(project_id)
+        # Bulk statements skip the session events that keep overdue counts current
+        DeadlineService.invalidate_counts(touched_users, touched_projects)
+        TaskService.email_assignments(assignments)
+
+        created = iter(created_ids)
+        return [
+            {'op': kind, 'task_id': next(created) if kind == 'create' else task_id}
+            for _, kind, task_id, _ in parsed
+        ]
+
+    @staticmethod
+    def assignment_message(assigned):
+        """One notification text for a list of (task title, project name) assigned to a user"""
+        if len(assigned) == 1:
+            title, project_name = assigned[0]
+            return f"You have been assigned task '{title}' in project '{project_name}'"
+        message = f"You have been assigned {len(assigned)} tasks: " + ', '.join(f"'{title}'" for title, _ in assigned)
+        # Notification.message holds 200 characters
+        return message if len(message) <= 200 else message[:197] + '...'
+
+    @staticmethod
+    def email_assignments(assignments):
+        """Email each assignee who wants it one summary of their new tasks"""
+        from utils.email import send_email
+
+        if not assignments:
+            return
+        recipients = db.session.query(User.id, User.email, User.notify_email).filter(User.id.in_(assignments)).all()
+        for recipient_id, email, notify_email in recipients:
+            if notify_email:
+                send_email("Task Assigned", [email], "", TaskService.assignment_message(assignments[recipient_id]))
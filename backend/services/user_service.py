@@ -1,38 +1,122 @@
 from models import User
 from extensions import db
+from sqlalchemy import func, text
+from utils.cache_helpers import UserSearchCache
+import base64
+import json
 
 class UserService:
+    # Name of the SQLite FTS5 trigram table over username, email and full_name (see utils.db_migrate)
+    SQLITE_FTS_TABLE = "user_search_fts"
+    MIN_FTS_QUERY_LENGTH = 3  # trigram indexes need at least one full trigram
+
+    _sqlite_fts_available = None
+
+    @staticmethod
+    def search_users(search_query='', limit=20, offset=0, cursor=None):
+        """
+        Search users for member auto-completion
+
+        Two pagination contracts:
+            offset (cursor is None): relevance order, prefix matches first, from
+                the search index unless it is missing or out of date; next_cursor
+                is always None
+            keyset (cursor given, '' for the first page): (lower(username), id)
+                order, always from the database, with next_cursor for the next page
+        """
+        limit, offset = max(int(limit), 1), max(int(offset), 0)
+        if cursor is None:
+            result = UserSearchCache.search(search_query, limit, offset)
+            if result is not None:
+                return dict(result, next_cursor=None)
+
+        return UserService.search_users_sql(search_query, limit, offset, cursor)
+
+    @staticmethod
+    def encode_cursor(sort_name, user_id):
+        return base64.urlsafe_b64encode(json.dumps([sort_name, user_id]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a search cursor into (lowercased username, id); raises ValueError if malformed"""
+        try:
+            sort_name, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return str(sort_name), int(user_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid cursor') from e
+
+    @staticmethod
+    def has_sqlite_fts():
+        if UserService._sqlite_fts_available is None:
+            UserService._sqlite_fts_available = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': UserService.SQLITE_FTS_TABLE}
+            ).first() is not None
+        return UserService._sqlite_fts_available
+
+    @staticmethod
+    def search_filter(search_query):
+        """
+        Filter for users whose username, email or full name contains the query
+
+        Postgres matches lower(column) LIKE, which the pg_trgm GIN indexes on
+        lower() serve. SQLite uses the FTS5 trigram table when the query is
+        long enough, and otherwise a LIKE scan in (lower(username), id) index
+        order that stops once the page is full.
+        """
+        query = search_query.strip().lower()
+        if (db.engine.dialect.name == 'sqlite' and len(query) >= UserService.MIN_FTS_QUERY_LENGTH
+                and UserService.has_sqlite_fts()):
+            phrase = '"' + query.replace('"', '""') + '"'
+            return User.id.in_(
+                text(f"SELECT rowid FROM {UserService.SQLITE_FTS_TABLE} WHERE {UserService.SQLITE_FTS_TABLE} MATCH :phrase")
+                .bindparams(phrase=phrase)
+            )
+
+        escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        pattern = f"%{escaped}%"
+        return db.or_(
+            func.lower(User.username).like(pattern, escape='\\'),
+            func.lower(User.email).like(pattern, escape='\\'),
+            func.lower(User.full_name).like(pattern, escape='\\')
+        )
+
     @staticmethod
-    def search_users(search_query='', limit=20, offset=0):
-        """Search users for member auto-completion"""
+    def search_users_sql(search_query='', limit=20, offset=0, cursor=None):
+        """
+        Search users in the database, ordered by (lower(username), id)
+
+        Pages with a cursor (keyset) when given one, else with offset. One extra
+        row is fetched for has_more instead of counting every match, so
+        total_count is only set when the first page holds all matches.
+
+        Returns:
+            dict: users, has_more, total_count and next_cursor (None on the last page)
+        """
+        sort_name = func.lower(User.username)
         query = db.session.query(
             User.id,
-            User.username, 
+            User.username,
             User.email,
             User.full_name,
-            User.profile_picture
+            User.profile_picture,
+            sort_name.label('sort_name')
         )
-        
-        if search_query:
-            search_pattern = f"%{search_query.strip().lower()}%"
-            query = query.filter(
-                db.or_(
-                    User.username.ilike(search_pattern),
-                    User.email.ilike(search_pattern),
-                    User.full_name.ilike(search_pattern)
-                )
-            )
-        
-        query = query.order_by(User.username.asc())
-        
-        total_count = None
-        if offset == 0:  # Only calculate on first page
-            total_count = query.count()
-        
-        users = query.offset(offset).limit(limit).all()
-        
+
+        if search_query.strip():
+            query = query.filter(UserService.search_filter(search_query))
+
+        if cursor:
+            query = query.filter(db.tuple_(sort_name, User.id) > UserService.decode_cursor(cursor))
+        elif offset:
+            query = query.offset(offset)
+
+        rows = query.order_by(sort_name.asc(), User.id.asc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
         users_data = []
-        for user in users:
+        for user in rows:
             users_data.append({
                 'id': user.id,
                 'username': user.username,
@@ -40,9 +124,11 @@ class UserService:
                 'full_name': user.full_name or user.username,
                 'profile_picture': user.profile_picture
             })
-        
+
+        first_page = not cursor and not offset
         return {
             'users': users_data,
-            'has_more': len(users_data) == limit,
-            'total_count': total_count
+            'has_more': has_more,
+            'total_count': len(users_data) if first_page and not has_more else None,
+            'next_cursor': UserService.encode_cursor(rows[-1].sort_name, rows[-1].id) if has_more else None
         }
@@ -180,6 +180,30 @@ async function testCreateTask() {
   return response.data;
 }
 
+async function testListTasks() {
+  console.log('\n🔹 Testing paginated task list...');
+  // GET /tasks returns {tasks, pagination}, no longer a bare array
+  const response = await api.get('/tasks', { params: { project_id: projectId, limit: 1, sort: '-created_at' } });
+  const { tasks, pagination } = response.data;
+  if (!Array.isArray(tasks) || !pagination || !('next_cursor' in pagination)) {
+    throw new Error('Task list is not in the {tasks, pagination} shape');
+  }
+  if (!tasks.some(task => task.id === taskId) && !pagination.has_more) {
+    throw new Error('Created task missing from the task list');
+  }
+
+  try {
+    await api.get('/tasks', { params: { limit: 'abc' } });
+    throw new Error('Invalid limit was accepted');
+  } catch (error) {
+    if (error.response?.status !== 400 || error.response.data.msg !== 'Invalid limit') {
+      throw error;
+    }
+  }
+  console.log(`Listed ${tasks.length} task(s), has_more: ${pagination.has_more}`);
+  return response.data;
+}
+
 async function testUpdateTask() {
   console.log('\n🔹 Testing task update...');
   const response = await api.put(`/tasks/${taskId}`, {
@@ -219,6 +243,27 @@ async function testUploadTaskAttachment() {
   }
 }
 
+async function testSignedTaskAttachmentUpload() {
+  console.log('\n🔹 Testing direct upload of a task attachment...');
+  // Upload goes to the storage host the backend signs for (CLOUDINARY_UPLOAD_PREFIX may point at a stub)
+  const { data: params } = await api.post(`/tasks/${taskId}/attachment/upload-params`);
+  
+  const formData = new FormData();
+  Object.entries(params.fields).forEach(([key, value]) => formData.append(key, value));
+  formData.append('file', new Blob(['This is a test file for attachment upload.'], { type: 'text/plain' }), 'test.txt');
+  const { data: uploaded } = await axios.post(params.upload_url, formData);
+  
+  const response = await api.post(`/tasks/${taskId}/attachment/complete`, {
+    public_id: uploaded.public_id,
+    version: uploaded.version,
+    signature: uploaded.signature,
+    resource_type: uploaded.resource_type,
+    format: uploaded.format
+  });
+  console.log('File uploaded directly to storage');
+  return response.data;
+}
+
 // Notification and message tests would be added here if we had the routes
 
 // Cleanup
@@ -236,6 +281,30 @@ async function testDeleteProject() {
   return response.data;
 }
 
+async function testLogoutAllThenLogin() {
+  console.log('\n🔹 Testing logout from all devices, then logging in again right away...');
+  const revokedToken = accessToken;
+  await api.delete('/auth/logout-all');
+
+  try {
+    await api.get('/projects');
+    throw new Error('Token issued before logout-all was still accepted');
+  } catch (error) {
+    if (error.response?.status !== 401) {
+      throw error;
+    }
+  }
+
+  // A token issued in the same second as the logout-all must not be revoked by it
+  await testLogin();
+  if (accessToken === revokedToken) {
+    throw new Error('Login did not issue a new access token');
+  }
+  const response = await api.get('/projects');
+  console.log('Old tokens revoked, new login accepted');
+  return response.data;
+}
+
 async function testLogout() {
   console.log('\n🔹 Testing logout...');
   const response = await api.delete('/auth/logout');
@@ -308,10 +377,13 @@ async function runTests() {
     { name: 'Update Project', fn: testUpdateProject },
     { name: 'Add Project Member', fn: testAddProjectMember },
     { name: 'Create Task', fn: testCreateTask },
+    { name: 'List Tasks', fn: testListTasks },
     { name: 'Update Task', fn: testUpdateTask },
     { name: 'Upload Task Attachment', fn: testUploadTaskAttachment },
+    { name: 'Signed Task Attachment Upload', fn: testSignedTaskAttachmentUpload },
     { name: 'Delete Task', fn: testDeleteTask },
     { name: 'Delete Project', fn: testDeleteProject },
+    { name: 'Logout All Then Login', fn: testLogoutAllThenLogin },
     { name: 'Logout', fn: testLogout }
   ];
   
@@ -1,5 +1,6 @@
 from flask_jwt_extended import create_access_token, create_refresh_token
 from models import User
+from extensions import db
 from utils.validation import validate_email, validate_password, sanitize_email, sanitize_string
 
 def create_user_tokens(user_id):
@@ -82,6 +83,15 @@ def authenticate_user(username_or_email, password):
     if not user or not user.check_password(password):
         return None, "Invalid credentials"
     
+    # Upgrade hashes made with an older work factor while the password is at hand
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Password rehash error: {e}")
+    
     return user, None
 
 def create_auth_response(user):
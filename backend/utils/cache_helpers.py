@@ -1,15 +1,14 @@
 from utils.redis_utils import RedisCache
 from models import User
 from extensions import db
+from flask import current_app
 import hashlib
 import json
 
 class UserSearchCache:
-    """Memory-efficient caching for user search functionality"""
+    """User search backed by utils.user_index or, with USER_SEARCH_BACKEND=redis, utils.redis_user_index"""
     CACHE_PREFIX = "user_search:"
-    CACHE_EXPIRATION = 300  # 5 minutes (longer for stability)
-    ALL_USERS_KEY = "all_users_minimal"
-    MAX_CACHE_SIZE = 5000  # Limit to 5k users to prevent memory issues
+    ALL_USERS_KEY = "all_users_minimal"  # Legacy blob, only deleted on invalidation
 
     @staticmethod
     def get_cache_key(search_query, limit, offset):
@@ -19,81 +18,70 @@ class UserSearchCache:
         key_data = f"search:{search_query.lower()}:limit:{limit}:offset:{offset}"
         return f"{UserSearchCache.CACHE_PREFIX}{hashlib.md5(key_data.encode()).hexdigest()[:16]}"  # Shorter hash
     
+    @staticmethod
+    def get_backend():
+        """The configured search index: the per-host file (default) or Redis sorted sets"""
+        if current_app.config.get('USER_SEARCH_BACKEND') == 'redis':
+            from utils.redis_user_index import RedisUserIndex
+            return RedisUserIndex
+        from utils.user_index import UserIndex
+        return UserIndex
+    
+    @staticmethod
+    def search(search_query='', limit=20, offset=0):
+        """Search the configured index; None means the caller should query the database"""
+        return UserSearchCache.get_backend().search(search_query, limit, offset)
+    
     @staticmethod
     def cache_all_users():
-        """Cache users with size limit and compression"""
+        """Build the user search index for all users, unless it is already up to date"""
         try:
-            users = db.session.query(
-                User.id,
-                User.username,
-                User.email, 
-                User.full_name
-            ).order_by(User.username.asc()).limit(UserSearchCache.MAX_CACHE_SIZE).all()
-            
-            users_data = []
-            for user in users:
-                users_data.append({
-                    'i': user.id,  # Shorter keys
-                    'u': user.username,
-                    'e': user.email,
-                    'f': user.full_name or user.username,
-                    's': f"{user.username} {user.email} {user.full_name or ''}".lower()  # search text
-                })
-            
-            cache_key = f"{UserSearchCache.CACHE_PREFIX}{UserSearchCache.ALL_USERS_KEY}"
-            RedisCache.set(cache_key, users_data, UserSearchCache.CACHE_EXPIRATION)
-            print(f"Cached {len(users_data)} users ({len(str(users_data))} bytes)")
-            return users_data
+            backend = UserSearchCache.get_backend()
+            if backend.is_current():
+                print("User index is up to date")
+                return True
+            count = backend.rebuild()
+            if count is None:
+                print("User index is being built by another worker")
+                return True
+            print(f"Indexed {count} users")
+            return True
             
         except Exception as e:
-            print(f"Error caching all users: {e}")
+            print(f"Error indexing users: {e}")
             return None
     
     @staticmethod
     def search_cached_users(search_query, limit=10):
-        """Search within cached user data with max 10 results"""
-        cache_key = f"{UserSearchCache.CACHE_PREFIX}{UserSearchCache.ALL_USERS_KEY}"
-        all_users = RedisCache.get(cache_key)
-        
-        if all_users is None:
-            all_users = UserSearchCache.cache_all_users()
-            if all_users is None:
-                return None
-        
-        max_results = min(limit, 10)
-        
-        if search_query and len(search_query) >= 2:
-            search_lower = search_query.lower()
-            filtered_users = [
-                user for user in all_users 
-                if search_lower in user['s']
-            ][:max_results]  # Take only first 10 matches
-        else:
-            filtered_users = all_users[:max_results]  # First 10 users
-        
-        result_users = []
-        for user in filtered_users:
-            result_users.append({
-                'id': user['i'],
-                'username': user['u'],
-                'email': user['e'],
-                'full_name': user['f']
-            })
+        """Search the user index with max 10 results"""
+        result = UserSearchCache.search(search_query, min(limit, 10), 0)
+        if result is None:
+            return None
         
+        users = [
+            {key: user[key] for key in ('id', 'username', 'email', 'full_name')}
+            for user in result['users']
+        ]
         return {
-            'users': result_users,
-            'count': len(result_users)
+            'users': users,
+            'count': len(users)
         }
     
     @staticmethod
     def invalidate_user_cache():
-        """Invalidate user search cache when user data changes"""
+        """
+        Force a full rebuild of the user search index on every host.
+        
+        Regular User changes are applied incrementally on commit
+        (UserIndex.register_change_tracking); this is for manual clears.
+        """
         try:
             RedisCache.delete(f"{UserSearchCache.CACHE_PREFIX}{UserSearchCache.ALL_USERS_KEY}")
+            UserSearchCache.get_backend().request_rebuild()
             
             # Also invalidate route-level cache for user-related endpoints
             from utils.route_cache import RouteCacheManager
-            RouteCacheManager.invalidate_related_cache(['users', 'profile'])
+            RouteCacheManager.invalidate_related_cache(['users'])
             
             print("User search cache invalidated")
         except Exception as e:
@@ -101,17 +89,9 @@ class UserSearchCache:
     
     @staticmethod
     def get_cache_stats():
-        """Get cache usage statistics"""
+        """Get user index statistics"""
         try:
-            cache_key = f"{UserSearchCache.CACHE_PREFIX}{UserSearchCache.ALL_USERS_KEY}"
-            cached_data = RedisCache.get(cache_key)
-            if cached_data:
-                return {
-                    'cached_users': len(cached_data),
-                    'cache_size_estimate': len(str(cached_data)),
-                    'cache_exists': True
-                }
-            return {'cache_exists': False}
+            return UserSearchCache.get_backend().get_stats()
         except Exception as e:
             return {'error': str(e)}
 
@@ -147,11 +127,12 @@ def warm_up_user_cache():
         if result:
             stats = UserSearchCache.get_cache_stats()
             print(f"User search cache warmed up: {stats}")
-            
-            # Also warm up route cache
-            from utils.route_cache import CacheWarmer
-            CacheWarmer.warm_common_routes()
         else:
             print("Failed to warm up user cache")
     except Exception as e:
         print(f"Failed to warm up user cache: {e}")
+    
+    # Also warm up route cache for recently active users, in the background
+    if current_app.config.get('CACHE_WARM_ON_STARTUP'):
+        from utils.route_cache import CacheWarmer
+        CacheWarmer.warm_common_routes()
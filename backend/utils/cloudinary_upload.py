@@ -1,8 +1,13 @@
+import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.utils
+from flask import current_app
 from urllib.parse import urlparse
 import os
 import re
+import time
+import uuid
 
 def upload_profile_image(image_file, user_id):
     """
@@ -80,6 +85,98 @@ def upload_project_image(image_file, project_id):
         print(f"Cloudinary project image upload error: {e}")
         return None
 
+class CloudinaryNotConfigured(Exception):
+    """Raised when signed uploads are used without the Cloudinary API key and secret."""
+
+def get_task_attachment_folder(task_id):
+    return f"task_attachments/task_{task_id}"
+
+def get_signing_config():
+    """The Cloudinary config, if it can sign and verify uploads; raises CloudinaryNotConfigured otherwise"""
+    config = cloudinary.config()
+    if not config.api_key or not config.api_secret:
+        raise CloudinaryNotConfigured("CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET must be set")
+    return config
+
+def sign_task_attachment_upload(task_id):
+    """
+    Signed parameters for a browser to upload a task attachment straight to Cloudinary
+    
+    The client posts the file with these fields to upload_url. The public_id
+    is signed along with the timestamp, so the upload can only land in this
+    task's folder, and Cloudinary rejects signatures older than an hour.
+    The upload host follows the upload_prefix setting (CLOUDINARY_UPLOAD_PREFIX),
+    which can point at a stub storage server for local testing.
+    
+    Args:
+        task_id: Task the attachment will belong to
+    
+    Returns:
+        dict: upload_url and the form fields to send with the file
+    
+    Raises:
+        CloudinaryNotConfigured: Without an API key and secret
+    """
+    config = get_signing_config()
+    params = {
+        'public_id': f"{get_task_attachment_folder(task_id)}/{uuid.uuid4().hex}",
+        'timestamp': int(time.time())
+    }
+    params['signature'] = cloudinary.utils.api_sign_request(params, config.api_secret)
+    params['api_key'] = config.api_key
+    return {
+        'upload_url': cloudinary.utils.cloudinary_api_url('upload', resource_type='auto'),
+        'fields': params
+    }
+
+def verify_task_attachment_upload(task_id, upload_result):
+    """
+    Check an upload response relayed by the client and build the attachment URL
+    
+    The response signature over public_id and version is checked with the API
+    secret, so no call to Cloudinary is needed; the public_id must be in the
+    task's folder, which only sign_task_attachment_upload hands out.
+    
+    Args:
+        task_id: Task the attachment is for
+        upload_result (dict): public_id, version and signature from the upload
+            response, plus its resource_type and format
+    
+    Returns:
+        str: Delivery URL of the uploaded file, or None if the response is not genuine
+    
+    Raises:
+        CloudinaryNotConfigured: Without an API key and secret, so a
+            configuration problem is not mistaken for a forged upload
+    """
+    get_signing_config()
+    if not isinstance(upload_result, dict):
+        return None
+    
+    public_id = upload_result.get('public_id')
+    version = upload_result.get('version')
+    signature = upload_result.get('signature')
+    if not isinstance(public_id, str) or not public_id.startswith(f"{get_task_attachment_folder(task_id)}/"):
+        return None
+    if not version or not isinstance(signature, str):
+        return None
+    resource_type = upload_result.get('resource_type') or 'image'
+    file_format = upload_result.get('format')
+    if not isinstance(resource_type, str) or not isinstance(file_format, (str, type(None))):
+        return None
+    if not cloudinary.utils.verify_api_response_signature(public_id, version, signature):
+        current_app.logger.warning(f"Rejected task {task_id} attachment with a bad upload signature")
+        return None
+    
+    url, _ = cloudinary.utils.cloudinary_url(
+        public_id,
+        resource_type=resource_type,
+        version=version,
+        format=file_format,
+        secure=True
+    )
+    return url
+
 def delete_cloudinary_image(image_url):
     """
     Delete image from Cloudinary using the image URL
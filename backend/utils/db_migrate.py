@@ -122,3 +122,70 @@ def update_sqlite_schema():
         
     except Exception as e:
         print(f"SQLite schema update error: {e}")
+
+def update_sqlite_task_indexes():
+    """Composite indexes for the GET /tasks filters and deadline scans on tables created before Task declared them"""
+    from sqlalchemy import text
+    
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_task_owner_status_due ON task (owner_id, status, due_date)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_task_project_status ON task (project_id, status)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_task_due_status ON task (due_date, status)'))
+    except Exception as e:
+        print(f"SQLite task index error: {e}")
+
+def update_sqlite_search_index():
+    """
+    Indexes for UserService.search_users_sql on SQLite: an index on
+    (lower(username), id) for keyset pages, and an FTS5 trigram table over
+    username, email and full_name kept in sync by triggers
+    """
+    from sqlalchemy import text
+    from services.user_service import UserService
+    
+    fts = UserService.SQLITE_FTS_TABLE
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_username_lower_id ON "user" (lower(username), id)'))
+            
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': fts}
+            ).first()
+            if exists:
+                return
+            
+            print("Creating SQLite user search index...")
+            conn.execute(text(f"""
+                CREATE VIRTUAL TABLE {fts} USING fts5(
+                    username, email, full_name,
+                    content='user', content_rowid='id', tokenize='trigram'
+                )
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON "user" BEGIN
+                    INSERT INTO {fts}(rowid, username, email, full_name)
+                    VALUES (new.id, new.username, new.email, new.full_name);
+                END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON "user" BEGIN
+                    INSERT INTO {fts}({fts}, rowid, username, email, full_name)
+                    VALUES ('delete', old.id, old.username, old.email, old.full_name);
+                END
+            """))
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF username, email, full_name ON "user" BEGIN
+                    INSERT INTO {fts}({fts}, rowid, username, email, full_name)
+                    VALUES ('delete', old.id, old.username, old.email, old.full_name);
+                    INSERT INTO {fts}(rowid, username, email, full_name)
+                    VALUES (new.id, new.username, new.email, new.full_name);
+                END
+            """))
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+            print("SQLite user search index created")
+    except Exception as e:
+        # e.g. SQLite older than 3.34 has no trigram tokenizer; searches then use LIKE
+        print(f"SQLite search index error: {e}")
+    finally:
+        UserService._sqlite_fts_available = None
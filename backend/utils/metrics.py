@@ -0,0 +1,77 @@
+import threading
+import time
+from flask import current_app
+from utils.redis_utils import RedisCache
+
+class MetricsBuffer:
+    """
+    Counters and latency histograms accumulated per worker and shared via Redis
+
+    Recording is just a dict update under a lock; at most every
+    flush_interval seconds the pending amounts are added to their Redis
+    hashes with one pipelined HINCRBY round trip, so totals cover all workers.
+    A latency is counted in the first bucket whose upper bound (ms) it does
+    not exceed, or in le_inf, together with a count and a sum in microseconds.
+    """
+
+    def __init__(self, name, latency_buckets_ms, flush_interval=10):
+        self.name = name
+        self.latency_buckets_ms = tuple(latency_buckets_ms)
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+
+    def record(self, key, field, amount=1):
+        """Add to a counter of one Redis hash"""
+        with self._lock:
+            fields = self._pending.setdefault(key, {})
+            fields[field] = fields.get(field, 0) + amount
+        self.maybe_flush()
+
+    def observe(self, key, name, seconds):
+        """Add a duration to the histogram `name` of one Redis hash"""
+        elapsed_ms = seconds * 1000
+        bucket = next(
+            (f"le_{bound}" for bound in self.latency_buckets_ms if elapsed_ms <= bound),
+            'le_inf'
+        )
+        with self._lock:
+            fields = self._pending.setdefault(key, {})
+            for field, amount in (
+                (f"{name}_latency:{bucket}", 1),
+                (f"{name}_latency:count", 1),
+                (f"{name}_latency:sum_us", int(elapsed_ms * 1000)),
+            ):
+                fields[field] = fields.get(field, 0) + amount
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Add this worker's pending amounts to the shared Redis hashes"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        if pending and not RedisCache.hincr_many(pending):
+            current_app.logger.warning(f"Dropped {self.name} metrics: Redis unavailable")
+
+    def discard(self):
+        """Drop this worker's unflushed amounts"""
+        with self._lock:
+            self._pending = {}
+
+    def build_histogram(self, fields, name):
+        """Summarize the histogram `name` from a hash's fields: count, average (ms) and buckets"""
+        prefix = f"{name}_latency:"
+        count = int(fields.get(f"{prefix}count", 0))
+        return {
+            'count': count,
+            'avg': round(int(fields.get(f"{prefix}sum_us", 0)) / count / 1000, 3) if count else None,
+            'buckets': {
+                f"le_{bound}": int(fields.get(f"{prefix}le_{bound}", 0))
+                for bound in self.latency_buckets_ms + ('inf',)
+            }
+        }
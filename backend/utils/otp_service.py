@@ -3,6 +3,7 @@ from extensions import db
 from utils.email import send_email
 from utils.email_templates import get_otp_email_template, get_welcome_email_template
 from utils.validation import sanitize_email, sanitize_string, validate_full_name
+from utils.password_hasher import PasswordHasherBusy
 
 class OTPService:
     @staticmethod
@@ -78,6 +79,9 @@ class OTPService:
             
             return True, "Registration completed successfully"
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             print(f"OTP verification error: {e}")
             db.session.rollback()
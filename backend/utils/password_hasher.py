@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from extensions import bcrypt
+from utils.redis_utils import RedisCache
+from utils.metrics import MetricsBuffer
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already queued in this worker."""
+
+class PasswordHasher:
+    """
+    Admission control for bcrypt hashing and verification in each worker
+
+    This does not make hashing asynchronous: the request thread still waits
+    for its result, so the worker is not freed while a hash runs. What the
+    small per-worker pool adds is a bound on how many hashes a worker runs at
+    once (BCRYPT_MAX_WORKERS, bcrypt releases the GIL) and on how many
+    requests may wait for one (BCRYPT_MAX_PENDING). Beyond that, callers get
+    PasswordHasherBusy after BCRYPT_QUEUE_TIMEOUT seconds instead of piling
+    up behind a login spike; the app answers it with 503. The work factor is
+    BCRYPT_LOG_ROUNDS; hashes made with another factor are reported by
+    needs_rehash.
+
+    Queue wait and run time per operation are kept as latency histograms,
+    flushed to one Redis hash like the route cache metrics.
+    """
+
+    METRICS_KEY = "password_metrics"
+    OPERATIONS = ('hash', 'verify')
+    FLUSH_INTERVAL = 10  # seconds
+    # Upper bounds of the latency buckets in milliseconds; the last bucket is unbounded
+    LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    _executor = None
+    _slots = None
+    _pid = None
+    _lock = threading.Lock()
+    _metrics = MetricsBuffer('password hashing', LATENCY_BUCKETS_MS, FLUSH_INTERVAL)
+
+    @staticmethod
+    def get_executor():
+        """The pool of this process, created on first use (again after a fork)"""
+        if PasswordHasher._pid != os.getpid():
+            with PasswordHasher._lock:
+                if PasswordHasher._pid != os.getpid():
+                    config = current_app.config
+                    workers = config.get('BCRYPT_MAX_WORKERS', 2)
+                    PasswordHasher._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix='bcrypt'
+                    )
+                    PasswordHasher._slots = threading.BoundedSemaphore(
+                        workers + config.get('BCRYPT_MAX_PENDING', 16)
+                    )
+                    PasswordHasher._pid = os.getpid()
+        return PasswordHasher._executor
+
+    @staticmethod
+    def run(operation, func, *args):
+        """
+        Run func on the pool and wait for its result, recording wait and run time
+
+        Outside an app context (scripts, shell) there is no config to size the
+        pool from, so func runs inline.
+        """
+        if not has_app_context():
+            return func(*args)
+
+        executor = PasswordHasher.get_executor()
+        timeout = current_app.config.get('BCRYPT_QUEUE_TIMEOUT', 5)
+        if not PasswordHasher._slots.acquire(timeout=timeout):
+            PasswordHasher._metrics.record(PasswordHasher.METRICS_KEY, f"{operation}_rejected")
+            raise PasswordHasherBusy("Too many password operations in progress")
+
+        submitted = time.perf_counter()
+        timings = {}
+
+        def timed():
+            started = time.perf_counter()
+            timings['wait'] = started - submitted
+            try:
+                return func(*args)
+            finally:
+                timings['run'] = time.perf_counter() - started
+
+        try:
+            return executor.submit(timed).result()
+        finally:
+            PasswordHasher._slots.release()
+            PasswordHasher._metrics.observe(PasswordHasher.METRICS_KEY, f"{operation}_wait", timings.get('wait', 0))
+            PasswordHasher._metrics.observe(PasswordHasher.METRICS_KEY, operation, timings.get('run', 0))
+
+    @staticmethod
+    def hash(password):
+        """Hash a password with the configured work factor (bcrypt's default outside an app context)"""
+        rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12) if has_app_context() else None
+        return PasswordHasher.run(
+            'hash', bcrypt.generate_password_hash, password, rounds
+        ).decode('utf-8')
+
+    @staticmethod
+    def verify(password_hash, password):
+        return PasswordHasher.run('verify', bcrypt.check_password_hash, password_hash, password)
+
+    @staticmethod
+    def needs_rehash(password_hash):
+        """Whether a hash was made with a different work factor than configured"""
+        if not has_app_context():
+            return False
+        try:
+            rounds = int(password_hash.split('$')[2])
+        except (AttributeError, IndexError, ValueError):
+            return False
+        return rounds != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+
+    @staticmethod
+    def get_stats():
+        """Latency histograms (ms) of every operation and of its queue wait, across workers"""
+        PasswordHasher._metrics.flush()
+        fields = RedisCache.get_hashes([PasswordHasher.METRICS_KEY]).get(PasswordHasher.METRICS_KEY, {})
+        stats = {'log_rounds': current_app.config.get('BCRYPT_LOG_ROUNDS', 12)}
+        for operation in PasswordHasher.OPERATIONS:
+            stats[operation] = {
+                'run_ms': PasswordHasher._metrics.build_histogram(fields, operation),
+                'wait_ms': PasswordHasher._metrics.build_histogram(fields, f"{operation}_wait"),
+                'rejected': int(fields.get(f"{operation}_rejected", 0))
+            }
+        return stats
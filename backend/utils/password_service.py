@@ -4,6 +4,7 @@ from utils.email import send_email
 from utils.email_templates import get_password_reset_email_template
 from utils.validation import validate_email, validate_password, sanitize_email, sanitize_string
 from config import get_config
+from utils.password_hasher import PasswordHasherBusy
 
 class PasswordService:
     @staticmethod
@@ -93,6 +94,9 @@ class PasswordService:
             
             return True, "Password reset successfully"
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             print(f"Reset password error: {e}")
             db.session.rollback()
@@ -208,9 +208,43 @@ def update_existing_schema():
                         conn.execute(text(f"ALTER TABLE \"user\" {column_def}"))
                     conn.commit()
                     print("Added missing columns to user table")
+            
+            if 'user' in inspector.get_table_names():
+                create_user_search_indexes(conn)
+            
+            if 'task' in inspector.get_table_names():
+                create_task_indexes(conn)
         
         return True
         
     except Exception as e:
         print(f"Schema update error (non-blocking): {e}")
         return True
+
+def create_task_indexes(conn):
+    """Composite indexes for the GET /tasks filters and deadline scans on tables created before Task declared them"""
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_task_owner_status_due ON task (owner_id, status, due_date)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_task_project_status ON task (project_id, status)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_task_due_status ON task (due_date, status)'))
+    conn.commit()
+
+def create_user_search_indexes(conn):
+    """
+    Indexes for UserService.search_users_sql: a btree on (lower(username), id)
+    for keyset pages and pg_trgm GIN indexes so lower(column) LIKE '%q%' does
+    not scan the whole table
+    """
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_username_lower_id ON "user" (lower(username), id)'))
+    conn.commit()
+    
+    try:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for column in ('username', 'email', 'full_name'):
+            conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS ix_user_{column}_trgm ON "user" USING gin (lower({column}) gin_trgm_ops)'
+            ))
+        conn.commit()
+    except Exception as e:
+        # Without the extension, substring searches fall back to scanning
+        conn.rollback()
+        print(f"User search trigram indexes not created: {e}")
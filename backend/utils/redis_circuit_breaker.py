@@ -0,0 +1,177 @@
+import functools
+import logging
+import threading
+import time
+import valkey
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Redis while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: calls go through; failure_threshold consecutive connection
+        failures open the circuit.
+    open: calls fail immediately until the reset timeout has passed.
+    half_open: a single probe call is let through. Success closes the
+        circuit; failure re-opens it with the reset timeout doubled, up to
+        max_reset_timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, max_reset_timeout=300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._current_timeout = reset_timeout
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._current_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            return self._state
+
+    def allow_request(self):
+        """Whether a call may go to Redis now (claims the probe when half-open)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            with self._lock:
+                if not self._probe_in_flight:
+                    self._probe_in_flight = True
+                    return True
+        return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.warning("Redis circuit breaker closed: connection recovered")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+            self._current_timeout = self.reset_timeout
+
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error)
+            if self._state == self.HALF_OPEN:
+                # The probe failed: stay away for longer before trying again
+                self._current_timeout = min(self._current_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._times_opened += 1
+        logger.warning(
+            f"Redis circuit breaker opened after {self._failures} failures; "
+            f"retrying in {self._current_timeout:.0f}s ({self._last_error})"
+        )
+
+    def get_state(self):
+        """Get the breaker state for status endpoints."""
+        state = self.state
+        with self._lock:
+            retry_in = self._current_timeout - (time.monotonic() - self._opened_at) if state == self.OPEN else 0
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self._current_timeout,
+                'retry_in_seconds': round(max(retry_in, 0), 1),
+                'times_opened': self._times_opened,
+                'last_error': self._last_error
+            }
+
+class CircuitBreakerClient:
+    """
+    Wraps a Valkey client so every command goes through a CircuitBreaker.
+
+    The wrapper is falsy while the circuit is open, so the existing
+    `if not redis_client` checks fall back to the database path without
+    touching the network. Commands issued anyway raise CircuitOpenError.
+    """
+
+    # Errors that mean the server is unreachable or too slow, as opposed to rejecting a command
+    FAILURE_ERRORS = (valkey.exceptions.ConnectionError, valkey.exceptions.TimeoutError, OSError)
+
+    def __init__(self, client, breaker):
+        self._client = client
+        self.breaker = breaker
+
+    def __bool__(self):
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def call(self, func, *args, **kwargs):
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Redis circuit breaker is open")
+        try:
+            result = func(*args, **kwargs)
+        except self.FAILURE_ERRORS as e:
+            self.breaker.record_failure(e)
+            raise
+        except Exception:
+            # The server answered (e.g. a ResponseError), so it is reachable
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def pipeline(self, *args, **kwargs):
+        return _CircuitBreakerPipeline(self, self._client.pipeline(*args, **kwargs))
+
+    def pubsub(self, *args, **kwargs):
+        # Long-lived subscriber connections reconnect on their own
+        return self._client.pubsub(*args, **kwargs)
+
+    def scan_iter(self, match=None, count=None, **kwargs):
+        """SCAN page by page so every round trip goes through the breaker."""
+        cursor = '0'
+        while cursor != 0:
+            cursor, keys = self.call(self._client.scan, cursor=cursor, match=match, count=count, **kwargs)
+            cursor = int(cursor)
+            yield from keys
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def guarded(*args, **kwargs):
+            return self.call(attr, *args, **kwargs)
+        return guarded
+
+class _CircuitBreakerPipeline:
+    """Queues commands locally as usual; only execute() goes through the breaker."""
+
+    def __init__(self, client, pipe):
+        self._client = client
+        self._pipe = pipe
+
+    def execute(self, *args, **kwargs):
+        return self._client.call(self._pipe.execute, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
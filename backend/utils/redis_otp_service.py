@@ -7,6 +7,7 @@ from utils.email_templates import get_otp_email_template, get_welcome_email_temp
 from utils.validation import sanitize_email, sanitize_string, validate_full_name
 from models import User
 from extensions import db
+from utils.password_hasher import PasswordHasherBusy
 
 class RedisOTPService:
     """Redis-based OTP service for email verification and password reset"""
@@ -55,10 +56,8 @@ class RedisOTPService:
                 "purpose": "registration"
             }
             
-            # Set OTP with expiration
-            RedisCache.set(otp_key, otp_data, RedisOTPService.OTP_EXPIRATION)
-            # Reset attempts counter
-            RedisCache.set(attempts_key, 0, RedisOTPService.OTP_EXPIRATION)
+            # Set OTP and reset the attempts counter, both with expiration
+            RedisCache.set_many({otp_key: otp_data, attempts_key: 0}, RedisOTPService.OTP_EXPIRATION)
             
             # Send email
             subject = "Verify Your Email - OTP"
@@ -68,8 +67,7 @@ class RedisOTPService:
             email_sent = send_email(subject, [email], text_body, html_body)
             if not email_sent:
                 # Clean up Redis if email fails
-                RedisCache.delete(otp_key)
-                RedisCache.delete(attempts_key)
+                RedisCache.delete_many([otp_key, attempts_key])
                 return False, "Failed to send verification email. Please try again."
             
             print(f"OTP sent to {email}: {otp}")  # Remove in production
@@ -90,17 +88,15 @@ class RedisOTPService:
             otp_key = RedisOTPService._get_otp_key(email, "registration")
             attempts_key = RedisOTPService._get_attempts_key(email, "registration")
             
-            # Get OTP data from Redis
-            otp_data = RedisCache.get(otp_key)
+            # Get OTP data and attempts from Redis in one round trip
+            otp_data, attempts = RedisCache.get_many([otp_key, attempts_key], 0)
             if not otp_data:
                 return False, "No valid OTP found for this email or OTP has expired"
             
             # Check attempts
-            attempts = RedisCache.get(attempts_key, 0)
             if attempts >= RedisOTPService.MAX_ATTEMPTS:
                 # Clean up Redis
-                RedisCache.delete(otp_key)
-                RedisCache.delete(attempts_key)
+                RedisCache.delete_many([otp_key, attempts_key])
                 return False, "Too many failed attempts. Please request a new OTP."
             
             # Verify OTP
@@ -124,14 +120,16 @@ class RedisOTPService:
             db.session.commit()
             
             # Clean up Redis
-            RedisCache.delete(otp_key)
-            RedisCache.delete(attempts_key)
+            RedisCache.delete_many([otp_key, attempts_key])
             
             # Send welcome email
             RedisOTPService._send_welcome_email(user)
             
             return True, "Registration completed successfully"
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             print(f"OTP verification error: {e}")
             db.session.rollback()
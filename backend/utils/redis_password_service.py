@@ -7,6 +7,7 @@ from utils.email_templates import get_password_reset_email_template
 from utils.validation import validate_email, validate_password, sanitize_email, sanitize_string
 from utils.redis_utils import RedisCache
 from config import get_config
+from utils.password_hasher import PasswordHasherBusy
 
 class RedisPasswordService:
     """Redis-based password reset service"""
@@ -104,6 +105,9 @@ class RedisPasswordService:
             
             return True, "Password reset successfully"
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             print(f"Reset password error: {e}")
             db.session.rollback()
@@ -1,5 +1,9 @@
+import os
+import threading
+import time
 from datetime import datetime, timedelta
-from utils.redis_utils import RedisCache
+from cachetools import TTLCache
+from utils.redis_utils import RedisCache, PubSubManager
 from flask_jwt_extended import decode_token
 from flask import current_app
 
@@ -7,7 +11,124 @@ class RedisTokenService:
     """Redis-based token blacklisting service"""
     
     BLACKLIST_PREFIX = "blacklisted_token:"
+    USER_EPOCH_PREFIX = "token_epoch:"
     DEFAULT_EXPIRATION = 86400  # 24 hours
+    REVOCATION_CHANNEL = "auth:revocations"
+    ISSUED_CLAIM = "iat_ms"  # iat only has whole seconds, too coarse to order tokens around a logout-all
+    
+    # Per-worker results of recent checks: jti -> revoked, user_id -> logout-all epoch (ms) or None
+    _token_cache = None
+    _user_cache = None
+    _cache_lock = threading.Lock()
+    # Bumped whenever announced revocations change the caches, so a check that
+    # read Redis before one arrived does not overwrite it with its older answer
+    _cache_generation = 0
+    _listener_pid = None
+    
+    @staticmethod
+    def enable_local_cache(maxsize=10000, ttl=30):
+        """
+        Cache revocation checks in this process so most requests skip Redis.
+        
+        Revocations are announced on a pub/sub channel and applied to every
+        worker's cache at once; entries also expire after ttl seconds, which
+        bounds how long a missed announcement can let a revoked token through.
+        """
+        with RedisTokenService._cache_lock:
+            RedisTokenService._token_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+            RedisTokenService._user_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    @staticmethod
+    def _ensure_listener():
+        """Subscribe to revocations in this process (again after a fork)."""
+        if RedisTokenService._token_cache is None or RedisTokenService._listener_pid == os.getpid():
+            return
+        
+        with RedisTokenService._cache_lock:
+            if RedisTokenService._listener_pid == os.getpid():
+                return
+            RedisTokenService._listener_pid = os.getpid()
+        # A forked worker must not trust entries copied from its parent
+        RedisTokenService._clear_local_cache()
+        
+        PubSubManager.subscribe(
+            RedisTokenService.REVOCATION_CHANNEL,
+            RedisTokenService._handle_revocation,
+            on_error=RedisTokenService._clear_local_cache
+        )
+    
+    @staticmethod
+    def _clear_local_cache(*args):
+        with RedisTokenService._cache_lock:
+            RedisTokenService._cache_generation += 1
+            if RedisTokenService._token_cache is not None:
+                RedisTokenService._token_cache.clear()
+                RedisTokenService._user_cache.clear()
+    
+    @staticmethod
+    def _handle_revocation(message):
+        """Apply a revocation announced by any worker to this worker's cache."""
+        if RedisTokenService._token_cache is None:
+            return
+        with RedisTokenService._cache_lock:
+            RedisTokenService._cache_generation += 1
+            if message.get('jti'):
+                RedisTokenService._token_cache[message['jti']] = True
+            if message.get('user_id') is not None:
+                RedisTokenService._user_cache[str(message['user_id'])] = message.get('revoked_at')
+    
+    @staticmethod
+    def _announce(message):
+        RedisTokenService._handle_revocation(message)
+        PubSubManager.publish_notification(RedisTokenService.REVOCATION_CHANNEL, message)
+    
+    @staticmethod
+    def is_token_revoked(jwt_payload):
+        """
+        Check a decoded token against both revocation lists
+        
+        A token is revoked if its jti was blacklisted, or if it was issued
+        before its user's revocation epoch (see blacklist_user_tokens). Answers come from
+        this worker's cache when possible; otherwise both keys are read in one
+        round trip and the result is cached, unless a revocation announcement
+        was applied in the meantime.
+        """
+        jti = jwt_payload['jti']
+        user_id = str(jwt_payload.get('sub'))
+        token_cache = RedisTokenService._token_cache
+        user_cache = RedisTokenService._user_cache
+        
+        try:
+            if token_cache is not None:
+                RedisTokenService._ensure_listener()
+                with RedisTokenService._cache_lock:
+                    token_known, token_revoked = jti in token_cache, token_cache.get(jti)
+                    user_known, revoked_at = user_id in user_cache, user_cache.get(user_id)
+                    generation = RedisTokenService._cache_generation
+                if token_known and user_known:
+                    return bool(token_revoked) or RedisTokenService.issued_before(jwt_payload, revoked_at)
+            
+            token_data, epoch = RedisCache.get_many([
+                RedisTokenService._get_blacklist_key(jti),
+                RedisTokenService.get_user_epoch_key(user_id)
+            ])
+            token_revoked = token_data is not None
+            revoked_at = int(epoch) if epoch is not None else None
+            
+            if token_cache is not None:
+                with RedisTokenService._cache_lock:
+                    # Skip caching if a revocation was applied while Redis was read
+                    if RedisTokenService._cache_generation == generation:
+                        # A jti once seen revoked stays revoked
+                        token_cache[jti] = token_revoked or bool(token_cache.get(jti))
+                        user_cache[user_id] = revoked_at
+            
+            return token_revoked or RedisTokenService.issued_before(jwt_payload, revoked_at)
+            
+        except Exception as e:
+            current_app.logger.error(f"Error checking token revocation for {jti}: {e}")
+            # If Redis fails, assume token is not revoked to avoid blocking valid users
+            return False
     
     @staticmethod
     def _get_blacklist_key(jti):
@@ -15,9 +136,16 @@ class RedisTokenService:
         return f"{RedisTokenService.BLACKLIST_PREFIX}{jti}"
     
     @staticmethod
-    def blacklist_token(jti, token_type="access", expiration=None):
-        """Add a token to the blacklist"""
+    def blacklist_token(jti, token_type="access", expiration=None, expires_at=None):
+        """
+        Add a token to the blacklist
+        
+        Args:
+            expires_at: The token's exp claim; the entry is kept only until then
+        """
         try:
+            if expiration is None and expires_at is not None:
+                expiration = max(int(expires_at - time.time()), 1)
             if expiration is None:
                 expiration = RedisTokenService.DEFAULT_EXPIRATION
             
@@ -33,6 +161,8 @@ class RedisTokenService:
             if not success:
                 current_app.logger.error(f"Failed to blacklist token {jti} in Redis")
                 return True
+            
+            RedisTokenService._announce({'jti': jti})
                 
             current_app.logger.info(f"Successfully blacklisted token {jti}")
             return success
@@ -70,44 +200,66 @@ class RedisTokenService:
             current_app.logger.error(f"Error getting blacklisted token info for {jti}: {e}")
             return None
     
+    @staticmethod
+    def get_issued_claims():
+        """Extra claims for every new token: its issue time in milliseconds"""
+        return {RedisTokenService.ISSUED_CLAIM: int(time.time() * 1000)}
+    
+    @staticmethod
+    def issued_before(jwt_payload, revoked_at):
+        """Whether a token was issued before a logout-all epoch (milliseconds)"""
+        if revoked_at is None:
+            return False
+        issued = jwt_payload.get(RedisTokenService.ISSUED_CLAIM)
+        if issued is None:
+            # Tokens without the claim can only be ordered by the second they were issued in
+            issued = jwt_payload.get('iat', 0) * 1000
+        return issued < revoked_at
+    
+    @staticmethod
+    def get_user_epoch_key(user_id):
+        return f"{RedisTokenService.USER_EPOCH_PREFIX}{user_id}"
+    
     @staticmethod
     def blacklist_user_tokens(user_id, token_type=None):
-        """Blacklist all tokens for a specific user (for logout all devices)"""
+        """
+        Revoke every token issued to a user so far (logout from all devices)
+        
+        Stores one per-user epoch in milliseconds instead of an entry per
+        token: tokens issued before it (by their iat_ms claim) are rejected,
+        and tokens issued after it, even within the same second, are not.
+        The key lives as long as a refresh token, after which every token it
+        covers has expired anyway.
+        """
         try:
-            user_blacklist_key = f"user_blacklist:{user_id}"
-            blacklist_data = {
-                "user_id": user_id,
-                "blacklisted_at": datetime.utcnow().isoformat(),
-                "type": token_type or "all"
-            }
-            
-            success = RedisCache.set(user_blacklist_key, blacklist_data, 604800)  # 7 days
+            epoch = int(time.time() * 1000)
+            lifetime = int(current_app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+            success = RedisCache.set(RedisTokenService.get_user_epoch_key(user_id), epoch, lifetime)
             
             if not success:
-                current_app.logger.error(f"Failed to blacklist tokens for user {user_id} in Redis")
+                current_app.logger.error(f"Failed to revoke tokens for user {user_id} in Redis")
                 return True  # Allow logout to succeed even if Redis fails
+            
+            RedisTokenService._announce({'user_id': user_id, 'revoked_at': epoch})
                 
-            current_app.logger.info(f"Successfully blacklisted tokens for user {user_id}")
+            current_app.logger.info(f"Successfully revoked tokens for user {user_id}")
             return success
             
         except Exception as e:
-            current_app.logger.error(f"Error blacklisting tokens for user {user_id}: {e}")
+            current_app.logger.error(f"Error revoking tokens for user {user_id}: {e}")
             return True  # Allow logout to succeed even if Redis fails
     
+    @staticmethod
+    def get_user_epoch(user_id):
+        """Epoch milliseconds before which the user's tokens are revoked, or None"""
+        epoch = RedisCache.get(RedisTokenService.get_user_epoch_key(user_id))
+        return int(epoch) if epoch is not None else None
+    
     @staticmethod
     def is_user_blacklisted(user_id):
-        """Check if all tokens for a user are blacklisted"""
+        """Check if the user has logged out of all devices (within a refresh token's lifetime)"""
         try:
-            user_blacklist_key = f"user_blacklist:{user_id}"
-            blacklist_data = RedisCache.get(user_blacklist_key)
-            result = blacklist_data is not None
-            
-            if result:
-                current_app.logger.info(f"All tokens for user {user_id} are blacklisted")
-            else:
-                current_app.logger.info(f"User {user_id} is not blacklisted")
-            
-            return result
+            return RedisTokenService.get_user_epoch(user_id) is not None
             
         except Exception as e:
             current_app.logger.error(f"Error checking user blacklist for {user_id}: {e}")
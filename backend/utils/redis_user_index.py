@@ -0,0 +1,319 @@
+import threading
+import time
+from flask import current_app
+
+class RedisUserIndex:
+    """
+    User search served from Redis, for deployments without a per-host index file
+
+    Every username, email, full name and name word is a member
+    "<term>\\0<zero-padded user id>" of a sorted set with all scores 0, so
+    ZRANGEBYLEX walks the users whose terms start with a query in term
+    order. A second set of "<username>\\0<user id>" members orders the full
+    list, and each user's row is a small hash. A search reads one page of
+    members and the rows on that page, never the whole user list.
+
+    Only prefix matches are served (the autocomplete case); substring
+    matches need the file index or the database.
+
+    Committed User changes are applied per user by one script, which also
+    stamps the row with a version. A full rebuild skips rows stamped after
+    it started reading the database, and deleted users leave a stamped,
+    empty row behind for the same reason.
+    """
+
+    TERMS_KEY = "user_search:terms"
+    NAMES_KEY = "user_search:names"
+    USER_KEY = "user_search:user:{}"
+    USER_TERMS_KEY = "user_search:user_terms:{}"
+    VERSION_KEY = "user_search:version"
+    READY_KEY = "user_search:ready"
+    LOCK_KEY = "user_search:rebuild_lock"
+    FIELDS = ('id', 'username', 'email', 'full_name', 'profile_picture')
+    REBUILD_BATCH_SIZE = 500
+    REBUILD_LOCK_TIMEOUT = 300  # seconds
+    REBUILD_RETRY_INTERVAL = 5.0  # seconds between rebuild attempts in one worker
+    MIN_SCAN_BATCH = 50
+
+    # KEYS: terms, names, user row, user's members, version counter
+    # ARGV: rebuild version ('' for a live change), member count n, n term
+    # members, the name member, then row field/value pairs (n = 0 deletes)
+    APPLY_SCRIPT = """
+        local version
+        if ARGV[1] == '' then
+            version = redis.call('incr', KEYS[5])
+        else
+            version = tonumber(ARGV[1])
+            if tonumber(redis.call('hget', KEYS[3], 'v') or '0') > version then
+                return 0
+            end
+        end
+        for _, member in ipairs(redis.call('smembers', KEYS[4])) do
+            redis.call('zrem', KEYS[1], member)
+            redis.call('zrem', KEYS[2], member)
+        end
+        redis.call('del', KEYS[3], KEYS[4])
+        redis.call('hset', KEYS[3], 'v', version)
+        local n = tonumber(ARGV[2])
+        if n > 0 then
+            for i = 3, n + 2 do
+                redis.call('zadd', KEYS[1], 0, ARGV[i])
+                redis.call('sadd', KEYS[4], ARGV[i])
+            end
+            redis.call('zadd', KEYS[2], 0, ARGV[n + 3])
+            redis.call('sadd', KEYS[4], ARGV[n + 3])
+            for i = n + 4, #ARGV, 2 do
+                redis.call('hset', KEYS[3], ARGV[i], ARGV[i + 1])
+            end
+        end
+        return 1
+    """
+
+    _lock = threading.Lock()
+    _rebuilding = False
+    _last_rebuild_attempt = 0.0
+
+    @staticmethod
+    def member(term, user_id):
+        # Zero-padded so users sharing a term sort by id
+        return term.encode('utf-8') + b'\0' + f"{user_id:010d}".encode()
+
+    @staticmethod
+    def user_id_of(member):
+        return int(member.rsplit(b'\0', 1)[1])
+
+    @staticmethod
+    def apply_args(user_id, record, rebuild_version=''):
+        """KEYS and ARGV of APPLY_SCRIPT for one user (record None deletes)"""
+        keys = [
+            RedisUserIndex.TERMS_KEY, RedisUserIndex.NAMES_KEY,
+            RedisUserIndex.USER_KEY.format(user_id), RedisUserIndex.USER_TERMS_KEY.format(user_id),
+            RedisUserIndex.VERSION_KEY
+        ]
+        if record is None:
+            return keys, [rebuild_version, 0]
+
+        _, username, email, full_name, profile_picture = record
+        fields = [(value or '').lower() for value in (username, email, full_name)]
+        terms = set(fields) | set(fields[2].split())
+        terms.discard('')
+        args = [rebuild_version, len(terms)]
+        args += [RedisUserIndex.member(term, user_id) for term in sorted(terms)]
+        args.append(RedisUserIndex.member(fields[0], user_id))
+        for field, value in zip(RedisUserIndex.FIELDS, record):
+            args += [field, '' if value is None else value]
+        return keys, args
+
+    @staticmethod
+    def apply(changes, rebuild_version=''):
+        """
+        Write users' rows and terms, pipelined
+
+        Args:
+            changes: {user_id: (id, username, email, full_name, profile_picture) or None if deleted}
+            rebuild_version: Version a rebuild read the database at; rows changed
+                since are left alone. Empty for live changes.
+        """
+        from extensions import redis_client
+        if not redis_client or not changes:
+            return False
+
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id, record in changes.items():
+            keys, args = RedisUserIndex.apply_args(user_id, record, rebuild_version)
+            pipe.eval(RedisUserIndex.APPLY_SCRIPT, len(keys), *keys, *args)
+        pipe.execute()
+        return True
+
+    @staticmethod
+    def record_changes(changes):
+        """Apply committed user changes (see UserIndex.register_change_tracking)"""
+        RedisUserIndex.apply(changes)
+
+    @staticmethod
+    def request_rebuild():
+        """Rebuild from the database on the next search; served by the database until then"""
+        from utils.redis_utils import RedisCache
+        RedisCache.delete(RedisUserIndex.READY_KEY)
+
+    @staticmethod
+    def is_current():
+        from utils.redis_utils import RedisCache
+        return RedisCache.exists(RedisUserIndex.READY_KEY)
+
+    @staticmethod
+    def fetch_users(user_ids):
+        """Rows of the given users, in order, skipping users deleted meanwhile"""
+        from utils.redis_utils import RedisCache
+        keys = [RedisUserIndex.USER_KEY.format(user_id) for user_id in user_ids]
+        rows = RedisCache.get_hashes(keys)
+        users = []
+        for key in keys:
+            row = rows.get(key)
+            if not row or 'id' not in row:
+                continue
+            users.append({
+                'id': int(row['id']),
+                'username': row['username'],
+                'email': row['email'],
+                'full_name': row['full_name'] or row['username'],
+                'profile_picture': row['profile_picture'] or None
+            })
+        return users
+
+    @staticmethod
+    def prefix_user_ids(redis_client, query, needed):
+        """
+        Up to needed distinct users with a term starting with query, in term order
+
+        Returns:
+            tuple: (user ids, whether every matching term was read)
+        """
+        low, high = b'[' + query, b'[' + query + b'\xff'  # No UTF-8 byte is 0xff
+        batch = max(needed * 4, RedisUserIndex.MIN_SCAN_BATCH)  # a user has a few terms
+        user_ids = []
+        seen = set()
+        start = 0
+        while True:
+            members = redis_client.zrangebylex(RedisUserIndex.TERMS_KEY, low, high, start=start, num=batch)
+            for member in members:
+                user_id = RedisUserIndex.user_id_of(member)
+                if user_id not in seen:
+                    if len(user_ids) == needed:
+                        return user_ids, False
+                    seen.add(user_id)
+                    user_ids.append(user_id)
+            if len(members) < batch:
+                return user_ids, True
+            start += batch
+
+    @staticmethod
+    def search(search_query='', limit=20, offset=0):
+        """
+        Search users by prefix
+
+        Returns:
+            dict: users, has_more and total_count like UserService.search_users
+            (total_count only when every match was read), or None if the index
+            is being built or Redis is unavailable
+        """
+        from extensions import redis_client
+        if not redis_client:
+            return None
+
+        try:
+            if not RedisUserIndex.is_current():
+                RedisUserIndex.schedule_rebuild()
+                return None
+
+            query = search_query.strip().lower().encode('utf-8')
+            if not query:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.zcard(RedisUserIndex.NAMES_KEY)
+                pipe.zrange(RedisUserIndex.NAMES_KEY, offset, offset + limit - 1)
+                total, members = pipe.execute()
+                users = RedisUserIndex.fetch_users([RedisUserIndex.user_id_of(member) for member in members])
+                return {
+                    'users': users,
+                    'has_more': offset + len(members) < total,
+                    'total_count': total if offset == 0 else None
+                }
+
+            user_ids, exhausted = RedisUserIndex.prefix_user_ids(redis_client, query, offset + limit + 1)
+            page = user_ids[offset:offset + limit]
+            return {
+                'users': RedisUserIndex.fetch_users(page),
+                'has_more': len(user_ids) > offset + limit,
+                'total_count': len(user_ids) if exhausted and offset == 0 else None
+            }
+        except Exception as e:
+            current_app.logger.error(f"Redis user index search error: {e}")
+            return None
+
+    @staticmethod
+    def schedule_rebuild():
+        """Rebuild in a background thread, at most one at a time per worker"""
+        with RedisUserIndex._lock:
+            now = time.time()
+            if RedisUserIndex._rebuilding or now - RedisUserIndex._last_rebuild_attempt < RedisUserIndex.REBUILD_RETRY_INTERVAL:
+                return
+            RedisUserIndex._rebuilding = True
+            RedisUserIndex._last_rebuild_attempt = now
+
+        from extensions import db
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    RedisUserIndex.rebuild()
+                except Exception as e:
+                    app.logger.error(f"Redis user index rebuild error: {e}")
+                finally:
+                    RedisUserIndex._rebuilding = False
+                    db.session.remove()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    @staticmethod
+    def rebuild():
+        """
+        Load every user into Redis and drop users no longer in the database
+
+        Returns:
+            int: Number of indexed users, or None if another worker is building
+            it or Redis is unavailable
+        """
+        from models import User
+        from extensions import db, redis_client
+        from utils.redis_utils import RedisCache
+
+        if not redis_client:
+            return None
+        token = RedisCache.acquire_lock(RedisUserIndex.LOCK_KEY, RedisUserIndex.REBUILD_LOCK_TIMEOUT)
+        if not token:
+            return None
+
+        try:
+            started = time.time()
+            # Read the version first: rows changed after this are newer than the query
+            version = int(RedisCache.get(RedisUserIndex.VERSION_KEY, 0) or 0)
+            users = db.session.query(
+                User.id, User.username, User.email, User.full_name, User.profile_picture
+            ).all()
+
+            changes = {user.id: tuple(user) for user in users}
+            for member in redis_client.zrange(RedisUserIndex.NAMES_KEY, 0, -1):
+                changes.setdefault(RedisUserIndex.user_id_of(member), None)
+
+            items = list(changes.items())
+            for start in range(0, len(items), RedisUserIndex.REBUILD_BATCH_SIZE):
+                RedisUserIndex.apply(dict(items[start:start + RedisUserIndex.REBUILD_BATCH_SIZE]), version)
+
+            RedisCache.set(RedisUserIndex.READY_KEY, version)
+            current_app.logger.info(
+                f"Redis user index built: {len(users)} users in {time.time() - started:.2f}s"
+            )
+            return len(users)
+        finally:
+            RedisCache.release_lock(RedisUserIndex.LOCK_KEY, token)
+
+    @staticmethod
+    def get_stats():
+        from extensions import redis_client
+        if not redis_client:
+            return {'index_exists': False}
+
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.exists(RedisUserIndex.READY_KEY)
+        pipe.zcard(RedisUserIndex.NAMES_KEY)
+        pipe.zcard(RedisUserIndex.TERMS_KEY)
+        pipe.get(RedisUserIndex.VERSION_KEY)
+        ready, indexed_users, terms, version = pipe.execute()
+        return {
+            'backend': 'redis',
+            'index_exists': bool(ready),
+            'indexed_users': indexed_users,
+            'indexed_terms': terms,
+            'current_version': int(version or 0)
+        }
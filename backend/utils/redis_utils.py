@@ -1,12 +1,274 @@
+import fnmatch
 import json
+import os
 import pickle
+import threading
+import time
+import uuid
+import zlib
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union
+from cachetools import TTLCache
 from extensions import redis_client
 from flask import current_app
 
+try:
+    import msgpack
+except ImportError:  # Optional: values fall back to JSON
+    msgpack = None
+
+class RedisCodec:
+    """
+    Format-tagged serialization for RedisCache values.
+    
+    Structured values are stored as a tag byte followed by the payload, and
+    payloads above the compression threshold are zlib-compressed and tagged
+    again. Tags are control bytes that never start JSON text, so untagged
+    values written before the codec existed still decode the old way.
+    """
+    
+    TAG_RAW = b'\x00'  # Bytes stored by set_bytes
+    TAG_JSON = b'\x01'
+    TAG_MSGPACK = b'\x02'
+    TAG_ZLIB = b'\x03'  # Compressed, tagged payload
+    TAGS = (TAG_RAW, TAG_JSON, TAG_MSGPACK, TAG_ZLIB)
+    
+    codec = 'json'
+    compress_threshold = 1024  # bytes; 0 disables compression
+    compress_level = 1  # Favour speed: values are compressed on every write
+    
+    @staticmethod
+    def configure(codec: str = 'msgpack', compress_threshold: int = 1024, compress_level: int = 1) -> None:
+        """Select the codec for new writes; entries in any format remain readable. Needs an app context."""
+        if codec == 'msgpack' and msgpack is None:
+            current_app.logger.warning("msgpack is not installed; Redis values will be stored as JSON")
+            codec = 'json'
+        RedisCodec.codec = codec
+        RedisCodec.compress_threshold = compress_threshold
+        RedisCodec.compress_level = compress_level
+    
+    @staticmethod
+    def is_tagged(data: Any) -> bool:
+        return isinstance(data, bytes) and data[:1] in RedisCodec.TAGS
+    
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        """Serialize a structured value with the configured codec."""
+        if RedisCodec.codec == 'msgpack':
+            payload = RedisCodec.TAG_MSGPACK + msgpack.packb(value, use_bin_type=True)
+        else:
+            payload = RedisCodec.TAG_JSON + json.dumps(value, separators=(',', ':')).encode('utf-8')
+        return RedisCodec.compress(payload)
+    
+    @staticmethod
+    def pack_bytes(data: bytes) -> bytes:
+        """Tag (and maybe compress) raw bytes."""
+        return RedisCodec.compress(RedisCodec.TAG_RAW + data)
+    
+    @staticmethod
+    def compress(payload: bytes) -> bytes:
+        if RedisCodec.compress_threshold and len(payload) >= RedisCodec.compress_threshold:
+            compressed = RedisCodec.TAG_ZLIB + zlib.compress(payload, RedisCodec.compress_level)
+            if len(compressed) < len(payload):
+                return compressed
+        return payload
+    
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        """Decode a tagged value."""
+        tag, body = data[:1], data[1:]
+        if tag == RedisCodec.TAG_ZLIB:
+            return RedisCodec.loads(zlib.decompress(body))
+        if tag == RedisCodec.TAG_MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack-encoded value but msgpack is not installed")
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        if tag == RedisCodec.TAG_JSON:
+            return json.loads(body)
+        return body
+
 class RedisCache:
-    """Redis caching utility class."""
+    """Redis caching utility class with an optional in-process L1 tier."""
+    
+    # Only keys under these prefixes are kept in the in-process tier. Values
+    # returned from it are shared between callers and must be treated as read-only.
+    LOCAL_CACHE_PREFIXES = ('route_cache:', 'cache_ver:', 'user_search:')
+    INVALIDATION_CHANNEL = "cache:l1_invalidate"
+    
+    # Deletes a lock only if it still holds the caller's token
+    RELEASE_LOCK_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+    
+    # Keys fetched per SCAN call and deleted per UNLINK; keeps each command short
+    SCAN_BATCH_SIZE = 500
+    # Upper bound on keys examined when estimating how many keys match a pattern
+    COUNT_SAMPLE_LIMIT = 10000
+    
+    # Marks keys known to be absent, so missing version counters stay off the network too
+    _MISSING = object()
+    
+    _local_cache = None
+    _local_lock = threading.Lock()
+    _listener_pid = None
+    _instance_id = uuid.uuid4().hex
+    _stats = {
+        'l1': {'hits': 0, 'misses': 0},
+        'l2': {'hits': 0, 'misses': 0}
+    }
+    
+    @staticmethod
+    def enable_local_cache(maxsize: int = 2048, ttl: int = 30) -> None:
+        """
+        Enable the bounded per-process TTL/LRU tier in front of Redis.
+        
+        Entries are dropped in every worker through the pub/sub channel when a
+        key is written or deleted, and expire after ttl seconds regardless, which
+        bounds staleness if an invalidation message is ever missed.
+        """
+        with RedisCache._local_lock:
+            RedisCache._local_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        RedisCache._ensure_listener()
+    
+    @staticmethod
+    def _ensure_listener() -> None:
+        """Start the invalidation listener in this process (again after a fork)."""
+        if RedisCache._local_cache is None or RedisCache._listener_pid == os.getpid():
+            return
+        
+        with RedisCache._local_lock:
+            if RedisCache._listener_pid == os.getpid():
+                return
+            RedisCache._listener_pid = os.getpid()
+            # A forked worker must not trust entries copied from its parent
+            RedisCache._local_cache.clear()
+            RedisCache._instance_id = uuid.uuid4().hex
+        
+        PubSubManager.subscribe(
+            RedisCache.INVALIDATION_CHANNEL,
+            RedisCache._handle_invalidation,
+            on_error=RedisCache.clear_local_cache
+        )
+    
+    @staticmethod
+    def _handle_invalidation(message: dict) -> None:
+        """Drop keys announced by another worker from the in-process tier."""
+        data = message.get('data') or {}
+        if data.get('origin') == RedisCache._instance_id:
+            return
+        
+        with RedisCache._local_lock:
+            if RedisCache._local_cache is None:
+                return
+            for key in data.get('keys', []):
+                RedisCache._local_pop(key)
+    
+    @staticmethod
+    def _is_local_key(key: str) -> bool:
+        return RedisCache._local_cache is not None and key.startswith(RedisCache.LOCAL_CACHE_PREFIXES)
+    
+    @staticmethod
+    def _local_slot(key: str, raw: bool = False):
+        """In-process slot for a key; raw bytes and decoded values are held separately."""
+        return ('raw', key) if raw else key
+    
+    @staticmethod
+    def _local_get(key: str, raw: bool = False):
+        """Look a key up in the in-process tier, returning (found, value)."""
+        RedisCache._ensure_listener()
+        with RedisCache._local_lock:
+            try:
+                value = RedisCache._local_cache[RedisCache._local_slot(key, raw)]
+            except KeyError:
+                RedisCache._stats['l1']['misses'] += 1
+                return False, None
+            RedisCache._stats['l1']['hits'] += 1
+            return True, value
+    
+    @staticmethod
+    def _local_set(key: str, value: Any, raw: bool = False) -> None:
+        with RedisCache._local_lock:
+            if RedisCache._local_cache is not None:
+                RedisCache._local_cache[RedisCache._local_slot(key, raw)] = value
+    
+    @staticmethod
+    def _local_pop(key: str) -> None:
+        RedisCache._local_cache.pop(key, None)
+        RedisCache._local_cache.pop(RedisCache._local_slot(key, True), None)
+    
+    @staticmethod
+    def _invalidate_local(keys: list) -> None:
+        """Drop keys from this process and announce the change to other workers."""
+        keys = [RedisCache.decode_key(key) for key in keys]
+        keys = [key for key in keys if RedisCache._is_local_key(key)]
+        if not keys:
+            return
+        
+        with RedisCache._local_lock:
+            for key in keys:
+                RedisCache._local_pop(key)
+        
+        PubSubManager.publish_notification(
+            RedisCache.INVALIDATION_CHANNEL,
+            {'keys': keys, 'origin': RedisCache._instance_id}
+        )
+    
+    @staticmethod
+    def clear_local_cache(*args) -> None:
+        """Drop everything held in the in-process tier of this worker."""
+        with RedisCache._local_lock:
+            if RedisCache._local_cache is not None:
+                RedisCache._local_cache.clear()
+    
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        """Decode a raw Redis value the same way get() returns it."""
+        if RedisCodec.is_tagged(value):
+            return RedisCodec.loads(value)
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+            if isinstance(value, bytes):
+                try:
+                    return value.decode('utf-8')
+                except UnicodeDecodeError:
+                    return value
+            return value
+    
+    @staticmethod
+    def decode_key(key: Union[str, bytes]) -> str:
+        """Keys come back from SCAN/KEYS as bytes; normalize them to str."""
+        return key.decode('utf-8') if isinstance(key, bytes) else key
+    
+    @staticmethod
+    def get_stats() -> dict:
+        """Get hit/miss counters for both cache tiers of this worker."""
+        with RedisCache._local_lock:
+            return {
+                'l1_enabled': RedisCache._local_cache is not None,
+                'l1_size': len(RedisCache._local_cache) if RedisCache._local_cache is not None else 0,
+                'l1': dict(RedisCache._stats['l1']),
+                'l2': dict(RedisCache._stats['l2'])
+            }
+    
+    @staticmethod
+    def _encode(value: Any) -> Union[str, bytes]:
+        """
+        Serialize a value the way set() stores it.
+        
+        Scalars stay plain text so counters can still be INCRed; strings that
+        would look like a codec tag are encoded to keep them unambiguous.
+        """
+        if isinstance(value, (dict, list)):
+            return RedisCodec.dumps(value)
+        if not isinstance(value, str):
+            return str(value)
+        if value[:1].encode('utf-8') in RedisCodec.TAGS:
+            return RedisCodec.dumps(value)
+        return value
     
     @staticmethod
     def set(key: str, value: Any, expiration: Optional[int] = None) -> bool:
@@ -18,23 +280,83 @@ class RedisCache:
             value: Value to store (will be JSON serialized)
             expiration: Expiration time in seconds
             
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return RedisCache.set_many({key: value}, expiration)
+    
+    @staticmethod
+    def set_many(mapping: dict, expiration: Optional[Union[int, dict]] = None) -> bool:
+        """
+        Set several values in a single pipelined round trip.
+        
+        Args:
+            mapping: Redis key to value (values are serialized as in set())
+            expiration: Expiration in seconds for every key, or a dict of
+                per-key expirations (keys missing from it don't expire)
+            
         Returns:
             bool: True if successful, False otherwise
         """
         if not redis_client:
             current_app.logger.warning("Redis client not available")
             return False
+        if not mapping:
+            return True
+        
+        try:
+            encoded = {key: RedisCache._encode(value) for key, value in mapping.items()}
+            if len(encoded) == 1 and not isinstance(expiration, dict):
+                # A lone key needs no pipeline
+                (key, value), = encoded.items()
+                if expiration:
+                    redis_client.setex(key, expiration, value)
+                else:
+                    redis_client.set(key, value)
+            else:
+                pipe = redis_client.pipeline(transaction=False)
+                for key, value in encoded.items():
+                    ttl = expiration.get(key) if isinstance(expiration, dict) else expiration
+                    if ttl:
+                        pipe.setex(key, ttl, value)
+                    else:
+                        pipe.set(key, value)
+                pipe.execute()
             
+            local_keys = [key for key in mapping if RedisCache._is_local_key(key)]
+            if local_keys:
+                RedisCache._invalidate_local(local_keys)
+                for key in local_keys:
+                    original = mapping[key]
+                    RedisCache._local_set(key, original if isinstance(original, (dict, list)) else RedisCache._decode(encoded[key]))
+            
+            current_app.logger.debug(f"Redis set successful for keys {list(mapping)}")
+            return True
+        except Exception as e:
+            current_app.logger.error(f"Redis set error for keys {list(mapping)}: {e}")
+            return False
+    
+    @staticmethod
+    def set_bytes(key: str, value: bytes, expiration: Optional[int] = None) -> bool:
+        """
+        Store raw bytes in Redis as-is, with optional expiration.
+        
+        Use get_bytes/get_many(raw=True) to read them back.
+        """
+        if not redis_client:
+            current_app.logger.warning("Redis client not available")
+            return False
+        
         try:
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value)
-            elif not isinstance(value, str):
-                value = str(value)
-                
+            packed = RedisCodec.pack_bytes(value)
             if expiration:
-                result = redis_client.setex(key, expiration, value)
+                redis_client.setex(key, expiration, packed)
             else:
-                result = redis_client.set(key, value)
+                redis_client.set(key, packed)
+            
+            if RedisCache._is_local_key(key):
+                RedisCache._invalidate_local([key])
+                RedisCache._local_set(key, value, raw=True)
             
             current_app.logger.debug(f"Redis set successful for key {key}")
             return True
@@ -54,33 +376,253 @@ class RedisCache:
         Returns:
             The stored value or default
         """
+        return RedisCache.get_many([key], default)[0]
+    
+    @staticmethod
+    def get_bytes(key: str, default=None) -> Optional[bytes]:
+        """Get a value from Redis as raw bytes, without decoding it."""
+        return RedisCache.get_many([key], default, raw=True)[0]
+    
+    @staticmethod
+    def get_many(keys: list, default=None, raw: bool = False) -> list:
+        """
+        Get several values from Redis in a single round trip.
+
+        Args:
+            keys: Redis keys
+            default: Default value for keys that don't exist
+            raw: Return the stored bytes instead of decoding them
+
+        Returns:
+            list: Stored values (or default) in the same order as keys
+        """
+        if not redis_client or not keys:
+            return [default] * len(keys)
+
+        results = [default] * len(keys)
+        remote_indexes = []
+        for index, key in enumerate(keys):
+            if RedisCache._is_local_key(key):
+                found, value = RedisCache._local_get(key, raw)
+                if found:
+                    if value is not RedisCache._MISSING:
+                        results[index] = value
+                    continue
+            remote_indexes.append(index)
+        
+        if not remote_indexes:
+            return results
+
+        try:
+            values = redis_client.mget([keys[index] for index in remote_indexes])
+            for index, value in zip(remote_indexes, values):
+                if value is None:
+                    RedisCache._stats['l2']['misses'] += 1
+                    if RedisCache._is_local_key(keys[index]):
+                        RedisCache._local_set(keys[index], RedisCache._MISSING, raw)
+                    continue
+                RedisCache._stats['l2']['hits'] += 1
+                if not raw:
+                    value = RedisCache._decode(value)
+                elif RedisCodec.is_tagged(value):
+                    value = RedisCodec.loads(value)
+                if RedisCache._is_local_key(keys[index]):
+                    RedisCache._local_set(keys[index], value, raw)
+                results[index] = value
+            return results
+        except Exception as e:
+            current_app.logger.error(f"Redis mget error for keys {keys}: {e}")
+            return [default] * len(keys)
+
+    @staticmethod
+    def incr_many(keys: list) -> bool:
+        """Increment several counters in a single pipelined round trip."""
+        if not redis_client or not keys:
+            return False
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.incr(key)
+            pipe.execute()
+            RedisCache._invalidate_local(keys)
+            return True
+        except Exception as e:
+            current_app.logger.error(f"Redis incr error for keys {keys}: {e}")
+            return False
+
+    @staticmethod
+    def hincr_many(updates: dict) -> bool:
+        """
+        Add to hash fields across several hashes in a single pipelined round trip.
+        
+        Args:
+            updates: Mapping of hash key to {field: amount}
+        """
+        if not redis_client or not updates:
+            return False
+        
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key, fields in updates.items():
+                for field, amount in fields.items():
+                    pipe.hincrby(key, field, amount)
+            pipe.execute()
+            return True
+        except Exception as e:
+            current_app.logger.error(f"Redis hincrby error for keys {list(updates)}: {e}")
+            return False
+    
+    @staticmethod
+    def get_hashes(keys: list) -> dict:
+        """Fetch several hashes in one round trip, with keys, fields and values as str."""
+        if not redis_client or not keys:
+            return {}
+        
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
+            return {
+                key: {RedisCache.decode_key(field): RedisCache.decode_key(value) for field, value in data.items()}
+                for key, data in zip(keys, pipe.execute())
+            }
+        except Exception as e:
+            current_app.logger.error(f"Redis hgetall error for keys {keys}: {e}")
+            return {}
+    
+    @staticmethod
+    def zadd_many(key: str, mapping: dict, min_score: Optional[float] = None) -> bool:
+        """
+        Add or update sorted set members in one round trip.
+        
+        Args:
+            key: Redis key of the sorted set
+            mapping: Member to score
+            min_score: Also drop members scored below this
+        """
+        if not redis_client or not mapping:
+            return False
+        
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.zadd(key, mapping)
+            if min_score is not None:
+                pipe.zremrangebyscore(key, '-inf', f"({min_score}")
+            pipe.execute()
+            return True
+        except Exception as e:
+            current_app.logger.error(f"Redis zadd error for key {key}: {e}")
+            return False
+    
+    @staticmethod
+    def zrange_latest(key: str, min_score: float, limit: int) -> list:
+        """Get up to limit sorted set members scored at least min_score, highest first, as str."""
+        if not redis_client:
+            return []
+        
+        try:
+            members = redis_client.zrevrangebyscore(key, '+inf', min_score, start=0, num=limit)
+            return [RedisCache.decode_key(member) for member in members]
+        except Exception as e:
+            current_app.logger.error(f"Redis zrange error for key {key}: {e}")
+            return []
+    
+    @staticmethod
+    def zrange_after(key: str, min_score: float) -> list:
+        """Get sorted set members scored above min_score, lowest first, as (str, score) pairs."""
         if not redis_client:
-            return default
+            return []
+        
+        try:
+            members = redis_client.zrangebyscore(key, f"({min_score}", '+inf', withscores=True)
+            return [(RedisCache.decode_key(member), score) for member, score in members]
+        except Exception as e:
+            current_app.logger.error(f"Redis zrange error for key {key}: {e}")
+            return []
+    
+    @staticmethod
+    def run_script(script: str, keys: list, args: list, invalidates: Optional[list] = None) -> Any:
+        """
+        Run a Lua script atomically.
+        
+        Args:
+            script: Lua source
+            keys: KEYS passed to the script
+            args: ARGV passed to the script
+            invalidates: Keys the script writes, dropped from the in-process tier afterwards
             
+        Returns:
+            The script's result, or None if it could not be run
+        """
+        if not redis_client:
+            return None
+        
         try:
-            value = redis_client.get(key)
-            if value is None:
-                return default
-                
-            try:
-                return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
-                return value
+            result = redis_client.eval(script, len(keys), *keys, *args)
+            if invalidates:
+                RedisCache._invalidate_local(invalidates)
+            return result
         except Exception as e:
-            current_app.logger.error(f"Redis get error for key {key}: {e}")
-            return default
+            current_app.logger.error(f"Redis script error for keys {keys}: {e}")
+            return None
+    
+    @staticmethod
+    def acquire_lock(key: str, timeout: int) -> Optional[str]:
+        """
+        Try to take a short-lived lock.
+        
+        Args:
+            key: Redis key of the lock
+            timeout: Seconds after which the lock expires on its own
+            
+        Returns:
+            A token to pass to release_lock, or None if someone else holds the lock.
+            When Redis is unavailable an empty token is returned so callers proceed.
+        """
+        if not redis_client:
+            return ""
+        
+        token = uuid.uuid4().hex
+        try:
+            if redis_client.set(key, token, nx=True, ex=timeout):
+                return token
+            return None
+        except Exception as e:
+            current_app.logger.error(f"Redis lock error for key {key}: {e}")
+            return ""
+    
+    @staticmethod
+    def release_lock(key: str, token: Optional[str]) -> bool:
+        """Release a lock taken with acquire_lock, unless it has since passed to another holder."""
+        if not redis_client or not token:
+            return False
+        
+        try:
+            return bool(redis_client.eval(RedisCache.RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            current_app.logger.error(f"Redis unlock error for key {key}: {e}")
+            return False
     
     @staticmethod
     def delete(key: str) -> bool:
         """Delete a key from Redis."""
+        return RedisCache.delete_many([key])
+    
+    @staticmethod
+    def delete_many(keys: list) -> bool:
+        """Delete several keys with a single DEL."""
         if not redis_client:
             return False
+        if not keys:
+            return True
             
         try:
-            redis_client.delete(key)
+            redis_client.delete(*keys)
+            RedisCache._invalidate_local(keys)
             return True
         except Exception as e:
-            current_app.logger.error(f"Redis delete error for key {key}: {e}")
+            current_app.logger.error(f"Redis delete error for keys {keys}: {e}")
             return False
     
     @staticmethod
@@ -108,20 +650,108 @@ class RedisCache:
             current_app.logger.error(f"Redis expire error for key {key}: {e}")
             return False
 
+    @staticmethod
+    def scan_keys(pattern: str, limit: Optional[int] = None):
+        """
+        Iterate over keys matching a pattern with incremental SCAN.
+        
+        Unlike KEYS this never blocks the server for the whole keyspace; each
+        call examines about SCAN_BATCH_SIZE keys. A key may be yielded more than
+        once if the keyspace is rehashed mid-scan.
+        
+        Args:
+            pattern: Glob-style key pattern
+            limit: Stop after this many keys
+            
+        Yields:
+            str: Matching keys
+        """
+        if not redis_client:
+            return
+        
+        for count, key in enumerate(redis_client.scan_iter(match=pattern, count=RedisCache.SCAN_BATCH_SIZE)):
+            if limit is not None and count >= limit:
+                return
+            yield RedisCache.decode_key(key)
+    
+    @staticmethod
+    def count_keys(pattern: str, sample_limit: int = COUNT_SAMPLE_LIMIT, sample_size: int = 10) -> dict:
+        """
+        Count keys matching a pattern by walking the SCAN cursor.
+        
+        At most sample_limit keys are examined. If the cursor has not finished
+        by then, the count is extrapolated from the matching fraction of the
+        keys seen and DBSIZE, and 'exact' is False.
+        
+        Returns:
+            dict: count, exact, scanned and a few sample keys
+        """
+        result = {'count': 0, 'exact': True, 'scanned': 0, 'sample_keys': []}
+        if not redis_client:
+            return result
+        
+        try:
+            cursor = 0
+            matched = 0
+            while True:
+                # Match locally so the number of keys examined is known for extrapolation
+                cursor, keys = redis_client.scan(cursor=cursor, count=RedisCache.SCAN_BATCH_SIZE)
+                result['scanned'] += len(keys)
+                for key in keys:
+                    key = RedisCache.decode_key(key)
+                    if fnmatch.fnmatchcase(key, pattern):
+                        matched += 1
+                        if len(result['sample_keys']) < sample_size:
+                            result['sample_keys'].append(key)
+                
+                if int(cursor) == 0:
+                    result['count'] = matched
+                    break
+                if result['scanned'] >= sample_limit:
+                    result['exact'] = False
+                    result['count'] = round(matched / result['scanned'] * redis_client.dbsize())
+                    break
+            return result
+        except Exception as e:
+            current_app.logger.error(f"Redis count error for pattern {pattern}: {e}")
+            return result
+    
     @staticmethod
     def delete_pattern(pattern: str) -> int:
-        """Delete keys matching a pattern."""
+        """
+        Delete keys matching a pattern.
+        
+        Keys are found with SCAN and removed in pipelined UNLINK batches, so
+        the server reclaims memory in the background and is never blocked
+        for long.
+        """
         if not redis_client:
             return 0
             
         try:
-            keys = redis_client.keys(pattern)
-            if keys:
-                return redis_client.delete(*keys)
-            return 0
+            deleted = 0
+            batch = []
+            for key in RedisCache.scan_keys(pattern):
+                batch.append(key)
+                if len(batch) >= RedisCache.SCAN_BATCH_SIZE:
+                    deleted += RedisCache._unlink_batch(batch)
+                    batch = []
+            if batch:
+                deleted += RedisCache._unlink_batch(batch)
+            return deleted
         except Exception as e:
             current_app.logger.error(f"Redis delete pattern error for pattern {pattern}: {e}")
             return 0
+    
+    @staticmethod
+    def _unlink_batch(keys: list) -> int:
+        """UNLINK a batch of keys in one pipelined round trip."""
+        pipe = redis_client.pipeline(transaction=False)
+        for index in range(0, len(keys), 100):
+            pipe.unlink(*keys[index:index + 100])
+        deleted = sum(pipe.execute())
+        RedisCache._invalidate_local(keys)
+        return deleted
 
 class SessionCache:
     """Redis-based session management."""
@@ -234,6 +864,40 @@ class CacheDecorator:
 class PubSubManager:
     """Redis pub/sub for real-time features."""
     
+    @staticmethod
+    def subscribe(channel: str, handler, on_error=None):
+        """
+        Call handler with each decoded message published on a channel.
+        
+        Messages are consumed by a daemon thread of the current process. If the
+        connection drops, on_error is called before the thread reconnects, since
+        messages published in the meantime are lost.
+        
+        Returns:
+            The worker thread, or None if Redis is not available
+        """
+        if not redis_client:
+            return None
+        
+        def message_handler(message):
+            try:
+                handler(json.loads(message['data']))
+            except Exception:
+                pass
+        
+        def exception_handler(exception, pubsub, thread):
+            if on_error:
+                on_error()
+            time.sleep(1)
+        
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{channel: message_handler})
+            return pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=exception_handler)
+        except Exception as e:
+            current_app.logger.error(f"Pub/sub subscribe error for channel {channel}: {e}")
+            return None
+    
     @staticmethod
     def publish_notification(channel: str, message: dict) -> bool:
         """Publish a notification to a Redis channel."""
@@ -1,9 +1,15 @@
 import json
 import hashlib
+import inspect
+import threading
+import time
 from functools import wraps
-from flask import request, jsonify, current_app
+from urllib.parse import urlencode
+from flask import request, jsonify, current_app, g, Response, copy_current_request_context
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from utils.redis_utils import RedisCache
+from utils.metrics import MetricsBuffer
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 class RouteCacheManager:
@@ -12,21 +18,30 @@ class RouteCacheManager:
     # Cache configuration
     DEFAULT_TTL = 300  # 5 minutes
     CACHE_PREFIX = "route_cache:"
-    INVALIDATION_PREFIX = "cache_inv:"
+    VERSION_PREFIX = "cache_ver:"
+    LOCK_PREFIX = "route_lock:"
+    MAX_QUERY_KEY_LENGTH = 128
+    
+    # Single-flight recomputation
+    LOCK_TIMEOUT = 30  # Seconds before an abandoned lock expires
+    LOCK_WAIT = 2.0  # Seconds a request waits for another worker's result
+    LOCK_POLL_INTERVAL = 0.05
+    
+    # Patterns that invalidate deployment-wide data rather than per-user/per-project data
+    GLOBAL_PATTERNS = {'users'}
     
     # Cache TTL by route pattern (in seconds)
     CACHE_TTL_CONFIG = {
         'GET:/': 3600,  # Static content - 1 hour
-        'GET:/health': 60,  # Health checks - 1 minute
         'GET:/version': 3600,  # Version info - 1 hour
         'GET:/projects': 180,  # Project lists - 3 minutes
-        'GET:/projects/*/': 240,  # Project details - 4 minutes
+        'GET:/projects/*/': 900,  # Project details - 15 minutes
         'GET:/tasks': 120,  # Task lists - 2 minutes
         'GET:/notifications': 60,  # Notifications - 1 minute
         'GET:/profile': 300,  # Profile data - 5 minutes
         'GET:/auth/settings': 300,  # Settings - 5 minutes
         'GET:/users/search': 600,  # User search - 10 minutes
-        'GET:/projects/*/messages': 30,  # Messages - 30 seconds
+        'GET:/projects/*/messages': 300,  # Messages - 5 minutes
     }
     
     # Routes that should never be cached
@@ -49,22 +64,37 @@ class RouteCacheManager:
         return True
     
     @staticmethod
-    def get_cache_key(method, endpoint, args, user_id=None):
-        """Generate cache key for route"""
-        # Include user_id for user-specific data
-        user_part = f"user:{user_id}:" if user_id else "public:"
+    def normalize_query_args(args):
+        """Build a canonical, order-independent string from request query args"""
+        if not args:
+            return ""
         
-        # Create deterministic key from request data
-        cache_data = {
-            'method': method,
-            'endpoint': endpoint,
-            'args': sorted(args.items()) if args else [],
-        }
+        query_string = urlencode(sorted(args.items(multi=True)))
+        if len(query_string) > RouteCacheManager.MAX_QUERY_KEY_LENGTH:
+            return hashlib.md5(query_string.encode()).hexdigest()
+        return query_string
+    
+    @staticmethod
+    def compile_cache_key(func):
+        """
+        Compile a cache key builder for a view function
         
-        cache_string = json.dumps(cache_data, sort_keys=True)
-        cache_hash = hashlib.md5(cache_string.encode()).hexdigest()[:12]
+        Runs once when the decorator is applied. Keys look like
+        route_cache:<endpoint>:<view args>:<query args>:<identity>, so
+        /projects/1 and /projects/2 get separate entries.
+        """
+        endpoint = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        arg_names = tuple(inspect.signature(func).parameters)
+        view_template = ','.join(f"{name}={{}}" for name in arg_names)
+        prefix = f"{RouteCacheManager.CACHE_PREFIX}{endpoint}:"
         
-        return f"{RouteCacheManager.CACHE_PREFIX}{user_part}{cache_hash}"
+        def build_key(view_args, query_args, user_id=None):
+            view_part = view_template.format(*(view_args.get(name, '') for name in arg_names))
+            query_part = RouteCacheManager.normalize_query_args(query_args)
+            identity = f"user:{user_id}" if user_id else "public"
+            return f"{prefix}{view_part}:{query_part}:{identity}"
+        
+        return build_key
     
     @staticmethod
     def get_ttl_for_route(method, endpoint):
@@ -87,70 +117,358 @@ class RouteCacheManager:
         return RouteCacheManager.DEFAULT_TTL
     
     @staticmethod
-    def invalidate_related_cache(patterns):
-        """Invalidate cache entries matching patterns"""
+    def encode_entry(meta, body):
+        """Serialize an entry as a JSON metadata line followed by the raw response body"""
+        return json.dumps(meta, separators=(',', ':')).encode('utf-8') + b'\n' + body
+    
+    @staticmethod
+    def decode_entry(raw):
+        """
+        Split a stored entry back into its metadata, with the body bytes under 'body'
+        
+        Returns None for missing or unreadable entries, which are treated as misses.
+        """
+        if not isinstance(raw, bytes):
+            return None
+        header, separator, body = raw.partition(b'\n')
+        if not separator:
+            return None
         try:
-            if not isinstance(patterns, list):
-                patterns = [patterns]
-            
-            # Store invalidation timestamp for each pattern
-            invalidation_time = datetime.utcnow().isoformat()
-            
-            for pattern in patterns:
-                inv_key = f"{RouteCacheManager.INVALIDATION_PREFIX}{pattern}"
-                RedisCache.set(inv_key, invalidation_time, 86400)  # 24 hours
-            
-            current_app.logger.info(f"Cache invalidated for patterns: {patterns}")
-        except Exception as e:
-            current_app.logger.error(f"Cache invalidation error: {e}")
+            meta = json.loads(header)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(meta, dict):
+            return None
+        meta['body'] = body
+        return meta
+    
+    @staticmethod
+    def is_entry_current(cached_data, versions):
+        """Check that a cached entry was built from the current scope versions"""
+        return isinstance(cached_data, dict) and cached_data.get('versions') == versions
+    
+    @staticmethod
+    def compute_etag(body):
+        """Compute a strong ETag for a response body"""
+        return hashlib.sha1(body).hexdigest()
+    
+    @staticmethod
+    def not_modified(etag):
+        """Build an empty 304 response for a matching conditional GET"""
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    @staticmethod
+    def build_response(cached_data):
+        """Rebuild a Flask response from a cached entry, answering 304 if the client has it"""
+        etag = cached_data.get('etag')
+        if etag and request.if_none_match.contains_weak(etag):
+            return RouteCacheManager.not_modified(etag)
+        
+        CacheMetrics.record(request.endpoint, 'bytes_served', len(cached_data['body']))
+        # The body is served exactly as it was rendered; no JSON round trip on hits
+        response = Response(
+            cached_data['body'],
+            status=cached_data.get('status_code', 200),
+            mimetype=cached_data.get('mimetype', 'application/json')
+        )
+        if etag:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    @staticmethod
+    def apply_etag(result, etag):
+        """Tag a freshly computed view result, or replace it with a 304 if the client has it"""
+        if request.if_none_match.contains_weak(etag):
+            return RouteCacheManager.not_modified(etag)
+        
+        response_data = result[0] if isinstance(result, tuple) else result
+        if isinstance(response_data, Response):
+            response_data.set_etag(etag)
+            response_data.headers['Cache-Control'] = 'private, no-cache'
+        return result
+    
+    @staticmethod
+    def store_response(cache_key, result, versions, ttl, stale_ttl=0):
+        """
+        Cache a view result if it is a successful response
+        
+        The entry is stamped with the versions read before the view ran, so
+        writes that land while it was computing still invalidate it. It is
+        fresh for ttl seconds and kept for another stale_ttl seconds.
+        
+        Returns:
+            The entry's ETag, or None if the result was not cached
+        """
+        if isinstance(result, Response):
+            response_data, status_code = result, result.status_code
+        elif isinstance(result, tuple) and len(result) == 2:
+            response_data, status_code = result
+        else:
+            return None
+        
+        if not 200 <= status_code < 300:  # Only cache successful responses
+            return None
+        
+        if not isinstance(response_data, Response):
+            response_data = jsonify(response_data)
+        body = response_data.get_data()
+        etag = RouteCacheManager.compute_etag(body)
+        
+        meta = {
+            'status_code': status_code,
+            'mimetype': response_data.mimetype,
+            'etag': etag,
+            'versions': versions,
+            'fresh_until': time.time() + ttl,
+            'timestamp': datetime.utcnow().isoformat(),
+            'endpoint': request.endpoint
+        }
+        
+        if RedisCache.set_bytes(cache_key, RouteCacheManager.encode_entry(meta, body), ttl + stale_ttl):
+            CacheMetrics.record(request.endpoint, 'bytes_stored', len(body))
+        return etag
+    
+    @staticmethod
+    def wait_for_entry(cache_key, versions):
+        """Wait briefly for the worker holding the lock to store a current entry"""
+        deadline = time.time() + RouteCacheManager.LOCK_WAIT
+        while time.time() < deadline:
+            time.sleep(RouteCacheManager.LOCK_POLL_INTERVAL)
+            cached_data = RouteCacheManager.decode_entry(RedisCache.get_bytes(cache_key))
+            if RouteCacheManager.is_entry_current(cached_data, versions) and time.time() < cached_data.get('fresh_until', 0):
+                return cached_data
+        return None
     
     @staticmethod
-    def is_cache_valid(cache_key, cache_time):
-        """Check if cached data is still valid"""
+    def refresh_in_background(func, args, kwargs, cache_key, versions, ttl, stale_ttl):
+        """Recompute a stale entry in a background thread, unless another worker already is"""
+        lock_key = f"{RouteCacheManager.LOCK_PREFIX}{cache_key}"
+        lock_token = RedisCache.acquire_lock(lock_key, RouteCacheManager.LOCK_TIMEOUT)
+        if lock_token is None:
+            return
+        
+        @copy_current_request_context
+        def refresh():
+            try:
+                # The copied request context starts with an empty g, so reload the JWT
+                verify_jwt_in_request(optional=True)
+                result = func(*args, **kwargs)
+                RouteCacheManager.store_response(cache_key, result, versions, ttl, stale_ttl)
+            except Exception as e:
+                current_app.logger.error(f"Background cache refresh error for {cache_key}: {e}")
+            finally:
+                RedisCache.release_lock(lock_key, lock_token)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    @staticmethod
+    def get_version_key(scope):
+        """Get the Redis key holding the version counter for a scope"""
+        return f"{RouteCacheManager.VERSION_PREFIX}{scope}"
+    
+    @staticmethod
+    def get_route_scopes(user_id=None, view_args=None, invalidation_patterns=None):
+        """Get the version scopes a cached route response depends on"""
+        scopes = []
+        
+        if user_id:
+            scopes.append(f"user:{user_id}")
+        
+        if view_args and view_args.get('project_id') is not None:
+            scopes.append(f"project:{view_args['project_id']}")
+        
+        for pattern in invalidation_patterns or []:
+            scopes.append(f"global:{pattern}")
+        
+        return scopes
+    
+    @staticmethod
+    def get_project_member_ids(project_ids):
+        """Get IDs of all members of the given projects"""
+        from extensions import db
+        from models import Membership
+        
+        if not project_ids:
+            return set()
+        
+        rows = db.session.query(Membership.user_id).filter(
+            Membership.project_id.in_(list(project_ids))
+        ).all()
+        return {row.user_id for row in rows}
+    
+    @staticmethod
+    def touch_user(user_id):
+        """Mark a user's cached responses as stale once the current request succeeds"""
+        if user_id is not None:
+            g.setdefault('cache_touched_users', set()).add(int(user_id))
+    
+    @staticmethod
+    def touch_users(user_ids):
+        """Mark several users' cached responses as stale once the current request succeeds"""
+        for user_id in user_ids:
+            RouteCacheManager.touch_user(user_id)
+    
+    @staticmethod
+    def touch_project(project_id):
+        """Mark a project and all of its members' cached responses as stale once the current request succeeds"""
+        if project_id is not None:
+            g.setdefault('cache_touched_projects', set()).add(int(project_id))
+    
+    @staticmethod
+    def touch_user_projects(user_id):
+        """Mark every project a user belongs to as stale, e.g. after their name changes"""
+        from extensions import db
+        from models import Membership
+        
+        rows = db.session.query(Membership.project_id).filter(Membership.user_id == user_id).all()
+        for row in rows:
+            RouteCacheManager.touch_project(row.project_id)
+    
+    @staticmethod
+    def bump_versions(user_ids=None, project_ids=None, patterns=None):
+        """Bump the version counters of the given scopes in a single round trip"""
         try:
-            # Extract patterns that might invalidate this cache
-            patterns_to_check = []
+            user_ids = set(user_ids or [])
+            project_ids = set(project_ids or [])
+            patterns = patterns or []
             
-            if 'projects' in cache_key:
-                patterns_to_check.extend(['projects', 'memberships', 'tasks'])
-            if 'tasks' in cache_key:
-                patterns_to_check.extend(['tasks', 'projects'])
-            if 'profile' in cache_key:
-                patterns_to_check.extend(['users', 'profile'])
-            if 'notifications' in cache_key:
-                patterns_to_check.extend(['notifications'])
-            if 'users' in cache_key:
-                patterns_to_check.extend(['users'])
+            # Every member sees project data in their own lists and dashboards
+            user_ids |= RouteCacheManager.get_project_member_ids(project_ids)
             
-            # Check if any pattern has been invalidated after cache time
-            cache_timestamp = datetime.fromisoformat(cache_time)
+            scopes = [f"user:{user_id}" for user_id in sorted(user_ids)]
+            scopes += [f"project:{project_id}" for project_id in sorted(project_ids)]
+            scopes += [f"global:{pattern}" for pattern in patterns]
             
-            for pattern in patterns_to_check:
-                inv_key = f"{RouteCacheManager.INVALIDATION_PREFIX}{pattern}"
-                invalidation_time = RedisCache.get(inv_key)
-                
-                if invalidation_time:
-                    inv_timestamp = datetime.fromisoformat(invalidation_time)
-                    if inv_timestamp > cache_timestamp:
-                        return False
+            if not scopes:
+                return True
             
-            return True
+            version_keys = [RouteCacheManager.get_version_key(scope) for scope in scopes]
+            success = RedisCache.incr_many(version_keys)
+            current_app.logger.info(f"Cache versions bumped for scopes: {scopes}")
+            return success
         except Exception as e:
-            current_app.logger.error(f"Cache validation error: {e}")
+            current_app.logger.error(f"Cache version bump error: {e}")
             return False
+    
+    @staticmethod
+    def invalidate_related_cache(patterns):
+        """Invalidate cached responses that depend on the given global patterns"""
+        if not isinstance(patterns, list):
+            patterns = [patterns]
+        
+        return RouteCacheManager.bump_versions(patterns=patterns)
+    
+    @staticmethod
+    def invalidate_request_scopes(patterns=None, view_args=None):
+        """Bump the versions touched by the current request"""
+        user_ids = set(g.pop('cache_touched_users', set()))
+        project_ids = set(g.pop('cache_touched_projects', set()))
+        
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+            if user_id:
+                user_ids.add(int(user_id))
+        except Exception:
+            pass
+        
+        if view_args and view_args.get('project_id') is not None:
+            project_ids.add(int(view_args['project_id']))
+        
+        global_patterns = [
+            pattern for pattern in (patterns or [])
+            if pattern in RouteCacheManager.GLOBAL_PATTERNS
+        ]
+        
+        return RouteCacheManager.bump_versions(user_ids, project_ids, global_patterns)
+
+class CacheMetrics:
+    """
+    Per-endpoint route cache counters and time-to-serve histograms
+    
+    Each worker accumulates counts in memory and adds them to one Redis hash
+    per endpoint at most every FLUSH_INTERVAL seconds, so recording is just a
+    dict update and the totals are shared by all workers.
+    """
+    
+    METRICS_PREFIX = "cache_metrics:"
+    FLUSH_INTERVAL = 10  # seconds
+    COUNTERS = ('hits', 'misses', 'stale', 'invalidated', 'waits', 'bytes_stored', 'bytes_served')
+    # Upper bounds of the latency buckets in milliseconds; the last bucket is unbounded
+    LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+    
+    _buffer = MetricsBuffer('route cache', LATENCY_BUCKETS_MS, FLUSH_INTERVAL)
+    
+    @staticmethod
+    def get_metrics_key(endpoint):
+        return f"{CacheMetrics.METRICS_PREFIX}{endpoint}"
+    
+    @staticmethod
+    def record(endpoint, counter, amount=1):
+        """Add to one of an endpoint's counters"""
+        CacheMetrics._buffer.record(CacheMetrics.get_metrics_key(endpoint), counter, amount)
+    
+    @staticmethod
+    def observe(endpoint, outcome, started):
+        """Record the time to serve a 'hit', 'miss' or 'wait' (on another worker's recompute), measured from started (perf_counter)"""
+        CacheMetrics._buffer.observe(
+            CacheMetrics.get_metrics_key(endpoint), outcome, time.perf_counter() - started
+        )
+    
+    @staticmethod
+    def flush():
+        """Add this worker's pending counts to the shared Redis hashes"""
+        CacheMetrics._buffer.flush()
+    
+    @staticmethod
+    def get_stats():
+        """Get aggregated metrics for every endpoint, including this worker's unflushed counts"""
+        CacheMetrics.flush()
+        keys = list(RedisCache.scan_keys(f"{CacheMetrics.METRICS_PREFIX}*"))
+        stats = {}
+        for key, fields in RedisCache.get_hashes(keys).items():
+            endpoint = key[len(CacheMetrics.METRICS_PREFIX):]
+            counts = {counter: int(fields.get(counter, 0)) for counter in CacheMetrics.COUNTERS}
+            lookups = counts['hits'] + counts['misses'] + counts['stale']
+            counts['hit_ratio'] = round((counts['hits'] + counts['stale']) / lookups, 3) if lookups else None
+            counts['latency_ms'] = {
+                outcome: CacheMetrics._buffer.build_histogram(fields, outcome) for outcome in ('hit', 'miss', 'wait')
+            }
+            stats[endpoint] = counts
+        return stats
+    
+    @staticmethod
+    def reset():
+        """Drop all recorded metrics"""
+        CacheMetrics._buffer.discard()
+        return RedisCache.delete_pattern(f"{CacheMetrics.METRICS_PREFIX}*")
 
-def cache_route(ttl=None, user_specific=True, invalidation_patterns=None):
+def cache_route(ttl=None, user_specific=True, invalidation_patterns=None, stale_ttl=0):
     """
-    Route caching decorator with automatic invalidation
+    Route caching decorator with version-based invalidation
+    
+    Only one worker recomputes an expired entry at a time; concurrent
+    requests for the same key wait briefly for its result. Cached responses
+    carry an ETag, and a matching If-None-Match is answered with 304 Not
+    Modified straight from the cache entry.
     
     Args:
         ttl: Cache time-to-live in seconds (auto-determined if None)
         user_specific: Whether to include user ID in cache key
-        invalidation_patterns: List of patterns that invalidate this cache
+        invalidation_patterns: Global patterns (e.g. 'users') whose invalidation drops this cache
+        stale_ttl: Seconds an expired entry may still be served while one worker
+            refreshes it in the background (entries invalidated by a write are never served)
     """
     def decorator(func):
+        build_key = RouteCacheManager.compile_cache_key(func)
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
+            started = time.perf_counter()
             try:
                 method = request.method
                 endpoint = request.endpoint or request.path
@@ -167,85 +485,230 @@ def cache_route(ttl=None, user_specific=True, invalidation_patterns=None):
                         user_id = get_jwt_identity()
                     except:
                         pass
+                    if user_id and not request.environ.get(CacheWarmer.WARMING_ENVIRON_KEY):
+                        CacheWarmer.record_activity(user_id)
                 
-                # Generate cache key
-                request_args = request.args.to_dict()
-                cache_key = RouteCacheManager.get_cache_key(method, endpoint, request_args, user_id)
+                cache_key = build_key(kwargs, request.args, user_id)
+                cache_ttl = ttl or RouteCacheManager.get_ttl_for_route(method, endpoint)
                 
-                # Try to get cached response
-                cached_data = RedisCache.get(cache_key)
-                if cached_data and isinstance(cached_data, dict):
-                    cache_time = cached_data.get('timestamp')
-                    if cache_time and RouteCacheManager.is_cache_valid(cache_key, cache_time):
+                # Fetch the entry and the current versions of its scopes in one round trip
+                scopes = RouteCacheManager.get_route_scopes(user_id, kwargs, invalidation_patterns)
+                version_keys = [RouteCacheManager.get_version_key(scope) for scope in scopes]
+                cached_data, *versions = RedisCache.get_many([cache_key] + version_keys, raw=True)
+                cached_data = RouteCacheManager.decode_entry(cached_data)
+                versions = [int(version or 0) for version in versions]
+                
+                if RouteCacheManager.is_entry_current(cached_data, versions):
+                    if time.time() < cached_data.get('fresh_until', 0):
                         current_app.logger.debug(f"Cache hit for {method} {endpoint}")
-                        return jsonify(cached_data['response']), cached_data.get('status_code', 200)
+                        CacheMetrics.record(endpoint, 'hits')
+                        response = RouteCacheManager.build_response(cached_data)
+                        CacheMetrics.observe(endpoint, 'hit', started)
+                        return response
+                    
+                    if stale_ttl:
+                        current_app.logger.debug(f"Serving stale cache for {method} {endpoint}")
+                        CacheMetrics.record(endpoint, 'stale')
+                        RouteCacheManager.refresh_in_background(
+                            func, args, kwargs, cache_key, versions, cache_ttl, stale_ttl
+                        )
+                        response = RouteCacheManager.build_response(cached_data)
+                        CacheMetrics.observe(endpoint, 'hit', started)
+                        return response
+                elif cached_data:
+                    # An entry exists but a write has bumped one of its scopes since
+                    CacheMetrics.record(endpoint, 'invalidated')
                 
+                # Single flight: one worker recomputes, the others wait for its result
+                lock_key = f"{RouteCacheManager.LOCK_PREFIX}{cache_key}"
+                lock_token = RedisCache.acquire_lock(lock_key, RouteCacheManager.LOCK_TIMEOUT)
+                if lock_token is None:
+                    cached_data = RouteCacheManager.wait_for_entry(cache_key, versions)
+                    if cached_data:
+                        CacheMetrics.record(endpoint, 'waits')
+                        response = RouteCacheManager.build_response(cached_data)
+                        CacheMetrics.observe(endpoint, 'wait', started)
+                        return response
+            except Exception as e:
+                current_app.logger.error(f"Route cache error: {e}")
+                return func(*args, **kwargs)
+            
+            try:
                 # Execute original function
                 result = func(*args, **kwargs)
+                CacheMetrics.record(endpoint, 'misses')
+                CacheMetrics.observe(endpoint, 'miss', started)
                 
-                # Cache successful responses
-                if hasattr(result, '__iter__') and len(result) == 2:
-                    response_data, status_code = result
-                    if 200 <= status_code < 300:  # Only cache successful responses
-                        cache_ttl = ttl or RouteCacheManager.get_ttl_for_route(method, endpoint)
-                        
-                        cache_value = {
-                            'response': response_data.get_json() if hasattr(response_data, 'get_json') else response_data,
-                            'status_code': status_code,
-                            'timestamp': datetime.utcnow().isoformat(),
-                            'endpoint': endpoint
-                        }
-                        
-                        RedisCache.set(cache_key, cache_value, cache_ttl)
+                try:
+                    etag = RouteCacheManager.store_response(cache_key, result, versions, cache_ttl, stale_ttl)
+                    if etag:
                         current_app.logger.debug(f"Cached response for {method} {endpoint} (TTL: {cache_ttl}s)")
+                        result = RouteCacheManager.apply_etag(result, etag)
+                except Exception as e:
+                    current_app.logger.error(f"Route cache store error: {e}")
                 
                 return result
-                
-            except Exception as e:
-                current_app.logger.error(f"Route cache error: {e}")
-                # Always execute original function on cache errors
-                return func(*args, **kwargs)
+            finally:
+                RedisCache.release_lock(lock_key, lock_token)
         
         return wrapper
     return decorator
 
 def invalidate_cache_on_change(patterns):
-    """Decorator to invalidate cache after data modifications"""
+    """
+    Decorator to invalidate cache after data modifications
+    
+    Bumps the versions of the current user, the project in the URL (and its
+    members) and anything touched via RouteCacheManager.touch_* during the
+    request. Patterns listed in RouteCacheManager.GLOBAL_PATTERNS are bumped too.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            
             try:
-                result = func(*args, **kwargs)
-                
                 # Only invalidate on successful modifications
-                if hasattr(result, '__iter__') and len(result) == 2:
+                if isinstance(result, tuple) and len(result) == 2:
                     response_data, status_code = result
                     if 200 <= status_code < 300:
-                        RouteCacheManager.invalidate_related_cache(patterns)
+                        RouteCacheManager.invalidate_request_scopes(patterns, kwargs)
                 else:
                     # Handle single return value
-                    RouteCacheManager.invalidate_related_cache(patterns)
-                
-                return result
-                
+                    RouteCacheManager.invalidate_request_scopes(patterns, kwargs)
             except Exception as e:
                 current_app.logger.error(f"Cache invalidation decorator error: {e}")
-                return func(*args, **kwargs)
+            
+            return result
         
         return wrapper
     return decorator
 
 class CacheWarmer:
-    """Utility to warm up frequently accessed caches"""
+    """
+    Pre-populates route cache entries for recently active users
+    
+    Users seen by cached routes are recorded in a sorted set scored by the
+    time they were last seen (batched per worker like CacheMetrics). Warming
+    replays WARM_PATHS for the most recent of them through the app's own test
+    client, so entries are built by exactly the same code as real requests.
+    """
+    
+    ACTIVE_USERS_KEY = "cache_warm:active_users"
+    LOCK_KEY = "cache_warm:lock"
+    WARMING_ENVIRON_KEY = "cache_warm.warming"
+    ACTIVITY_FLUSH_INTERVAL = 30  # seconds
+    WARM_PATHS = ('/dashboard/overview', '/projects', '/profile')
+    
+    _activity = {}
+    _activity_lock = threading.Lock()
+    _last_activity_flush = time.time()
+    
+    @staticmethod
+    def record_activity(user_id):
+        """Note that a user was just active"""
+        with CacheWarmer._activity_lock:
+            CacheWarmer._activity[str(user_id)] = time.time()
+            if time.time() - CacheWarmer._last_activity_flush < CacheWarmer.ACTIVITY_FLUSH_INTERVAL:
+                return
+            activity, CacheWarmer._activity = CacheWarmer._activity, {}
+            CacheWarmer._last_activity_flush = time.time()
+        
+        window = current_app.config.get('CACHE_WARM_ACTIVE_WINDOW', 7 * 24 * 3600)
+        RedisCache.zadd_many(CacheWarmer.ACTIVE_USERS_KEY, activity, min_score=time.time() - window)
+    
+    @staticmethod
+    def get_active_users(limit):
+        """Get the ids of the most recently active users, newest first"""
+        window = current_app.config.get('CACHE_WARM_ACTIVE_WINDOW', 7 * 24 * 3600)
+        with CacheWarmer._activity_lock:
+            pending = sorted(CacheWarmer._activity, key=CacheWarmer._activity.get, reverse=True)
+        user_ids = pending + RedisCache.zrange_latest(CacheWarmer.ACTIVE_USERS_KEY, time.time() - window, limit)
+        return [int(user_id) for user_id in dict.fromkeys(user_ids)][:limit]
     
     @staticmethod
-    def warm_common_routes():
-        """Warm up cache for common routes"""
+    def warm_common_routes(user_ids=None, max_users=None, time_budget=None, background=True):
+        """
+        Warm the dashboard, project list and profile entries of active users
+        
+        Only one worker warms at a time. Users are processed concurrently by at
+        most CACHE_WARM_CONCURRENCY threads; users not reached within the time
+        budget are skipped.
+        
+        Args:
+            user_ids: Users to warm (defaults to the most recently active ones)
+            max_users: Cap on the number of active users (CACHE_WARM_MAX_USERS)
+            time_budget: Seconds to spend before giving up (CACHE_WARM_TIME_BUDGET)
+            background: Run in a background thread and return immediately
+            
+        Returns:
+            dict: Summary of the run, or of the started run when in the background
+        """
         try:
-            # This would be called during app startup
-            current_app.logger.info("Cache warming completed for common routes")
+            app = current_app._get_current_object()
+            config = app.config
+            if user_ids is None:
+                user_ids = CacheWarmer.get_active_users(max_users or config.get('CACHE_WARM_MAX_USERS', 200))
+            time_budget = time_budget or config.get('CACHE_WARM_TIME_BUDGET', 60)
+            
+            lock_token = RedisCache.acquire_lock(CacheWarmer.LOCK_KEY, int(time_budget) + 30)
+            if lock_token is None:
+                current_app.logger.info("Cache warming already running in another worker")
+                return {'started': False, 'users': 0}
+            
+            def run():
+                with app.app_context():
+                    try:
+                        return CacheWarmer.warm_users(app, user_ids, time_budget)
+                    finally:
+                        RedisCache.release_lock(CacheWarmer.LOCK_KEY, lock_token)
+            
+            if background:
+                threading.Thread(target=run, daemon=True).start()
+                return {'started': True, 'users': len(user_ids)}
+            return dict(run(), started=True)
         except Exception as e:
             current_app.logger.error(f"Cache warming error: {e}")
+            return {'started': False, 'users': 0}
+    
+    @staticmethod
+    def warm_users(app, user_ids, time_budget):
+        """Request WARM_PATHS for each user with bounded concurrency and a deadline"""
+        from flask_jwt_extended import create_access_token
+        
+        deadline = time.time() + time_budget
+        concurrency = max(1, app.config.get('CACHE_WARM_CONCURRENCY', 4))
+        
+        def warm_user(user_id):
+            if time.time() >= deadline:
+                return 0
+            with app.app_context():
+                token = create_access_token(identity=str(user_id), expires_delta=timedelta(minutes=5))
+            client = app.test_client()
+            warmed = 0
+            for path in CacheWarmer.WARM_PATHS:
+                if time.time() >= deadline:
+                    break
+                response = client.get(
+                    path,
+                    headers={'Authorization': f'Bearer {token}'},
+                    environ_overrides={CacheWarmer.WARMING_ENVIRON_KEY: True}
+                )
+                warmed += response.status_code == 200
+            return warmed
+        
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(warm_user, user_ids))
+        
+        summary = {
+            'users': sum(1 for warmed in results if warmed),
+            'entries': sum(results),
+            'skipped': sum(1 for warmed in results if not warmed),
+            'seconds': round(time.time() - started, 2)
+        }
+        app.logger.info(f"Cache warming completed: {summary}")
+        return summary
     
     @staticmethod
     def get_cache_stats():
@@ -255,7 +718,8 @@ class CacheWarmer:
             return {
                 'cache_enabled': True,
                 'default_ttl': RouteCacheManager.DEFAULT_TTL,
-                'total_patterns': len(RouteCacheManager.CACHE_TTL_CONFIG)
+                'total_patterns': len(RouteCacheManager.CACHE_TTL_CONFIG),
+                'endpoints': CacheMetrics.get_stats()
             }
         except Exception as e:
             current_app.logger.error(f"Cache stats error: {e}")
@@ -267,10 +731,9 @@ def clear_all_route_cache():
         # Clear route cache entries
         deleted_count = RedisCache.delete_pattern(f"{RouteCacheManager.CACHE_PREFIX}*")
         
-        # Clear invalidation entries
-        inv_deleted = RedisCache.delete_pattern(f"{RouteCacheManager.INVALIDATION_PREFIX}*")
-        
-        current_app.logger.info(f"Route cache cleared: {deleted_count} cache entries, {inv_deleted} invalidation entries")
+        # Version counters are kept: resetting them could revalidate entries
+        # written by other workers while the clear was running
+        current_app.logger.info(f"Route cache cleared: {deleted_count} cache entries")
         return True
     except Exception as e:
         current_app.logger.error(f"Clear cache error: {e}")
@@ -0,0 +1,666 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from flask import current_app
+from sqlalchemy import event, inspect
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; every worker may then rebuild
+    fcntl = None
+
+class _SortedStrings:
+    """Read-only sequence of byte strings stored back to back, addressed by an offsets array."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+class _RecordKeys:
+    """Sort keys of the indexed users, in ordinal order, for bisecting."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.size
+
+    def __getitem__(self, ordinal):
+        user_id, username = json.loads(self.index.records[ordinal])[:2]
+        return ((username or '').lower(), user_id)
+
+class MappedUserIndex:
+    """
+    Prefix and trigram index over all users, read from a memory-mapped file
+
+    Users are numbered by their position in (lower(username), id) order, so
+    sorting matches by ordinal sorts them alphabetically. The file holds:
+    - records: [id, username, email, full_name, profile_picture] as JSON
+    - texts: lowercased "username\\nemail\\nfull_name\\0", for substring checks
+    - terms: sorted lowercased usernames, emails, full names and name words,
+      each with the user it belongs to, for prefix lookups
+    - trigrams: sorted byte trigrams of every text with their posting lists
+    - ids: user ids in ascending order with their ordinals, to find changed users
+
+    Users changed since the file was built are passed to search() as an
+    overlay: their indexed entries are skipped and the overlay's current
+    records are matched and merged in by rank instead.
+
+    All arrays are zero-copy views into the shared mapping, so each worker
+    only pays for the pages it actually touches.
+    """
+
+    MAGIC = b'UIDX0002'
+    # magic, source version, then counts of users, terms, trigrams and postings
+    HEADER = struct.Struct('<8sQIIII')
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+
+        magic, self.version, n_users, n_terms, n_trigrams, n_postings = self.HEADER.unpack_from(self.mm, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"Not a user index file: {path}")
+        self.size = n_users
+
+        view = memoryview(self.mm)
+        position = self.HEADER.size
+
+        def take_ints(count):
+            nonlocal position
+            section = view[position:position + count * 4].cast('I')
+            position += count * 4
+            return section
+
+        def take_bytes(length):
+            nonlocal position
+            section = view[position:position + length]
+            position += (length + 3) & ~3  # Keep the next section 4-byte aligned
+            return section
+
+        record_offsets = take_ints(n_users + 1)
+        text_offsets = take_ints(n_users + 1)
+        term_offsets = take_ints(n_terms + 1)
+        self.term_users = take_ints(n_terms)
+        self.trigram_keys = take_ints(n_trigrams)
+        self.posting_offsets = take_ints(n_trigrams + 1)
+        self.postings = take_ints(n_postings)
+        self.sorted_ids = take_ints(n_users)
+        self.id_ordinals = take_ints(n_users)
+        self.records = _SortedStrings(take_bytes(record_offsets[-1]), record_offsets)
+        # Texts are searched with mmap.find, which needs absolute positions
+        self.texts_start = position
+        self.texts_end = position + text_offsets[-1]
+        take_bytes(text_offsets[-1])
+        self.text_offsets = text_offsets
+        self.terms = _SortedStrings(take_bytes(term_offsets[-1]), term_offsets)
+
+    @staticmethod
+    def trigram_keys_for(text):
+        return {int.from_bytes(text[i:i + 3], 'big') for i in range(len(text) - 2)}
+
+    def text(self, ordinal):
+        return self.mm[self.texts_start + self.text_offsets[ordinal]:self.texts_start + self.text_offsets[ordinal + 1]]
+
+    def prefix_matches(self, query):
+        """Users with a username, email, full name or name word starting with query"""
+        low = bisect.bisect_left(self.terms, query)
+        high = bisect.bisect_left(self.terms, query + b'\xff', low)  # No UTF-8 byte is 0xff
+        return {self.term_users[index] for index in range(low, high)}
+
+    def scan_matches(self, query, exclude, needed):
+        """
+        Find up to needed users containing query, in ordinal order, by scanning the texts
+
+        Used for queries too short for trigrams. mmap.find runs at C speed and
+        the scan jumps to the next user after each hit, so it stops early for
+        common queries and only rare ones walk the whole blob.
+
+        Returns:
+            tuple: (ordinals, whether the scan reached the end)
+        """
+        matches = []
+        position = self.mm.find(query, self.texts_start, self.texts_end)
+        while position != -1:
+            if len(matches) >= needed:
+                return matches, False
+            ordinal = bisect.bisect_right(self.text_offsets, position - self.texts_start) - 1
+            if ordinal not in exclude:
+                matches.append(ordinal)
+            next_text = self.texts_start + self.text_offsets[ordinal + 1]
+            position = self.mm.find(query, next_text, self.texts_end)
+        return matches, True
+
+    def first_ordinals(self, exclude, needed):
+        """The first needed ordinals not in exclude, and whether that reached the end"""
+        matches = []
+        for ordinal in range(self.size):
+            if len(matches) >= needed:
+                return matches, False
+            if ordinal not in exclude:
+                matches.append(ordinal)
+        return matches, True
+
+    def substring_matches(self, query):
+        """Users whose username, email or full name contains query (at least 3 bytes)"""
+        postings = []
+        for key in self.trigram_keys_for(query):
+            index = bisect.bisect_left(self.trigram_keys, key)
+            if index == len(self.trigram_keys) or self.trigram_keys[index] != key:
+                return set()
+            postings.append(self.postings[self.posting_offsets[index]:self.posting_offsets[index + 1]])
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return candidates
+        # Trigrams can match out of order; confirm the actual substring
+        return {ordinal for ordinal in candidates if query in self.text(ordinal)}
+
+    def ordinal_of(self, user_id):
+        index = bisect.bisect_left(self.sorted_ids, user_id)
+        if index < self.size and self.sorted_ids[index] == user_id:
+            return self.id_ordinals[index]
+        return None
+
+    @staticmethod
+    def match_record(query, record):
+        """Match a record outside the index: 'prefix', 'substring' or None"""
+        fields = [(value or '').lower() for value in record[1:4]]
+        if any(term.startswith(query) for term in fields + fields[2].split()):
+            return 'prefix'
+        if query in '\n'.join(fields):
+            return 'substring'
+        return None
+
+    def merge(self, ordinals, exhausted, records):
+        """
+        Merge overlay records into a tier of indexed ordinals, alphabetically
+
+        A record sorts just before the indexed user at its rank. If the tier is
+        only a prefix of the full match list, records ranked past its end are
+        left out, since unscanned users might come before them.
+        """
+        keys = _RecordKeys(self)
+        boundary = self.size if exhausted else (ordinals[-1] if ordinals else -1)
+        items = [((ordinal, '', 0), ordinal) for ordinal in ordinals]
+        for record in records:
+            key = ((record[1] or '').lower(), record[0])
+            rank = bisect.bisect_left(keys, key)
+            if rank <= boundary:
+                items.append(((rank - 0.5,) + key, record))
+        items.sort(key=lambda item: item[0])
+        return [item for _, item in items]
+
+    def search(self, search_query, limit, offset, overlay=None):
+        """
+        Rank prefix matches above substring matches, alphabetically within each
+
+        Args:
+            overlay: {user_id: (id, username, email, full_name, profile_picture) or None}
+                for users changed (or deleted) since the index was built
+        """
+        overlay = overlay or {}
+        excluded = {self.ordinal_of(user_id) for user_id in overlay} - {None}
+        records = [record for record in overlay.values() if record]
+        query_text = search_query.strip().lower()
+        query = query_text.encode('utf-8')
+        needed = offset + limit + 1
+
+        if not query:
+            ordinals, exhausted = self.first_ordinals(excluded, needed)
+            ranked = self.merge(ordinals, exhausted, records)
+            total = self.size - len(excluded) + len(records)
+        else:
+            record_tiers = {'prefix': [], 'substring': []}
+            for record in records:
+                tier = self.match_record(query_text, record)
+                if tier:
+                    record_tiers[tier].append(record)
+
+            prefix = self.prefix_matches(query) - excluded
+            ranked = self.merge(sorted(prefix), True, record_tiers['prefix'])
+            if len(query) >= 3:
+                substring = self.substring_matches(query) - prefix - excluded
+                ranked += self.merge(sorted(substring), True, record_tiers['substring'])
+                total = len(ranked)
+            else:
+                # Counting every match of a one or two character query would mean a
+                # full scan, so only find enough substring matches to fill this page
+                remaining = needed - len(ranked)
+                substring, exhausted = (
+                    self.scan_matches(query, prefix | excluded, remaining) if remaining > 0 else ([], False)
+                )
+                ranked += self.merge(substring, exhausted, record_tiers['substring'])
+                total = None
+
+        page = ranked[offset:offset + limit]
+        users = []
+        for item in page:
+            record = json.loads(self.records[item]) if isinstance(item, int) else item
+            user_id, username, email, full_name, profile_picture = record
+            users.append({
+                'id': user_id,
+                'username': username,
+                'email': email,
+                'full_name': full_name or username,
+                'profile_picture': profile_picture
+            })
+
+        return {
+            'users': users,
+            'has_more': offset + len(page) < total if total is not None else len(ranked) > offset + limit,
+            'total_count': total if offset == 0 else None
+        }
+
+    @staticmethod
+    def write(path, users, version):
+        """
+        Build an index file from (id, username, email, full_name, profile_picture) rows
+
+        The file is written next to path and moved into place atomically, so
+        readers always see either the old or the new index.
+        """
+        users = sorted(users, key=lambda user: ((user[1] or '').lower(), user[0]))
+
+        records = [json.dumps(list(user), separators=(',', ':')).encode('utf-8') for user in users]
+        texts = []
+        terms = []
+        trigram_users = {}
+        for ordinal, (user_id, username, email, full_name, _) in enumerate(users):
+            fields = [(value or '').lower() for value in (username, email, full_name)]
+            # NUL-terminated so a blob-wide find can't match across two users
+            texts.append('\n'.join(fields).encode('utf-8') + b'\0')
+
+            user_terms = set(fields) | set(fields[2].split())
+            user_terms.discard('')
+            terms.extend((term.encode('utf-8'), ordinal) for term in user_terms)
+
+            keys = set()
+            for field in fields:
+                keys |= MappedUserIndex.trigram_keys_for(field.encode('utf-8'))
+            for key in keys:
+                trigram_users.setdefault(key, array('I')).append(ordinal)
+        terms.sort()
+
+        def offsets_of(chunks):
+            offsets = array('I', [0])
+            for chunk in chunks:
+                offsets.append(offsets[-1] + len(chunk))
+            return offsets
+
+        def padded(blob):
+            return blob + b'\0' * (-len(blob) % 4)
+
+        trigram_keys = array('I', sorted(trigram_users))
+        posting_offsets = array('I', [0])
+        postings = array('I')
+        for key in trigram_keys:
+            postings.extend(trigram_users[key])  # Ordinals were appended in increasing order
+            posting_offsets.append(len(postings))
+        term_blobs = [term for term, _ in terms]
+        id_order = sorted(range(len(users)), key=lambda ordinal: users[ordinal][0])
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix='.user_index.', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MappedUserIndex.HEADER.pack(
+                    MappedUserIndex.MAGIC, version, len(users), len(terms), len(trigram_keys), len(postings)
+                ))
+                for section in (
+                    offsets_of(records), offsets_of(texts), offsets_of(term_blobs),
+                    array('I', [ordinal for _, ordinal in terms]),
+                    trigram_keys, posting_offsets, postings,
+                    array('I', [users[ordinal][0] for ordinal in id_order]), array('I', id_order)
+                ):
+                    f.write(section.tobytes())
+                for blob in (b''.join(records), b''.join(texts), b''.join(term_blobs)):
+                    f.write(padded(blob))
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+class UserIndex:
+    """
+    Per-worker access to the shared user search index
+
+    The index file is built by one worker per host at a time and replaced
+    atomically. Every worker checks the file at most once per
+    RELOAD_CHECK_INTERVAL and remaps it when it changed.
+
+    Committed User changes are not applied by rebuilding. After each commit
+    the changed users' records are appended, in one atomic script, to a
+    change log in Redis (a sorted set scored by a version counter). Searches
+    apply the changes newer than the file as an overlay, re-read only when
+    the version moves. The file is rebuilt in the background once the
+    overlay grows past MAX_OVERLAY changes, or when a full rebuild is
+    requested. While a rebuild is required, search returns None so the
+    caller can query the database.
+    """
+
+    CHANGES_KEY = "user_index:changes"
+    # Version counters live under the L1 prefix so unchanged versions are read locally
+    VERSION_KEY = "cache_ver:user_index"
+    PRUNED_KEY = "cache_ver:user_index_pruned"
+    MAX_OVERLAY = 1000  # changes applied on top of the file before it is rebuilt
+    KEEP_CHANGES = 2 * MAX_OVERLAY  # changes kept in Redis for hosts whose file is older
+    INDEXED_FIELDS = ('username', 'email', 'full_name', 'profile_picture')
+    RELOAD_CHECK_INTERVAL = 1.0  # seconds
+    REBUILD_RETRY_INTERVAL = 5.0  # seconds between rebuild attempts in one worker
+
+    # Bumps the version, logs the changes under it and trims the oldest ones,
+    # remembering the newest trimmed version so older files know to rebuild
+    RECORD_CHANGES_SCRIPT = """
+        local version = redis.call('incr', KEYS[1])
+        for i = 1, #ARGV - 1 do
+            redis.call('zadd', KEYS[2], version, ARGV[i])
+        end
+        local keep = tonumber(ARGV[#ARGV])
+        local count = redis.call('zcard', KEYS[2])
+        if count > keep then
+            local cut = redis.call('zrange', KEYS[2], count - keep - 1, count - keep - 1, 'WITHSCORES')[2]
+            redis.call('zremrangebyscore', KEYS[2], '-inf', cut)
+            redis.call('set', KEYS[3], cut)
+        end
+        return version
+    """
+
+    _index = None
+    _lock = threading.Lock()
+    _last_check = 0.0
+    _rebuilding = False
+    _last_rebuild_attempt = 0.0
+    # (file version, log version, overlay, rebuild required) of the last overlay read
+    _overlay = (None, None, {}, False)
+
+    @staticmethod
+    def get_path():
+        return current_app.config.get('USER_INDEX_PATH') or os.path.join(
+            tempfile.gettempdir(), 'user_search_index.bin'
+        )
+
+    @staticmethod
+    def get_versions():
+        """Current change log version and the newest version trimmed from the log"""
+        from utils.redis_utils import RedisCache
+        version, pruned = RedisCache.get_many([UserIndex.VERSION_KEY, UserIndex.PRUNED_KEY], 0)
+        return int(version or 0), int(float(pruned or 0))
+
+    @staticmethod
+    def current():
+        """The mapped index, remapped if another worker replaced the file"""
+        now = time.time()
+        if UserIndex._index is not None and now - UserIndex._last_check < UserIndex.RELOAD_CHECK_INTERVAL:
+            return UserIndex._index
+
+        with UserIndex._lock:
+            UserIndex._last_check = now
+            path = UserIndex.get_path()
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                UserIndex._index = None
+                return None
+
+            index = UserIndex._index
+            if index is None or index.identity != (stat.st_ino, stat.st_mtime_ns):
+                try:
+                    # The old mapping is released once no search is using it
+                    UserIndex._index = MappedUserIndex(path)
+                except Exception as e:
+                    current_app.logger.error(f"User index load error: {e}")
+                    UserIndex._index = None
+            return UserIndex._index
+
+    @staticmethod
+    def get_overlay(base_version, version):
+        """
+        Changes logged after base_version, as {user_id: record or None}
+
+        Returns:
+            tuple: (overlay, whether a full rebuild was requested)
+        """
+        cached_base, cached_version, overlay, rebuild_required = UserIndex._overlay
+        if (cached_base, cached_version) == (base_version, version):
+            return overlay, rebuild_required
+
+        overlay = {}
+        rebuild_required = False
+        if version > base_version:
+            from utils.redis_utils import RedisCache
+            # Lowest version first, so the latest change to a user wins
+            for member, _ in RedisCache.zrange_after(UserIndex.CHANGES_KEY, base_version):
+                change = json.loads(member)
+                if change.get('rebuild'):
+                    rebuild_required = True
+                else:
+                    overlay[change['id']] = tuple(change['record']) if change['record'] else None
+
+        UserIndex._overlay = (base_version, version, overlay, rebuild_required)
+        return overlay, rebuild_required
+
+    @staticmethod
+    def search(search_query='', limit=20, offset=0):
+        """
+        Search users with the shared index
+
+        Returns:
+            dict: users, has_more and total_count like UserService.search_users,
+            or None if the index is disabled, missing or must be rebuilt
+        """
+        if not current_app.config.get('USER_INDEX_ENABLED', True):
+            return None
+        # Negative values would turn into slices from the end
+        limit, offset = max(int(limit), 1), max(int(offset), 0)
+
+        from extensions import redis_client
+        if not redis_client:
+            # Changes cannot be tracked without Redis, so the file may be stale
+            return None
+
+        try:
+            index = UserIndex.current()
+            version, pruned = UserIndex.get_versions()
+            if index is None or not pruned <= index.version <= version:
+                # Missing, older than the changes still in the log, or built
+                # against a change log that has since been reset
+                UserIndex.schedule_rebuild()
+                return None
+
+            overlay, rebuild_required = UserIndex.get_overlay(index.version, version)
+            if rebuild_required or len(overlay) > UserIndex.MAX_OVERLAY:
+                UserIndex.schedule_rebuild()
+                if rebuild_required:
+                    return None
+            return index.search(search_query, limit, offset, overlay)
+        except Exception as e:
+            current_app.logger.error(f"User index search error: {e}")
+            return None
+
+    @staticmethod
+    def is_current():
+        """Whether this host's file can serve searches without a rebuild"""
+        index = UserIndex.current()
+        if index is None:
+            return False
+        version, pruned = UserIndex.get_versions()
+        _, rebuild_required = UserIndex.get_overlay(index.version, version)
+        return pruned <= index.version <= version and not rebuild_required
+
+    @staticmethod
+    def record_changes(changes):
+        """
+        Log committed user changes for every worker to apply
+
+        Args:
+            changes: {user_id: (id, username, email, full_name, profile_picture) or None if deleted}
+        """
+        from utils.redis_utils import RedisCache
+        # A nonce keeps identical changes distinct members of the log
+        members = [
+            json.dumps({'id': user_id, 'record': record, 'nonce': os.urandom(4).hex()})
+            for user_id, record in changes.items()
+        ]
+        RedisCache.run_script(
+            UserIndex.RECORD_CHANGES_SCRIPT,
+            [UserIndex.VERSION_KEY, UserIndex.CHANGES_KEY, UserIndex.PRUNED_KEY],
+            members + [UserIndex.KEEP_CHANGES],
+            invalidates=[UserIndex.VERSION_KEY, UserIndex.PRUNED_KEY]
+        )
+
+    @staticmethod
+    def request_rebuild():
+        """Make every host rebuild its index from the database"""
+        from utils.redis_utils import RedisCache
+        RedisCache.run_script(
+            UserIndex.RECORD_CHANGES_SCRIPT,
+            [UserIndex.VERSION_KEY, UserIndex.CHANGES_KEY, UserIndex.PRUNED_KEY],
+            [json.dumps({'rebuild': True, 'nonce': os.urandom(4).hex()}), UserIndex.KEEP_CHANGES],
+            invalidates=[UserIndex.VERSION_KEY, UserIndex.PRUNED_KEY]
+        )
+
+    @staticmethod
+    def to_record(user):
+        return (user.id, user.username, user.email, user.full_name, user.profile_picture)
+
+    @staticmethod
+    def register_change_tracking(session):
+        """Collect User changes on flush and publish them once per committed transaction"""
+        event.listen(session, 'after_flush', UserIndex._collect_changes)
+        event.listen(session, 'after_commit', UserIndex._publish_changes)
+        event.listen(session, 'after_rollback', UserIndex._discard_changes)
+
+    @staticmethod
+    def _collect_changes(session, flush_context):
+        from models import User
+
+        changes = session.info.setdefault('user_index_changes', {})
+        for user in session.new:
+            if isinstance(user, User):
+                changes[user.id] = UserIndex.to_record(user)
+        for user in session.dirty:
+            if isinstance(user, User):
+                state = inspect(user)
+                if any(state.attrs[field].history.has_changes() for field in UserIndex.INDEXED_FIELDS):
+                    changes[user.id] = UserIndex.to_record(user)
+        for user in session.deleted:
+            if isinstance(user, User):
+                changes[user.id] = None
+
+    @staticmethod
+    def _publish_changes(session):
+        changes = session.info.pop('user_index_changes', None)
+        if not changes:
+            return
+
+        try:
+            from utils.cache_helpers import UserSearchCache
+            UserSearchCache.get_backend().record_changes(changes)
+
+            # One invalidation of the cached search responses per transaction
+            from utils.route_cache import RouteCacheManager
+            RouteCacheManager.invalidate_related_cache(['users'])
+        except Exception as e:
+            current_app.logger.error(f"User index change error: {e}")
+
+    @staticmethod
+    def _discard_changes(session):
+        session.info.pop('user_index_changes', None)
+
+    @staticmethod
+    def schedule_rebuild():
+        """Rebuild the index in a background thread, at most one at a time per worker"""
+        with UserIndex._lock:
+            now = time.time()
+            if UserIndex._rebuilding or now - UserIndex._last_rebuild_attempt < UserIndex.REBUILD_RETRY_INTERVAL:
+                return
+            UserIndex._rebuilding = True
+            UserIndex._last_rebuild_attempt = now
+
+        from extensions import db
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    UserIndex.rebuild()
+                except Exception as e:
+                    app.logger.error(f"User index rebuild error: {e}")
+                finally:
+                    UserIndex._rebuilding = False
+                    db.session.remove()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    @staticmethod
+    def rebuild():
+        """
+        Build the index from the database and publish it
+
+        Returns:
+            int: Number of indexed users, or None if another worker on this
+            host is already building it
+        """
+        from models import User
+        from extensions import db
+
+        path = UserIndex.get_path()
+        with open(f"{path}.lock", 'w') as lock_file:
+            if fcntl:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+
+            # Read the version first: changes committed during the build stay in the overlay
+            version, _ = UserIndex.get_versions()
+            users = db.session.query(
+                User.id, User.username, User.email, User.full_name, User.profile_picture
+            ).all()
+
+            started = time.time()
+            MappedUserIndex.write(path, [tuple(user) for user in users], version)
+            current_app.logger.info(
+                f"User index built: {len(users)} users in {time.time() - started:.2f}s (version {version})"
+            )
+
+        with UserIndex._lock:
+            UserIndex._last_check = 0.0
+        return len(users)
+
+    @staticmethod
+    def get_stats():
+        index = UserIndex.current()
+        if index is None:
+            return {'index_exists': False}
+        version, pruned = UserIndex.get_versions()
+        overlay, rebuild_required = UserIndex.get_overlay(index.version, version)
+        return {
+            'backend': 'index',
+            'index_exists': True,
+            'indexed_users': index.size,
+            'index_bytes': len(index.mm),
+            'index_version': index.version,
+            'current_version': version,
+            'pending_changes': len(overlay),
+            'rebuild_required': rebuild_required or index.version < pruned
+        }
@@ -29,7 +29,7 @@ const Tasks = () => {
   const [tasks, setTasks] = useState([]);
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
-  const [pagination, setPagination] = useState({ total: 0, limit: 20, offset: 0, has_more: false });
+  const [pagination, setPagination] = useState({ limit: 20, cursor: null, has_more: false, next_cursor: null });
   const [filters, setFilters] = useState({
     search: '',
     project_id: '',
@@ -51,14 +51,14 @@ const Tasks = () => {
     return () => {
       loadingUnsubscribe();
     };
-  }, [filters, pagination.offset]);
+  }, [filters, pagination.cursor]);
 
   const fetchTasks = async () => {
     try {
       const params = {
         ...filters,
         limit: pagination.limit,
-        offset: pagination.offset
+        cursor: pagination.cursor
       };
       
       // Remove empty filters and "all" values
@@ -66,8 +66,10 @@ const Tasks = () => {
         if (!params[key] || params[key] === 'all') delete params[key];
       });
 
-      const allTasks = await taskAPI.getAllTasks(params);
-      setTasks(Array.isArray(allTasks) ? allTasks : []);
+      const response = await taskAPI.getAllTasks(params);
+      const pageTasks = Array.isArray(response.tasks) ? response.tasks : [];
+      setTasks(prev => (params.cursor ? [...prev, ...pageTasks] : pageTasks));
+      setPagination(prev => ({ ...prev, ...response.pagination }));
       setError('');
     } catch (err) {
       setError('Failed to fetch tasks: ' + (err.message || 'Unknown error'));
@@ -86,9 +88,25 @@ const Tasks = () => {
     }
   };
 
+  // A cursor only belongs to the filters and sort it was issued for, so any change
+  // starts over from the first page and drops the pages loaded so far
+  const applyFilters = (updateFilters) => {
+    setFilters(updateFilters);
+    setPagination(prev => ({ ...prev, cursor: null, has_more: false, next_cursor: null }));
+    setTasks([]);
+  };
+
   const handleFilterChange = (key, value) => {
-    setFilters(prev => ({ ...prev, [key]: value }));
-    setPagination(prev => ({ ...prev, offset: 0 }));
+    applyFilters(prev => ({ ...prev, [key]: value }));
+  };
+
+  // Start again from the first page; changing the cursor refetches through the effect
+  const reloadTasks = () => {
+    if (pagination.cursor) {
+      setPagination(prev => ({ ...prev, cursor: null }));
+    } else {
+      fetchTasks();
+    }
   };
 
   const handleDelete = async (taskId, projectId) => {
@@ -96,7 +114,7 @@ const Tasks = () => {
 
     try {
       await taskAPI.deleteTask(taskId, projectId);
-      fetchTasks();
+      reloadTasks();
       setError('');
     } catch (err) {
       setError('Failed to delete task: ' + (err.message || 'Unknown error'));
@@ -106,7 +124,7 @@ const Tasks = () => {
   const handleUpdateStatus = async (taskId, newStatus) => {
     try {
       await taskAPI.updateTaskStatus(taskId, newStatus);
-      fetchTasks();
+      reloadTasks();
       setError('');
     } catch (err) {
       setError('Failed to update task status: ' + (err.message || 'Unknown error'));
@@ -159,7 +177,7 @@ const Tasks = () => {
   };
 
   const loadMore = () => {
-    setPagination(prev => ({ ...prev, offset: prev.offset + prev.limit }));
+    setPagination(prev => ({ ...prev, cursor: prev.next_cursor }));
   };
 
   if (loading) {
@@ -267,7 +285,7 @@ const Tasks = () => {
             <div className="flex items-end">
               <Button 
                 variant="outline" 
-                onClick={() => setFilters({ search: '', project_id: 'all', status: 'all', owner: '' })}
+                onClick={() => applyFilters({ search: '', project_id: 'all', status: 'all', owner: '' })}
                 className="w-full"
               >
                 Clear Filters
@@ -11,6 +11,10 @@ export const taskAPI = {
     if (params.owner) queryParams.append('owner', params.owner);
     if (params.limit) queryParams.append('limit', params.limit);
     if (params.offset) queryParams.append('offset', params.offset);
+    if (params.cursor) queryParams.append('cursor', params.cursor);
+    if (params.sort) queryParams.append('sort', params.sort);
+    if (params.due_before) queryParams.append('due_before', params.due_before);
+    if (params.due_after) queryParams.append('due_after', params.due_after);
     
     const endpoint = queryParams.toString() ? `/tasks?${queryParams}` : '/tasks';
     return apiRequest(endpoint, 'GET', null, 'tasks-get-all');